@@ -1,5 +1,7 @@
 from __future__ import annotations
 from pathlib import Path
+import argparse
+import os
 import time
 
 from minitel.Minitel import Minitel
@@ -11,7 +13,16 @@ from minitel.tui.widget.widget import *
 from minitel.apps.dekstop.desktop import Desktop as SceneDesktop
 
 if __name__ == "__main__":
-    minitel = Minitel('COM6')
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "peripherique", nargs="?",
+        default=os.environ.get("MINITEL", "/dev/ttyUSB0"),
+        help="port série, tcp://hote:port, pty ou memoire://vitesse "
+             "(par défaut $MINITEL ou /dev/ttyUSB0)"
+    )
+    args = parser.parse_args()
+
+    minitel = Minitel(args.peripherique)
     minitel.deviner_vitesse()
     minitel.identifier()
 
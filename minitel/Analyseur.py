@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Analyseur est un module permettant de découper le flux d’octets envoyé
+par un Minitel en séquences complètes.
+
+"""
+
+from minitel.Sequence import Sequence
+from minitel.constantes import SS2, SEP, ESC
+
+# Second octet d’une séquence CSI (ESC, 0x5b)
+CSI_SUITE = 0x5b
+
+# Octets qui, après ESC 0x5b, annoncent un dernier octet
+CSI_PROLONGE = (0x32, 0x34)
+
+# Nombre de temps-caractères attendus après un ESC isolé avant de considérer
+# qu’il s’agit de la touche Esc et non du début d’une séquence
+CARACTERES_ECHAPPEMENT = 10
+
+# Délai minimal d’attente après un ESC isolé (en secondes), pour absorber la
+# latence des adaptateurs USB-série
+DELAI_ECHAPPEMENT_MIN = 0.02
+
+def delai_pour_vitesse(vitesse):
+    """Calcule le délai d’attente après un ESC isolé pour une vitesse donnée
+
+    Un caractère occupe 10 bits sur la ligne (1 bit de départ, 7 bits de
+    données, 1 bit de parité, 1 bit d’arrêt). Le délai correspond à
+    CARACTERES_ECHAPPEMENT caractères, sans descendre sous
+    DELAI_ECHAPPEMENT_MIN.
+
+    :param vitesse:
+        vitesse de la liaison en bits par seconde
+    :type vitesse:
+        un entier
+
+    :returns:
+        le délai en secondes
+    """
+    assert isinstance(vitesse, int) and vitesse > 0
+
+    return max(DELAI_ECHAPPEMENT_MIN, CARACTERES_ECHAPPEMENT * 10 / vitesse)
+
+class Analyseur:
+    """Un automate découpant les octets reçus en séquences Minitel
+
+    L’analyseur reçoit les octets par paquets quelconques (tels que lus sur
+    la liaison série) et produit des objets Sequence complets selon les
+    règles suivantes :
+
+    - SS2 ou SEP sont suivis d’exactement un octet,
+    - ESC est suivi d’un octet, sauf s’il est isolé (touche Esc),
+    - ESC 0x5b (CSI) est suivi d’un octet, ou de deux si le premier est
+      0x32 ou 0x34,
+    - tout autre octet forme une séquence à lui seul.
+
+    Un ESC isolé ne peut être distingué du début d’une séquence qu’en
+    laissant passer un peu de temps : la méthode expire le libère une fois
+    le délai d’échappement écoulé.
+    """
+    def __init__(self, delai = DELAI_ECHAPPEMENT_MIN):
+        """Constructeur d’Analyseur
+
+        :param delai:
+            délai en secondes après lequel un ESC isolé est considéré comme
+            une séquence complète
+        :type delai:
+            un flottant
+        """
+        assert isinstance(delai, (int, float)) and delai >= 0
+
+        self.delai = delai
+        self._sequence = bytearray()
+        self._attendus = 0
+        self._instant_echappement = None
+
+    @property
+    def en_attente(self):
+        """True si un ESC isolé attend la fin du délai d’échappement"""
+        return self._instant_echappement is not None
+
+    def echeance(self):
+        """Retourne l’instant auquel l’ESC en attente sera libéré
+
+        :returns:
+            un instant (au sens de time.monotonic) ou None si aucun ESC
+            n’est en attente.
+        """
+        if self._instant_echappement is None:
+            return None
+
+        return self._instant_echappement + self.delai
+
+    def analyse(self, octets, instant = 0.0):
+        """Analyse un paquet d’octets reçus
+
+        :param octets:
+            octets reçus du Minitel
+        :type octets:
+            bytes ou bytearray
+
+        :param instant:
+            instant de réception (au sens de time.monotonic), utilisé pour
+            le délai d’échappement
+        :type instant:
+            un flottant
+
+        :returns:
+            la liste des objets Sequence complétés par ce paquet.
+        """
+        sequences = []
+
+        for octet in octets:
+            self._sequence.append(octet)
+
+            if self._instant_echappement is not None:
+                # Un octet suit l’ESC : c’est bien une séquence ESC
+                self._instant_echappement = None
+                if octet == CSI_SUITE:
+                    self._attendus = 1
+                    continue
+            elif self._attendus > 0:
+                self._attendus -= 1
+                # ESC 0x5b 0x32/0x34 appelle un dernier octet
+                if (len(self._sequence) == 3 and self._sequence[1] == CSI_SUITE
+                        and octet in CSI_PROLONGE):
+                    self._attendus = 1
+                if self._attendus > 0:
+                    continue
+            elif octet in (SS2, SEP):
+                self._attendus = 1
+                continue
+            elif octet == ESC:
+                self._instant_echappement = instant
+                continue
+
+            sequences.append(Sequence(bytes(self._sequence)))
+            self._sequence = bytearray()
+
+        return sequences
+
+    def expire(self, instant):
+        """Libère l’ESC isolé si le délai d’échappement est écoulé
+
+        :param instant:
+            instant courant (au sens de time.monotonic)
+        :type instant:
+            un flottant
+
+        :returns:
+            une liste contenant la séquence ESC libérée, ou une liste vide.
+        """
+        echeance = self.echeance()
+        if echeance is None or instant < echeance:
+            return []
+
+        self._instant_echappement = None
+        self._sequence = bytearray()
+        return [Sequence([ESC])]
+
+    def reinitialise(self):
+        """Oublie la séquence en cours d’analyse"""
+        self._sequence = bytearray()
+        self._attendus = 0
+        self._instant_echappement = None
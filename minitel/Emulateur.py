@@ -0,0 +1,437 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Emulateur est un module fournissant un Minitel sans écran.
+
+L’émulateur interprète le flux d’octets envoyé par la classe Minitel (ou
+produit par un encodeur) et tient à jour une grille de 25 rangées de 40
+colonnes. Il comptabilise le temps que la transmission aurait pris sur une
+liaison 7E1 à la vitesse courante, ce qui permet de mesurer la durée réelle
+d’une trame sans Minitel physique.
+
+Comme il dérive de TransportMemoire, un Emulateur peut être passé
+directement au constructeur de la classe Minitel.
+
+Simplifications par rapport à un vrai Minitel :
+
+- seule la couleur de fond est un attribut série (validée par un
+  délimiteur) ; les autres attributs s’appliquent immédiatement,
+- les doubles tailles, le masquage et les jeux DRCS sont ignorés,
+- l’écran fonctionne en mode page (pas de défilement).
+
+"""
+
+from collections import namedtuple
+
+from minitel.Transport import TransportMemoire
+from minitel.Sequence import VIDEOTEX_TO_UNICODE
+from minitel.constantes import (BS, TAB, LF, VT, FF, CR, SO, SI,
+    CON, COF, REP, SEP, CAN, SS2, ESC, RS, US, SOH, EOT, PROG, B300, B1200,
+    B4800, B9600, ENQROM, STATUS_VITESSE, STATUS_FONCTIONNEMENT,
+    STATUS_TERMINAL, REP_STATUS_FONCTIONNEMENT, AIGUILLAGE_FROM)
+
+# Dimensions de l’écran : la rangée 0 est la ligne d’état
+COLONNES = 40
+RANGEES = 25
+
+# Couleurs par défaut (codes Minitel)
+ENCRE_DEFAUT = 7
+FOND_DEFAUT = 0
+
+# Longueur des commandes protocole selon leur second octet
+LONGUEURS_PRO = {0x39: 3, 0x3a: 4, 0x3b: 5}
+
+# Seconds octets SS2 des accents, suivis de la lettre accentuée
+ACCENTS = (0x41, 0x42, 0x43, 0x48, 0x4b)
+
+# Vitesses programmables par PRO2 PROG
+CODES_VITESSE = {B300: 300, B1200: 1200, B4800: 4800, B9600: 9600}
+
+# Réponse à PRO1 ENQROM : constructeur, type (Émulateur) et version
+IDENTIFICATION = bytes([SOH, 0x43, 0x67, 0x30, EOT])
+
+# Longueur maximale d’une séquence CSI avant de la considérer invalide
+LONGUEUR_CSI_MAX = 8
+
+Cellule = namedtuple('Cellule', [
+    'caractere', 'encre', 'fond', 'soulignement', 'clignotement',
+    'inversion', 'semigraphique'
+])
+
+CELLULE_VIDE = Cellule(' ', ENCRE_DEFAUT, FOND_DEFAUT, False, False, False,
+                       False)
+
+class Emulateur(TransportMemoire):
+    """Un Minitel sans écran
+
+    Tout ce qui est écrit sur l’émulateur est interprété immédiatement ;
+    les réponses aux commandes protocole (identification, vitesse, statuts)
+    sont relues par read comme si elles venaient d’un vrai Minitel.
+
+    Les attributs octets_ecrits et duree_simulee (hérités de
+    TransportMemoire) donnent le volume et le temps de transmission
+    cumulés ; trame() les remet à zéro.
+    """
+    def __init__(self, baudrate = 1200, timeout = 1, simule_debit = False):
+        """Constructeur d’Emulateur
+
+        :param baudrate:
+            vitesse de la liaison en bits par seconde
+        :type baudrate:
+            un entier
+
+        :param simule_debit:
+            True pour que flush attende la fin de la transmission simulée,
+            False pour seulement comptabiliser le temps (benchmarks)
+        :type simule_debit:
+            un booléen
+        """
+        TransportMemoire.__init__(self, baudrate, timeout, simule_debit)
+        # Vitesse à laquelle le terminal est programmé. Tant que la liaison
+        # n’est pas réglée à cette vitesse, les octets reçus sont illisibles
+        self.vitesse = baudrate
+        self._attente = bytearray()
+        self.reinitialise()
+
+    def reinitialise(self):
+        """Remet l’écran et l’état du terminal à zéro"""
+        self.ecran = [[CELLULE_VIDE] * COLONNES for _ in range(RANGEES)]
+        self.x = 1
+        self.y = 1
+        self.curseur = False
+        self._dernier = None
+        self._attente.clear()
+        self._reinitialise_attributs()
+
+    def _reinitialise_attributs(self):
+        self.encre = ENCRE_DEFAUT
+        self.fond = FOND_DEFAUT
+        self.fond_demande = FOND_DEFAUT
+        self.soulignement = False
+        self.clignotement = False
+        self.inversion = False
+        self.semigraphique = False
+
+    def trame(self):
+        """Clôture la trame en cours et retourne ses statistiques
+
+        :returns:
+            un dictionnaire contenant le nombre d’octets reçus ('octets') et
+            le temps de transmission simulé en secondes ('duree')
+        """
+        trame = {'octets': self.octets_ecrits, 'duree': self.duree_simulee}
+        self.octets_ecrits = 0
+        self.duree_simulee = 0.0
+        return trame
+
+    def cellule(self, x, y):
+        """Retourne la cellule en colonne x (1 à 40), rangée y (0 à 24)"""
+        return self.ecran[y][x - 1]
+
+    def texte(self, y):
+        """Retourne les caractères d’une rangée sous forme de chaîne"""
+        return ''.join(cellule.caractere for cellule in self.ecran[y])
+
+    def _emet(self, octets):
+        self._comptabilise(octets)
+        if self._baudrate == self.vitesse:
+            self.interprete(octets)
+
+    def interprete(self, octets):
+        """Interprète des octets comme s’ils étaient reçus par le Minitel
+
+        Le temps de transmission est comptabilisé par write ; cette méthode
+        peut aussi être appelée directement pour rejouer un flux.
+
+        :param octets:
+            octets à interpréter
+        :type octets:
+            bytes, bytearray ou liste d’entiers
+        """
+        tampon = self._attente
+        tampon += bytes(octets)
+
+        position = 0
+        while position < len(tampon):
+            longueur = self._element(tampon, position)
+            if longueur == 0:
+                # Séquence incomplète : attend la suite
+                break
+            position += longueur
+
+        del tampon[:position]
+
+    def _emet_reponse(self, octets):
+        """Place une réponse du Minitel dans la file de lecture"""
+        with self._condition:
+            self._arrivees.append((0.0, bytes(octets)))
+            self._condition.notify_all()
+
+    def _element(self, tampon, i):
+        """Interprète l’élément commençant à l’indice i
+
+        :returns:
+            le nombre d’octets consommés, 0 si l’élément est incomplet
+        """
+        octet = tampon[i] & 0x7f
+        reste = len(tampon) - i
+
+        if octet >= 0x20:
+            if octet != 0x7f or self.semigraphique:
+                self._pose(chr(octet))
+            return 1
+
+        if octet == ESC:
+            return self._echappement(tampon, i)
+
+        if octet == US:
+            if reste < 3:
+                return 0
+            self._reinitialise_attributs()
+            self._deplace(tampon[i + 2] & 0x3f, tampon[i + 1] & 0x3f)
+            return 3
+
+        if octet == SS2:
+            if reste < 2:
+                return 0
+            longueur = 2
+            if tampon[i + 1] in ACCENTS:
+                # Accent suivi de la lettre accentuée
+                if reste < 3:
+                    return 0
+                longueur = 3
+            code = bytes(tampon[i:i + longueur])
+            caractere = VIDEOTEX_TO_UNICODE.get(code)
+            if caractere is None and longueur == 3:
+                # Accent inconnu : la lettre seule est affichée
+                caractere = chr(tampon[i + 2] & 0x7f)
+            self._pose(caractere or '_')
+            return longueur
+
+        if octet == REP:
+            if reste < 2:
+                return 0
+            if self._dernier is not None:
+                for _ in range((tampon[i + 1] & 0x7f) - 0x40):
+                    self._pose(self._dernier)
+            return 2
+
+        if octet == SEP:
+            return 2 if reste >= 2 else 0
+
+        if octet == RS:
+            self._reinitialise_attributs()
+            self._deplace(1, 1)
+        elif octet == FF:
+            for y in range(1, RANGEES):
+                self.ecran[y] = [CELLULE_VIDE] * COLONNES
+            self._reinitialise_attributs()
+            self._deplace(1, 1)
+        elif octet == CAN:
+            self._efface(self.y, self.x, COLONNES)
+        elif octet == SO:
+            self.semigraphique = True
+        elif octet == SI:
+            self.semigraphique = False
+        elif octet == BS:
+            self._recule()
+        elif octet == TAB:
+            self._avance()
+        elif octet == LF:
+            self._deplace(self.x, self.y + 1 if self.y < RANGEES - 1 else 1)
+        elif octet == VT:
+            self._deplace(self.x, self.y - 1 if self.y > 1 else RANGEES - 1)
+        elif octet == CR:
+            self.x = 1
+        elif octet == CON:
+            self.curseur = True
+        elif octet == COF:
+            self.curseur = False
+        # NUL, BEL et les autres codes de contrôle sont sans effet à l’écran
+
+        return 1
+
+    def _echappement(self, tampon, i):
+        """Interprète une séquence commençant par ESC"""
+        reste = len(tampon) - i
+        if reste < 2:
+            return 0
+
+        code = tampon[i + 1] & 0x7f
+
+        if code == 0x5b:
+            # CSI : paramètres numériques puis un octet final
+            for fin in range(i + 2, min(len(tampon), i + LONGUEUR_CSI_MAX)):
+                if 0x40 <= tampon[fin] <= 0x7e:
+                    self._csi(bytes(tampon[i + 2:fin]), tampon[fin])
+                    return fin - i + 1
+            if reste >= LONGUEUR_CSI_MAX:
+                # Séquence invalide, ignorée
+                return LONGUEUR_CSI_MAX
+            return 0
+
+        if code in LONGUEURS_PRO:
+            longueur = LONGUEURS_PRO[code]
+            if reste < longueur:
+                return 0
+            self._protocole(bytes(tampon[i + 1:i + longueur]))
+            return longueur
+
+        if code in (0x23, 0x28, 0x29, 0x2a, 0x2b):
+            # Attributs de zone et désignation de jeux de caractères
+            if reste < 3:
+                return 0
+            if tampon[i + 2] == 0x20:
+                return 4 if reste >= 4 else 0
+            return 3
+
+        if code == 0x61:
+            # Demande de position du curseur
+            self._emet_reponse([US, 0x40 + self.y, 0x40 + self.x])
+        elif 0x40 <= code <= 0x47:
+            self.encre = code - 0x40
+        elif 0x50 <= code <= 0x57:
+            self.fond_demande = code - 0x50
+            if self.semigraphique:
+                # En semi-graphique, le fond s’applique immédiatement
+                self.fond = self.fond_demande
+        elif code == 0x48:
+            self.clignotement = True
+        elif code == 0x49:
+            self.clignotement = False
+        elif code == 0x59:
+            self.soulignement = False
+        elif code == 0x5a:
+            self.soulignement = True
+        elif code == 0x5c:
+            self.inversion = False
+        elif code == 0x5d:
+            self.inversion = True
+        # Tailles, masquage, etc. sont ignorés
+
+        return 2
+
+    def _csi(self, parametres, final):
+        """Exécute une commande CSI"""
+        valeurs = [
+            int(valeur) if valeur else 0
+            for valeur in parametres.decode('latin-1').split(';')
+            if valeur.isdigit() or valeur == ''
+        ]
+        nombre = max(1, valeurs[0]) if valeurs else 1
+        mode = valeurs[0] if valeurs else 0
+
+        if final == 0x41:
+            self._deplace(self.x, max(1, self.y - nombre))
+        elif final == 0x42:
+            self._deplace(self.x, min(RANGEES - 1, self.y + nombre))
+        elif final == 0x43:
+            self._deplace(min(COLONNES, self.x + nombre), self.y)
+        elif final == 0x44:
+            self._deplace(max(1, self.x - nombre), self.y)
+        elif final == 0x48:
+            y = valeurs[0] if valeurs and valeurs[0] else 1
+            x = valeurs[1] if len(valeurs) > 1 and valeurs[1] else 1
+            self._reinitialise_attributs()
+            self._deplace(x, y)
+        elif final == 0x4a:
+            if mode == 0:
+                self._efface(self.y, self.x, COLONNES)
+                for y in range(self.y + 1, RANGEES):
+                    self._efface(y, 1, COLONNES)
+            elif mode == 1:
+                for y in range(1, self.y):
+                    self._efface(y, 1, COLONNES)
+                self._efface(self.y, 1, self.x)
+            else:
+                for y in range(1, RANGEES):
+                    self._efface(y, 1, COLONNES)
+        elif final == 0x4b:
+            if mode == 0:
+                self._efface(self.y, self.x, COLONNES)
+            elif mode == 1:
+                self._efface(self.y, 1, self.x)
+            else:
+                self._efface(self.y, 1, COLONNES)
+        elif final == 0x50:
+            rangee = self.ecran[self.y]
+            del rangee[self.x - 1:self.x - 1 + nombre]
+            rangee.extend([CELLULE_VIDE] * (COLONNES - len(rangee)))
+        elif final == 0x40:
+            rangee = self.ecran[self.y]
+            rangee[self.x - 1:self.x - 1] = [CELLULE_VIDE] * nombre
+            del rangee[COLONNES:]
+        elif final == 0x4d:
+            del self.ecran[self.y:self.y + nombre]
+            while len(self.ecran) < RANGEES:
+                self.ecran.append([CELLULE_VIDE] * COLONNES)
+        elif final == 0x4c:
+            for _ in range(nombre):
+                self.ecran.insert(self.y, [CELLULE_VIDE] * COLONNES)
+            del self.ecran[RANGEES:]
+        # Les autres commandes (modes h/l notamment) sont ignorées
+
+    def _protocole(self, commande):
+        """Répond aux commandes protocole comme le ferait un Minitel"""
+        if commande[0] == 0x39:
+            if commande[1] == ENQROM:
+                self._emet_reponse(IDENTIFICATION)
+            elif commande[1] == STATUS_VITESSE:
+                # Une vitesse hors des vitesses du Minitel (banc de mesure)
+                # est annoncée comme la plus proche d’entre elles
+                code = min(
+                    CODES_VITESSE,
+                    key=lambda code: abs(CODES_VITESSE[code] - self.vitesse)
+                )
+                self._emet_reponse([ESC, 0x3a, 0x75, code])
+            elif commande[1] in (STATUS_FONCTIONNEMENT, STATUS_TERMINAL):
+                self._emet_reponse([ESC, 0x3a, commande[1] + 1, 0x40])
+        elif commande[0] == 0x3a:
+            if commande[1] == PROG:
+                # Le Minitel change de vitesse sans acquitter
+                vitesse = CODES_VITESSE.get(commande[2])
+                if vitesse is not None:
+                    self.vitesse = vitesse
+            else:
+                self._emet_reponse(
+                    [ESC, 0x3a, REP_STATUS_FONCTIONNEMENT, 0x40]
+                )
+        else:
+            self._emet_reponse([ESC, 0x3b, AIGUILLAGE_FROM, commande[2], 0x40])
+
+    def _deplace(self, x, y):
+        self.x = min(max(x, 1), COLONNES)
+        self.y = min(max(y, 0), RANGEES - 1)
+
+    def _avance(self):
+        if self.x < COLONNES:
+            self.x += 1
+        elif self.y > 0:
+            # Passage à la rangée suivante : les attributs série retombent
+            self.x = 1
+            self.y = self.y + 1 if self.y < RANGEES - 1 else 1
+            self.fond = FOND_DEFAUT
+            self.fond_demande = FOND_DEFAUT
+
+    def _recule(self):
+        if self.x > 1:
+            self.x -= 1
+        elif self.y > 0:
+            self.x = COLONNES
+            self.y = self.y - 1 if self.y > 1 else RANGEES - 1
+
+    def _efface(self, y, debut, fin):
+        """Remplace par des cellules vides les colonnes debut à fin"""
+        self.ecran[y][debut - 1:fin] = [CELLULE_VIDE] * (fin - debut + 1)
+
+    def _pose(self, caractere):
+        """Affiche un caractère à la position du curseur"""
+        if caractere == ' ' and not self.semigraphique:
+            # Un espace est un délimiteur : il valide le fond demandé
+            self.fond = self.fond_demande
+
+        self.ecran[self.y][self.x - 1] = Cellule(
+            caractere, self.encre, self.fond, self.soulignement,
+            self.clignotement, self.inversion, self.semigraphique
+        )
+        self._dernier = caractere
+        self._avance()
@@ -4,11 +4,13 @@
 écrit en Python.
 """
 import time
-from serial import Serial      # Liaison physique avec le Minitel
-from threading import Thread   # Threads pour l’émission/réception
+from threading import Thread, Lock # Threads pour l’émission/réception
 from queue import Queue, Empty # Files de caractères pour l’émission/réception
 
 from minitel.Sequence import Sequence # Gestion des séquences de caractères
+from minitel.Sequence import DecodeurMinitel # Décodage des octets reçus
+from minitel.Analyseur import Analyseur, delai_pour_vitesse # Découpage du flux reçu
+from minitel.Transport import Transport, ouvrir_transport # Liaison avec le Minitel
 
 from minitel.constantes import (CTRL_ENTREE, SS2, SEP, ESC, CSI, PRO1, PRO2, PRO3, MIXTE1,
     MIXTE2, STATUS_VITESSE, TELINFO, ENQROM, SOH, EOT, TYPE_MINITELS, STATUS_FONCTIONNEMENT,
@@ -18,6 +20,137 @@ from minitel.constantes import (CTRL_ENTREE, SS2, SEP, ESC, CSI, PRO1, PRO2, PRO
     SO, SI, B300, B1200, B4800, B9600, REP, COULEURS_MINITEL,
     CAPACITES_BASIQUES, CONSTRUCTEURS, ENVOI)
 
+# Taille maximale (en octets) d’un paquet écrit en une seule fois sur la
+# liaison série
+TAILLE_PAQUET = 256
+
+# Temps maximal (en secondes) pendant lequel le thread d’émission attend
+# d’autres séquences pour compléter un paquet avant de l’écrire
+DELAI_PAQUET = 0.005
+
+# Intervalle (en secondes) de surveillance de la liaison pendant l’attente
+# qui suit la réception d’un ESC isolé
+SCRUTATION_ECHAPPEMENT = 0.002
+
+# Étapes de changement de mode : pour chaque couple (mode actuel, mode
+# demandé), la liste des commandes à envoyer avec la longueur et le contenu
+# de la réponse attendue. Il n’existe pas de commande permettant de passer
+# directement du mode TéléInformatique au mode Mixte, la transition se fait
+# donc en deux étapes en passant par le mode Videotex.
+TRANSITIONS_MODE = {
+    ('TELEINFORMATIQUE', 'VIDEOTEX'): [
+        ([CSI, 0x3f, 0x7b], 2, [SEP, 0x5e])
+    ],
+    ('TELEINFORMATIQUE', 'MIXTE'): [
+        ([CSI, 0x3f, 0x7b], 2, [SEP, 0x5e]),
+        ([PRO2, MIXTE1], 2, [SEP, 0x70])
+    ],
+    ('VIDEOTEX', 'MIXTE'): [
+        ([PRO2, MIXTE1], 2, [SEP, 0x70])
+    ],
+    ('VIDEOTEX', 'TELEINFORMATIQUE'): [
+        ([PRO2, TELINFO], 4, [CSI, 0x3f, 0x7a])
+    ],
+    ('MIXTE', 'VIDEOTEX'): [
+        ([PRO2, MIXTE2], 2, [SEP, 0x71])
+    ],
+    ('MIXTE', 'TELEINFORMATIQUE'): [
+        ([PRO2, TELINFO], 4, [CSI, 0x3f, 0x7a])
+    ]
+}
+
+# Codes de programmation des vitesses possibles jusqu’au Minitel 2
+VITESSES = {300: B300, 1200: B1200, 4800: B4800, 9600: B9600}
+
+# Commandes d’activation et de désactivation de l’écho clavier
+COMMANDES_ECHO = {
+    True: [PRO3, AIGUILLAGE_ON, RCPT_ECRAN, EMET_MODEM],
+    False: [PRO3, AIGUILLAGE_OFF, RCPT_ECRAN, EMET_MODEM]
+}
+
+def commandes_clavier(etendu, curseur, minuscule):
+    """Retourne les commandes de configuration du clavier
+
+    Les commandes clavier fonctionnent sur un principe de bascule
+    start/stop.
+
+    :returns:
+        une liste de tuples (commande, longueur de la réponse attendue)
+    """
+    bascules = { True: START, False: STOP }
+
+    return [
+        ([PRO3, bascules[etendu   ], RCPT_CLAVIER, ETEN], LONGUEUR_PRO3),
+        ([PRO3, bascules[curseur  ], RCPT_CLAVIER, C0  ], LONGUEUR_PRO3),
+        ([PRO2, bascules[minuscule], MINUSCULES        ], LONGUEUR_PRO2)
+    ]
+
+def lire_identification(retour):
+    """Interprète la réponse du Minitel à la commande d’identification
+
+    :param retour:
+        réponse du Minitel à la commande PRO1 ENQROM
+    :type retour:
+        un objet Sequence
+
+    :returns:
+        le dictionnaire des capacités du Minitel (voir Minitel.identifier)
+        ou None si la réponse n’est pas valide.
+    """
+    # Teste la validité de la réponse
+    if (retour.longueur != 5 or
+        retour.valeurs[0] != SOH or
+        retour.valeurs[4] != EOT):
+        return None
+
+    capacite = CAPACITES_BASIQUES
+
+    # Extrait les caractères d’identification
+    constructeur_minitel = chr(retour.valeurs[1])
+    type_minitel         = chr(retour.valeurs[2])
+    version_logiciel     = chr(retour.valeurs[3])
+
+    # Types de Minitel
+    if type_minitel in TYPE_MINITELS:
+        capacite = TYPE_MINITELS[type_minitel]
+
+    if constructeur_minitel in CONSTRUCTEURS:
+        capacite['constructeur'] = CONSTRUCTEURS[constructeur_minitel]
+
+    capacite['version'] = version_logiciel
+
+    # Correction du constructeur
+    if constructeur_minitel == 'B' and type_minitel == 'v':
+        capacite['constructeur'] = 'Philips'
+    elif constructeur_minitel == 'C':
+        if version_logiciel == ['4', '5', ';', '<']:
+            capacite['constructeur'] = 'Telic ou Matra'
+
+    return capacite
+
+def lire_mode(retour):
+    """Déduit le mode écran de la réponse au status fonctionnement
+
+    :param retour:
+        réponse du Minitel à la commande PRO1 STATUS_FONCTIONNEMENT
+    :type retour:
+        un objet Sequence
+
+    :returns:
+        VIDEOTEX, MIXTE ou TELEINFORMATIQUE
+    """
+    if retour.longueur != LONGUEUR_PRO2:
+        # Le Minitel est en mode Téléinformatique car il ne répond pas
+        # à une commande protocole
+        return 'TELEINFORMATIQUE'
+
+    if retour.valeurs[3] & 1 == 1:
+        # Le bit 1 du status fonctionnement indique le mode 80 colonnes
+        return 'MIXTE'
+
+    # Par défaut, on considère qu’on est en mode Vidéotex
+    return 'VIDEOTEX'
+
 def normaliser_couleur(couleur):
     """Retourne le numéro de couleur du Minitel.
 
@@ -100,7 +233,9 @@ class Minitel:
         minitel.close()
 
     """
-    def __init__(self, peripherique = '/dev/ttyUSB0'):
+    def __init__(self, peripherique = '/dev/ttyUSB0',
+                 taille_paquet = TAILLE_PAQUET, delai_paquet = DELAI_PAQUET,
+                 delai_echappement = None):
         """Constructeur de Minitel
 
         La connexion série est établie selon le standard de base du Minitel.
@@ -113,12 +248,40 @@ class Minitel:
 
         :param peripherique:
             Le périphérique sur lequel est connecté le Minitel.Par défaut, le
-            périphérique est /dev/ttyUSB0
+            périphérique est /dev/ttyUSB0. L’adresse peut aussi désigner une
+            passerelle TCP, un pseudo-terminal ou une liaison en mémoire
+            (voir Transport.ouvrir_transport), ou être directement un objet
+            Transport.
         :type peripherique:
-            String
-    
+            String ou Transport
+
+        :param taille_paquet:
+            Nombre maximal d’octets regroupés dans un même appel d’écriture
+            sur la liaison série. Une valeur de 1 retrouve le fonctionnement
+            historique (un appel write/flush par octet).
+        :type taille_paquet:
+            un entier positif
+
+        :param delai_paquet:
+            Temps en secondes pendant lequel le thread d’émission attend
+            d’autres envois pour compléter un paquet. À 0, seuls les envois
+            déjà présents dans la file sont regroupés.
+        :type delai_paquet:
+            un flottant positif ou nul
+
+        :param delai_echappement:
+            Temps en secondes au-delà duquel un ESC reçu seul est considéré
+            comme l’appui sur la touche Esc. À None, le délai est déduit de
+            la vitesse de la liaison (voir Analyseur.delai_pour_vitesse).
+        :type delai_echappement:
+            un flottant positif ou None
         """
-        assert isinstance(peripherique, str)
+        assert isinstance(peripherique, (str, Transport))
+        assert isinstance(taille_paquet, int) and taille_paquet > 0
+        assert isinstance(delai_paquet, (int, float)) and delai_paquet >= 0
+        assert delai_echappement == None or \
+                (isinstance(delai_echappement, (int, float)) and
+                 delai_echappement >= 0)
 
         # Initialise l’état du Minitel
         self.mode = 'VIDEOTEX'
@@ -128,21 +291,35 @@ class Minitel:
         # Initialise la liste des capacités du Minitel
         self.capacite = CAPACITES_BASIQUES
 
-        # Crée les deux files d’attente entrée/sortie
+        # Crée les deux files d’attente entrée/sortie. La file d’entrée
+        # contient des objets Sequence complets produits par l’analyseur.
         self.entree = Queue()
         self.sortie = Queue()
 
+        # Analyseur du flux reçu et octets d’une séquence partiellement lue
+        # par la méthode recevoir
+        self.delai_echappement = delai_echappement
+        self._analyseur = Analyseur()
+        self._reste = bytearray()
+
+        # Paramètres de regroupement des envois en paquets
+        self.taille_paquet = taille_paquet
+        self.delai_paquet = delai_paquet
+
+        # Statistiques d’émission (totaux et trame en cours)
+        self._verrou_stats = Lock()
+        self.octets_envoyes = 0
+        self.ecritures = 0
+        self._trame = {'octets': 0, 'ecritures': 0, 'duree': 0.0}
+
+        # Octets confiés à send mais pas encore écrits sur la liaison série
+        self.octets_en_attente = 0
+
         # Initialise la connexion avec le Minitel
-        self._minitel = Serial(
-            peripherique,
-            baudrate = 1200, # vitesse à 1200 bps, le standard Minitel
-            bytesize = 7,    # taille de caractère à 7 bits
-            parity   = 'E',  # parité paire
-            stopbits = 1,    # 1 bit d’arrêt
-            timeout  = 1,    # 1 bit de timeout
-            xonxoff  = 0,    # pas de contrôle logiciel
-            rtscts   = 0     # pas de contrôle matériel
-        )
+        if isinstance(peripherique, Transport):
+            self._minitel = peripherique
+        else:
+            self._minitel = ouvrir_transport(peripherique)
 
         # Initialise un drapeau pour l’arrêt des threads
         # (les threads partagent les mêmes variables que le code principal)
@@ -184,40 +361,134 @@ class Minitel:
         """Gestion des séquences de caractères envoyées depuis le Minitel
 
         Cette méthode ne doit pas être appelée directement, elle est réservée
-        exclusivement à la classe Minitel. Elle boucle indéfiniment en tentant
-        de lire un caractère sur la connexion série.
+        exclusivement à la classe Minitel. Elle boucle indéfiniment en lisant
+        d’un coup tous les octets disponibles sur la connexion série et en
+        les confiant à l’analyseur, qui ajoute à la file entree les séquences
+        complètes.
         """
         # Ajoute à la file entree tout ce que le Minitel peut envoyer
         while self._continuer:
-            # Attend un caractère pendant 1 seconde
-            caractere = self._minitel.read()
-            if len(caractere) == 1:
-                self.entree.put(caractere)
+            if self.delai_echappement == None:
+                self._analyseur.delai = delai_pour_vitesse(self.vitesse)
+            else:
+                self._analyseur.delai = self.delai_echappement
+
+            echeance = self._analyseur.echeance()
+            if echeance == None:
+                # Attend un premier octet pendant 1 seconde
+                octets = self._minitel.read(1)
+            else:
+                # Un ESC isolé est en attente : surveille l’arrivée d’un
+                # octet sans dépasser l’échéance du délai d’échappement
+                octets = b''
+                while (not self._minitel.in_waiting and
+                       time.monotonic() < echeance):
+                    time.sleep(SCRUTATION_ECHAPPEMENT)
+
+            # Lit d’un coup tout ce qui est disponible
+            if self._minitel.in_waiting:
+                octets += self._minitel.read(self._minitel.in_waiting)
+
+            maintenant = time.monotonic()
+            sequences = self._analyseur.analyse(octets, maintenant)
+            sequences += self._analyseur.expire(maintenant)
+            for sequence in sequences:
+                self.entree.put(sequence)
 
     def _gestion_sortie(self):
         """Gestion des séquences de caractères envoyées vers le Minitel
 
         Cette méthode ne doit pas être appelée directement, elle est réservée
         exclusivement à la classe Minitel. Elle boucle indéfiniment en tentant
-        de lire un caractère sur la file de sortie.
+        de lire une séquence sur la file de sortie.
+
+        Les séquences présentes dans la file (ou arrivant dans un délai de
+        delai_paquet secondes) sont regroupées en paquets d’au plus
+        taille_paquet octets. Chaque paquet est écrit en un seul appel suivi
+        d’un seul flush, ce qui évite un appel système par octet.
         """
         # Envoie au Minitel tout ce qui se trouve dans la file sortie et
         # continue de le faire tant que le drapeau continuer est à vrai
         while self._continuer or not self.sortie.empty():
-            # Attend un caractère pendant 1 seconde
+            # Attend une première séquence pendant 1 seconde
             try:
-                sortie_unicode = self.sortie.get(block = True, timeout = 1)
-                self._minitel.write(sortie_unicode.encode())
+                paquet = bytearray(self.sortie.get(block = True, timeout = 1))
+            except Empty:
+                continue
 
-                # Attend que le caractère envoyé au minitel ait bien été envoyé
-                # car la sortie est bufferisée
-                self._minitel.flush()
+            # Nombre de séquences retirées de la file pour ce paquet
+            retirees = 1
+
+            # Complète le paquet avec les séquences suivantes
+            limite = time.monotonic() + self.delai_paquet
+            while len(paquet) < self.taille_paquet:
+                reste = limite - time.monotonic()
+                try:
+                    if reste > 0:
+                        paquet += self.sortie.get(block = True, timeout = reste)
+                    else:
+                        paquet += self.sortie.get(block = False)
+                except Empty:
+                    break
+                retirees += 1
 
-                # Permet à la méthode join de la file de fonctionner
+            # Écrit le paquet, découpé en morceaux de taille_paquet octets
+            for debut in range(0, len(paquet), self.taille_paquet):
+                self._ecrire(paquet[debut:debut + self.taille_paquet])
+
+            # Permet à la méthode join de la file de fonctionner
+            for _ in range(retirees):
                 self.sortie.task_done()
 
-            except Empty:
-                continue
+    def _ecrire(self, octets):
+        """Écrit un paquet d’octets sur la liaison série
+
+        Le paquet est écrit en un seul appel, puis la méthode attend qu’il ait
+        bien été envoyé (la sortie est bufferisée). Les statistiques
+        d’émission sont mises à jour au passage.
+
+        :param octets:
+            octets à écrire
+        :type octets:
+            bytes ou bytearray
+        """
+        debut = time.monotonic()
+        self._minitel.write(octets)
+        self._minitel.flush()
+        duree = time.monotonic() - debut
+
+        with self._verrou_stats:
+            self.octets_envoyes += len(octets)
+            self.octets_en_attente -= len(octets)
+            self.ecritures += 1
+            self._trame['octets'] += len(octets)
+            self._trame['ecritures'] += 1
+            self._trame['duree'] += duree
+
+    def nouvelle_trame(self):
+        """Clôture la trame en cours et retourne ses statistiques d’émission
+
+        Une trame correspond à tout ce qui a été écrit sur la liaison série
+        depuis le précédent appel à cette méthode (typiquement un
+        rafraîchissement d’écran). Les statistiques permettent de vérifier
+        que la liaison est bien saturée à 4800 ou 9600 bps.
+
+        :returns:
+            un dictionnaire contenant le nombre d’octets écrits ('octets'), le
+            nombre d’appels d’écriture ('ecritures'), le temps passé à écrire
+            en secondes ('duree') et le débit obtenu en octets par seconde
+            ('debit', 0 si rien n’a été écrit).
+        """
+        with self._verrou_stats:
+            trame = self._trame
+            self._trame = {'octets': 0, 'ecritures': 0, 'duree': 0.0}
+
+        if trame['duree'] > 0:
+            trame['debit'] = trame['octets'] / trame['duree']
+        else:
+            trame['debit'] = 0.0
+
+        return trame
 
     def send(self, content: str | Sequence) -> None:
         """Envoi de séquence de caractères 
@@ -234,9 +505,11 @@ class Minitel:
         if not isinstance(content, Sequence):
             content = Sequence(content, standard=self.mode)
 
-        # Ajoute les caractères un par un dans la file d’attente d’envoi
-        for value in content.valeurs:
-            self.sortie.put(chr(value))
+        # Ajoute la séquence d’un bloc dans la file d’attente d’envoi
+        if content.longueur:
+            with self._verrou_stats:
+                self.octets_en_attente += content.longueur
+            self.sortie.put(bytes(content.octets))
 
     def recevoir(self, bloque = False, attente = None):
         """Lit un caractère en provenance du Minitel
@@ -265,7 +538,11 @@ class Minitel:
         assert bloque in [True, False]
         assert isinstance(attente, (int,float)) or attente == None
 
-        return self.entree.get(bloque, attente).decode()
+        # Entame une nouvelle séquence si la précédente a été consommée
+        if not self._reste:
+            self._reste += self.entree.get(bloque, attente).octets
+
+        return chr(self._reste.pop(0))
 
     def recevoir_sequence(self, bloque = True, attente=None):
         """Lit une séquence en provenance du Minitel
@@ -300,38 +577,16 @@ class Minitel:
         :returns:
             un objet Sequence
         """
-        # Crée une séquence
-        sequence = Sequence()
-
-        # Ajoute le premier caractère lu à la séquence en mode bloquant
-        sequence.ajoute(self.recevoir(bloque = bloque, attente = attente))
+        # Termine d’abord une séquence partiellement lue par recevoir
+        if self._reste:
+            sequence = Sequence(bytes(self._reste))
+            self._reste.clear()
+            return sequence
+
+        # Les séquences sont assemblées par l’analyseur du thread de lecture
+        sequence = self.entree.get(bloque, attente)
         assert sequence.longueur != 0
 
-        # Teste le caractère reçu
-        if sequence.valeurs[-1] in [SS2, SEP]:
-            # Une séquence commençant par SS2 ou SEP aura une longueur de 2
-            sequence.ajoute(self.recevoir(bloque = True))
-        elif sequence.valeurs[-1] == ESC:
-            # Les séquences ESC ont des tailles variables allant de 1 à 4
-            try:
-                # Essaie de lire un caractère avec un temps d’attente de 1/10s
-                # Cela permet de lire la touche la touche Esc qui envoie
-                # uniquement le code ESC sans rien après.
-                sequence.ajoute(self.recevoir(bloque = True, attente = 0.1))
-
-                # Une séquence CSI commence par ESC, 0x5b
-                if sequence.valeurs == CSI:
-                    # Une séquence CSI appelle au moins 1 caractère
-                    sequence.ajoute(self.recevoir(bloque = True))
-
-                    if sequence.valeurs[-1] in [0x32, 0x34]:
-                        # La séquence ESC, 0x5b, 0x32/0x34 appelle un dernier
-                        # caractère
-                        sequence.ajoute(self.recevoir(bloque = True))
-            except Empty:
-                # Si aucun caractère n’est survenu après 1/10s, on continue
-                pass
-
         return sequence
 
     def appeler(self, contenu, attente):
@@ -366,6 +621,7 @@ class Minitel:
 
         # Vide la file d’attente en réception
         self.entree = Queue()
+        self._reste = bytearray()
 
         # Envoie la séquence
         self.send(contenu)
@@ -374,19 +630,19 @@ class Minitel:
         self.sortie.join()
         
         # Tente de recevoir le nombre de caractères indiqué par le paramètre
-        # attente avec un délai d’1 seconde.
-        retour = Sequence()
-        for t in range(0, attente):
-            time.sleep(0.1)
+        # attente avec un délai d’1 seconde entre chaque séquence reçue.
+        octets = bytearray()
+        while len(octets) < attente:
             try:
-                # Attend un caractère
-                entree_bytes = self.entree.get(block = True, timeout = 1)
-                retour.ajoute(entree_bytes.decode())
+                # Attend une séquence
+                octets += self.entree.get(block = True, timeout = 1).octets
             except Empty:
-                # Si un caractère n’a pas été envoyé en moins d’une seconde,
-                # on abandonne
+                # Si rien n’a été envoyé en moins d’une seconde, on abandonne
                 break
-        return retour
+
+        # Les octets en trop restent disponibles pour la prochaine lecture
+        self._reste = octets[attente:]
+        return Sequence(bytes(octets[:attente]))
 
     def definir_mode(self, mode = 'VIDEOTEX'):
         """Définit le mode de fonctionnement du Minitel.
@@ -422,34 +678,13 @@ class Minitel:
         # Il y a 9 cas possibles, mais seulement 6 sont pertinents. Les cas
         # demandant de passer de VIDEOTEX à VIDEOTEX, par exemple, ne donnent
         # lieu à aucune transaction avec le Minitel
-        if self.mode == 'TELEINFORMATIQUE' and mode == 'VIDEOTEX':
-            retour = self.appeler([CSI, 0x3f, 0x7b], 2)
-            resultat = retour.egale([SEP, 0x5e])
-        elif self.mode == 'TELEINFORMATIQUE' and mode == 'MIXTE':
-            # Il n’existe pas de commande permettant de passer directement du
-            # mode TéléInformatique au mode Mixte. On effectue donc la
-            # transition en deux étapes en passant par le mode Videotex
-            retour = self.appeler([CSI, 0x3f, 0x7b], 2)
-            resultat = retour.egale([SEP, 0x5e])
+        for commande, longueur, reponse in TRANSITIONS_MODE[(self.mode, mode)]:
+            retour = self.appeler(commande, longueur)
+            resultat = retour.egale(reponse)
 
             if not resultat:
                 return False
 
-            retour = self.appeler([PRO2, MIXTE1], 2)
-            resultat = retour.egale([SEP, 0x70])
-        elif self.mode == 'VIDEOTEX' and mode == 'MIXTE':
-            retour = self.appeler([PRO2, MIXTE1], 2)
-            resultat = retour.egale([SEP, 0x70])
-        elif self.mode == 'VIDEOTEX' and mode == 'TELEINFORMATIQUE':
-            retour = self.appeler([PRO2, TELINFO], 4)
-            resultat = retour.egale([CSI, 0x3f, 0x7a])
-        elif self.mode == 'MIXTE' and mode == 'VIDEOTEX':
-            retour = self.appeler([PRO2, MIXTE2], 2)
-            resultat = retour.egale([SEP, 0x71])
-        elif self.mode == 'MIXTE' and mode == 'TELEINFORMATIQUE':
-            retour = self.appeler([PRO2, TELINFO], 4)
-            resultat = retour.egale([CSI, 0x3f, 0x7a])
-
         # Si le changement a eu lieu, on garde le nouveau mode en mémoire
         if resultat:
             self.mode = mode
@@ -484,46 +719,15 @@ class Minitel:
         # Émet la commande d’identification
         retour = self.appeler([PRO1, ENQROM], 5)
 
-        # Teste la validité de la réponse
-        if (retour.longueur != 5 or
-            retour.valeurs[0] != SOH or
-            retour.valeurs[4] != EOT):
+        capacite = lire_identification(retour)
+        if capacite == None:
             return
 
-        # Extrait les caractères d’identification
-        constructeur_minitel = chr(retour.valeurs[1])
-        type_minitel         = chr(retour.valeurs[2])
-        version_logiciel     = chr(retour.valeurs[3])
-
-        # Types de Minitel
-        if type_minitel in TYPE_MINITELS:
-            self.capacite = TYPE_MINITELS[type_minitel]
-
-        if constructeur_minitel in CONSTRUCTEURS:
-            self.capacite['constructeur'] = CONSTRUCTEURS[constructeur_minitel]
-
-        self.capacite['version'] = version_logiciel
-
-        # Correction du constructeur
-        if constructeur_minitel == 'B' and type_minitel == 'v':
-            self.capacite['constructeur'] = 'Philips'
-        elif constructeur_minitel == 'C':
-            if version_logiciel == ['4', '5', ';', '<']:
-                self.capacite['constructeur'] = 'Telic ou Matra'
+        self.capacite = capacite
 
         # Détermine le mode écran dans lequel se trouve le Minitel
         retour = self.appeler([PRO1, STATUS_FONCTIONNEMENT], LONGUEUR_PRO2)
-
-        if retour.longueur != LONGUEUR_PRO2:
-            # Le Minitel est en mode Téléinformatique car il ne répond pas
-            # à une commande protocole
-            self.mode = 'TELEINFORMATIQUE'
-        elif retour.valeurs[3] & 1 == 1:
-            # Le bit 1 du status fonctionnement indique le mode 80 colonnes
-            self.mode = 'MIXTE'
-        else:
-            # Par défaut, on considère qu’on est en mode Vidéotex
-            self.mode = 'VIDEOTEX'
+        self.mode = lire_mode(retour)
 
     def deviner_vitesse(self):
         """Deviner la vitesse de connexion avec le Minitel.
@@ -590,15 +794,12 @@ class Minitel:
         """
         assert isinstance(vitesse, int)
 
-        # Vitesses possibles jusqu’au Minitel 2
-        vitesses = {300: B300, 1200: B1200, 4800: B4800, 9600: B9600}
-
         # Teste la validité de la vitesse demandée
-        if vitesse not in vitesses or vitesse > self.capacite['vitesse']:
+        if vitesse not in VITESSES or vitesse > self.capacite['vitesse']:
             return False
 
         # Envoie une commande protocole de programmation de vitesse
-        retour = self.appeler([PRO2, PROG, vitesses[vitesse]], LONGUEUR_PRO2)
+        retour = self.appeler([PRO2, PROG, VITESSES[vitesse]], LONGUEUR_PRO2)
         # Le Minitel doit renvoyer un acquittement PRO2
         if retour.longueur == LONGUEUR_PRO2:
             # Si on peut lire un acquittement PRO2 avant d’avoir régler la
@@ -647,16 +848,8 @@ class Minitel:
         assert curseur in [True, False]
         assert minuscule in [True, False]
 
-        # Les commandes clavier fonctionnent sur un principe de bascule
-        # start/stop
-        bascules = { True: START, False: STOP }
-
         # Crée les séquences des 3 appels en fonction des arguments
-        appels = [
-            ([PRO3, bascules[etendu   ], RCPT_CLAVIER, ETEN], LONGUEUR_PRO3),
-            ([PRO3, bascules[curseur  ], RCPT_CLAVIER, C0  ], LONGUEUR_PRO3),
-            ([PRO2, bascules[minuscule], MINUSCULES        ], LONGUEUR_PRO2)
-        ]
+        appels = commandes_clavier(etendu, curseur, minuscule)
 
         # Envoie les commandes une par une
         for appel in appels:
@@ -897,11 +1090,7 @@ class Minitel:
         """
         assert actif in [True, False]
 
-        actifs = {
-            True: [PRO3, AIGUILLAGE_ON, RCPT_ECRAN, EMET_MODEM],
-            False: [PRO3, AIGUILLAGE_OFF, RCPT_ECRAN, EMET_MODEM]
-        }
-        retour = self.appeler(actifs[actif], LONGUEUR_PRO3)
+        retour = self.appeler(COMMANDES_ECHO[actif], LONGUEUR_PRO3)
         
         return retour.longueur == LONGUEUR_PRO3
 
@@ -1157,27 +1346,32 @@ class Minitel:
         """
         Lit une séquence depuis le Minitel jusqu'à ce que la touche 'ENVOI' soit pressée.
         Retourne le texte complet reçu, sans l'écho 'M'.
+
+        Le texte est décodé au fil de la réception par un DecodeurMinitel :
+        seuls les derniers octets, qui peuvent encore appartenir au code
+        ENVOI, sont gardés en attente.
         """
-        ENVOI_CODE = [0x1B, 0x4f, 0x4d] if self.mode == "TELEINFORMATIQUE" else ENVOI
-        buffer = []
-        
+        ENVOI_CODE = bytes([0x1B, 0x4f, 0x4d] if self.mode == "TELEINFORMATIQUE" else ENVOI)
+        decodeur = DecodeurMinitel(self.mode)
+        texte = []
+        # Octets reçus mais pas encore décodés
+        attente = bytearray()
+        # Nombre d'octets à garder pour détecter un code ENVOI à cheval
+        garde = len(ENVOI_CODE) - 1
+
         while True:
             seq = self.recevoir_sequence(bloque=True)
-            vals = seq.valeurs
-            if not vals:
+            if not seq.longueur:
                 continue
             # Accumuler les octets
-            buffer.extend(vals)
-            print(vals)
-            # Vérifie si la séquence ENVOI est présente dans le buffer
-            if len(buffer) >= len(ENVOI_CODE):
-                # Parcourt le buffer pour chercher ENVOI_CODE
-                if buffer[-len(ENVOI_CODE):] == ENVOI_CODE:
-                    # Retire tout ce qui précède ENVOI_CODE
-                    texte = buffer[:-len(ENVOI_CODE)]
-                    # Retourne le texte accumulé
-                    seq_final = Sequence(standard=self.mode)
-                    seq_final.valeurs = texte
-                    print(seq_final.valeurs)
-                    return seq_final.decode()
-
+            attente += seq.octets
+            # Vérifie si la séquence ENVOI termine les octets reçus
+            if attente.endswith(ENVOI_CODE):
+                # Décode tout ce qui précède ENVOI_CODE et retourne le texte
+                texte.append(decodeur.decode(attente[:-len(ENVOI_CODE)], final=True))
+                return ''.join(texte)
+
+            # Décode ce qui ne peut plus faire partie du code ENVOI
+            if len(attente) > garde:
+                texte.append(decodeur.decode(attente[:len(attente) - garde]))
+                del attente[:len(attente) - garde]
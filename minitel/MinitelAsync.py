@@ -0,0 +1,488 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""MinitelAsync est un module permettant de piloter un Minitel depuis une
+boucle asyncio, sans thread.
+
+"""
+import asyncio
+from functools import wraps
+from queue import Empty # Exception levée quand aucune séquence n’est reçue
+
+from minitel.Sequence import Sequence
+from minitel.Analyseur import Analyseur, delai_pour_vitesse
+from minitel.Minitel import (Minitel, TRANSITIONS_MODE, VITESSES,
+    COMMANDES_ECHO, commandes_clavier, lire_identification, lire_mode)
+
+from minitel.constantes import (PRO1, PRO2, ENQROM, STATUS_VITESSE,
+    STATUS_FONCTIONNEMENT, PROG, LONGUEUR_PRO2, LONGUEUR_PRO3,
+    CAPACITES_BASIQUES, CON, COF)
+
+# Nombre maximal d’octets lus en une fois sur le flux d’entrée
+TAILLE_LECTURE = 4096
+
+class _Collecteur:
+    """Collecte les envois d’une commande de la classe Minitel
+
+    Les commandes de la classe Minitel qui se contentent d’émettre une
+    séquence (couleur, position, efface...) appellent uniquement la méthode
+    send. En leur fournissant un collecteur à la place de l’objet Minitel,
+    on récupère la séquence produite sans l’émettre.
+    """
+    def __init__(self, minitel):
+        self.mode = minitel.mode
+        self.sequence = Sequence(standard = minitel.mode)
+
+    def send(self, contenu):
+        if contenu != None:
+            self.sequence.ajoute(contenu)
+
+def _emission(methode):
+    """Transforme une commande d’émission de Minitel en coroutine
+
+    :param methode:
+        une méthode de la classe Minitel n’utilisant que send et mode
+    :type methode:
+        une fonction
+
+    :returns:
+        une coroutine émettant la même séquence que la méthode
+    """
+    @wraps(methode)
+    async def commande(self, *args, **kwargs):
+        collecteur = _Collecteur(self)
+        methode(collecteur, *args, **kwargs)
+        await self.send(collecteur.sequence)
+
+    return commande
+
+class _TransportMemoire(asyncio.Transport):
+    """Une extrémité d’une liaison en mémoire entre deux flux asyncio"""
+    def __init__(self, loop):
+        super().__init__()
+        self._loop = loop
+        self._protocole = None
+        self._pair = None
+        self._ferme = False
+        self.baudrate = 1200
+
+    def set_protocol(self, protocol):
+        self._protocole = protocol
+
+    def get_protocol(self):
+        return self._protocole
+
+    def is_closing(self):
+        return self._ferme
+
+    def write(self, data):
+        if self._ferme or self._pair._ferme:
+            return
+        self._loop.call_soon(self._pair._protocole.data_received, bytes(data))
+
+    def can_write_eof(self):
+        return True
+
+    def write_eof(self):
+        self._loop.call_soon(self._pair._protocole.eof_received)
+
+    def close(self):
+        if self._ferme:
+            return
+        self._ferme = True
+        self._loop.call_soon(self._protocole.connection_lost, None)
+        if not self._pair._ferme:
+            self.write_eof()
+
+def paire_memoire():
+    """Crée deux couples de flux asyncio reliés en mémoire
+
+    Tout ce qui est écrit sur l’un des flux d’écriture est lu sur le flux
+    de lecture de l’autre couple. C’est un bouclage en mémoire qui permet
+    de tester MinitelAsync sans Minitel : un couple est confié à
+    MinitelAsync, l’autre joue le rôle du Minitel.
+
+    Doit être appelée depuis une boucle asyncio en cours d’exécution.
+
+    :returns:
+        deux tuples (lecteur, ecrivain) de StreamReader et StreamWriter
+    """
+    loop = asyncio.get_running_loop()
+
+    extremites = []
+    for _ in range(2):
+        lecteur = asyncio.StreamReader(loop = loop)
+        protocole = asyncio.StreamReaderProtocol(lecteur, loop = loop)
+        transport = _TransportMemoire(loop)
+        transport.set_protocol(protocole)
+        protocole.connection_made(transport)
+        ecrivain = asyncio.StreamWriter(transport, protocole, lecteur, loop)
+        extremites.append((lecteur, ecrivain, transport))
+
+    extremites[0][2]._pair = extremites[1][2]
+    extremites[1][2]._pair = extremites[0][2]
+
+    return [(lecteur, ecrivain) for lecteur, ecrivain, _ in extremites]
+
+class MinitelAsync:
+    """Une classe de pilotage du Minitel depuis une boucle asyncio
+
+    MinitelAsync offre la même interface de haut niveau que la classe
+    Minitel (send, recevoir_sequence, appeler, position, efface...) sous
+    forme de coroutines. Au lieu de deux threads et de deux files
+    bloquantes, elle s’appuie sur un couple de flux asyncio (StreamReader,
+    StreamWriter) et une tâche de lecture. Un même processus peut ainsi
+    piloter de nombreux Minitels depuis une seule boucle.
+
+    Les flux peuvent provenir d’une connexion TCP (passerelle
+    Minitel-over-IP), d’un port série via pyserial-asyncio ou d’un bouclage
+    en mémoire (voir paire_memoire)::
+
+        minitel = await MinitelAsync.ouvrir_tcp('passerelle', 3615)
+
+        await minitel.deviner_vitesse()
+        await minitel.identifier()
+
+        # ...
+        # Utilisation de l’objet minitel
+        # ...
+
+        await minitel.close()
+    """
+    def __init__(self, lecteur, ecrivain, delai_echappement = None):
+        """Constructeur de MinitelAsync
+
+        Doit être appelé depuis une boucle asyncio en cours d’exécution car
+        il démarre la tâche de lecture.
+
+        :param lecteur:
+            flux de lecture des octets envoyés par le Minitel
+        :type lecteur:
+            asyncio.StreamReader
+
+        :param ecrivain:
+            flux d’écriture des octets à destination du Minitel
+        :type ecrivain:
+            asyncio.StreamWriter
+
+        :param delai_echappement:
+            Temps en secondes au-delà duquel un ESC reçu seul est considéré
+            comme l’appui sur la touche Esc. À None, le délai est déduit de
+            la vitesse de la liaison.
+        :type delai_echappement:
+            un flottant positif ou None
+        """
+        # Initialise l’état du Minitel
+        self.mode = 'VIDEOTEX'
+        self.vitesse = 1200
+        self.cursor = False
+
+        # Initialise la liste des capacités du Minitel
+        self.capacite = CAPACITES_BASIQUES
+
+        self._lecteur = lecteur
+        self._ecrivain = ecrivain
+
+        # File des séquences complètes reçues du Minitel
+        self.entree = asyncio.Queue()
+        self.delai_echappement = delai_echappement
+        self._analyseur = Analyseur()
+
+        self._tache = asyncio.get_running_loop().create_task(
+            self._gestion_entree()
+        )
+
+    @classmethod
+    async def ouvrir_tcp(cls, hote, port, **kwargs):
+        """Se connecte à un Minitel au travers d’une passerelle TCP
+
+        :returns:
+            un objet MinitelAsync
+        """
+        lecteur, ecrivain = await asyncio.open_connection(hote, port)
+        return cls(lecteur, ecrivain, **kwargs)
+
+    @classmethod
+    async def ouvrir_serie(cls, peripherique = '/dev/ttyUSB0', **kwargs):
+        """Ouvre un Minitel relié à un port série
+
+        Nécessite la bibliothèque pyserial-asyncio. La liaison est configurée
+        comme dans la classe Minitel : 1200 bps, 7 bits, parité paire.
+
+        :returns:
+            un objet MinitelAsync
+        """
+        try:
+            from serial_asyncio import open_serial_connection
+        except ImportError as ex:
+            raise ImportError(
+                "pyserial-asyncio est nécessaire pour ouvrir un port série"
+            ) from ex
+
+        lecteur, ecrivain = await open_serial_connection(
+            url = peripherique, baudrate = 1200, bytesize = 7, parity = 'E',
+            stopbits = 1, xonxoff = 0, rtscts = 0
+        )
+        return cls(lecteur, ecrivain, **kwargs)
+
+    async def close(self):
+        """Ferme la connexion avec le Minitel"""
+        self._tache.cancel()
+        try:
+            await self._tache
+        except asyncio.CancelledError:
+            pass
+
+        self._ecrivain.close()
+        try:
+            await self._ecrivain.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    async def _gestion_entree(self):
+        """Tâche de lecture des octets envoyés par le Minitel
+
+        Lit tout ce qui est disponible sur le flux, le confie à l’analyseur
+        et ajoute à la file entree les séquences complètes. Un ESC isolé est
+        libéré à l’échéance du délai d’échappement.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            if self.delai_echappement == None:
+                self._analyseur.delai = delai_pour_vitesse(self.vitesse)
+            else:
+                self._analyseur.delai = self.delai_echappement
+
+            echeance = self._analyseur.echeance()
+            try:
+                if echeance == None:
+                    octets = await self._lecteur.read(TAILLE_LECTURE)
+                else:
+                    octets = await asyncio.wait_for(
+                        self._lecteur.read(TAILLE_LECTURE),
+                        max(0, echeance - loop.time())
+                    )
+
+                if not octets:
+                    # Fin du flux : le Minitel a été déconnecté
+                    return
+            except asyncio.TimeoutError:
+                octets = b''
+
+            maintenant = loop.time()
+            sequences = self._analyseur.analyse(octets, maintenant)
+            sequences += self._analyseur.expire(maintenant)
+            for sequence in sequences:
+                self.entree.put_nowait(sequence)
+
+    def _regler_vitesse(self, vitesse):
+        """Configure la vitesse du port sous-jacent si c’est possible
+
+        Seuls les transports série (pyserial-asyncio) et le bouclage en
+        mémoire ont une vitesse. Pour une passerelle TCP, seule la vitesse
+        mémorisée change.
+        """
+        transport = self._ecrivain.transport
+        port = getattr(transport, 'serial', transport)
+        if hasattr(port, 'baudrate'):
+            port.baudrate = vitesse
+
+    async def send(self, contenu):
+        """Envoi de séquence de caractères
+
+        Envoie une séquence de caractère en direction du Minitel et attend
+        que le flux d’écriture ait de la place.
+
+        :param contenu:
+            Une séquence de caractères interprétable par la classe Sequence.
+        :type contenu:
+            un objet Sequence, une chaîne de caractères ou unicode, une liste,
+            un entier
+        """
+        if not isinstance(contenu, Sequence):
+            contenu = Sequence(contenu, standard = self.mode)
+
+        if contenu.longueur:
+            self._ecrivain.write(bytes(contenu.octets))
+        await self._ecrivain.drain()
+
+    async def flush(self):
+        """Attend que les envois aient été transmis au flux sous-jacent"""
+        await self._ecrivain.drain()
+
+    async def recevoir_sequence(self, bloque = True, attente = None):
+        """Lit une séquence en provenance du Minitel
+
+        Voir Minitel.recevoir_sequence.
+
+        :raise Empty:
+            si aucune séquence n’est disponible (bloque = False) ou si le
+            temps d’attente a été dépassé
+        """
+        assert bloque in [True, False]
+        assert isinstance(attente, (int, float)) or attente == None
+
+        try:
+            if not bloque:
+                return self.entree.get_nowait()
+            return await asyncio.wait_for(self.entree.get(), attente)
+        except (asyncio.QueueEmpty, asyncio.TimeoutError):
+            raise Empty
+
+    async def appeler(self, contenu, attente):
+        """Envoie une séquence au Minitel et attend sa réponse.
+
+        Voir Minitel.appeler.
+
+        :returns:
+            un objet Sequence contenant la réponse du Minitel à la commande
+            envoyée.
+        """
+        assert isinstance(attente, int)
+
+        # Vide la file d’attente en réception
+        while not self.entree.empty():
+            self.entree.get_nowait()
+
+        await self.send(contenu)
+
+        # Attend les octets de la réponse avec un délai d’1 seconde entre
+        # chaque séquence reçue
+        octets = bytearray()
+        while len(octets) < attente:
+            try:
+                sequence = await asyncio.wait_for(self.entree.get(), 1)
+            except asyncio.TimeoutError:
+                break
+            octets += sequence.octets
+
+        return Sequence(bytes(octets[:attente]))
+
+    async def definir_mode(self, mode = 'VIDEOTEX'):
+        """Définit le mode de fonctionnement du Minitel.
+
+        Voir Minitel.definir_mode.
+        """
+        assert isinstance(mode, str)
+
+        if mode not in ['VIDEOTEX', 'MIXTE', 'TELEINFORMATIQUE']:
+            return False
+
+        if self.mode == mode:
+            return True
+
+        for commande, longueur, reponse in TRANSITIONS_MODE[(self.mode, mode)]:
+            retour = await self.appeler(commande, longueur)
+            if not retour.egale(reponse):
+                return False
+
+        self.mode = mode
+        return True
+
+    async def identifier(self):
+        """Identifie le Minitel connecté.
+
+        Voir Minitel.identifier.
+        """
+        self.capacite = CAPACITES_BASIQUES
+
+        retour = await self.appeler([PRO1, ENQROM], 5)
+
+        capacite = lire_identification(retour)
+        if capacite == None:
+            return
+
+        self.capacite = capacite
+
+        retour = await self.appeler([PRO1, STATUS_FONCTIONNEMENT],
+                                    LONGUEUR_PRO2)
+        self.mode = lire_mode(retour)
+
+    async def deviner_vitesse(self):
+        """Deviner la vitesse de connexion avec le Minitel.
+
+        Voir Minitel.deviner_vitesse.
+        """
+        for vitesse in [9600, 4800, 1200, 300]:
+            self._regler_vitesse(vitesse)
+
+            retour = await self.appeler([PRO1, STATUS_VITESSE], LONGUEUR_PRO2)
+
+            if retour.longueur == LONGUEUR_PRO2:
+                self.vitesse = vitesse
+                return vitesse
+
+        return -1
+
+    async def definir_vitesse(self, vitesse):
+        """Programme le Minitel et le port pour une vitesse donnée.
+
+        Voir Minitel.definir_vitesse.
+        """
+        assert isinstance(vitesse, int)
+
+        if vitesse not in VITESSES or vitesse > self.capacite['vitesse']:
+            return False
+
+        retour = await self.appeler([PRO2, PROG, VITESSES[vitesse]],
+                                    LONGUEUR_PRO2)
+        if retour.longueur == LONGUEUR_PRO2:
+            return False
+
+        self._regler_vitesse(vitesse)
+        self.vitesse = vitesse
+
+        return True
+
+    async def configurer_clavier(self, etendu = False, curseur = False,
+                                 minuscule = False):
+        """Configure le fonctionnement du clavier.
+
+        Voir Minitel.configurer_clavier.
+        """
+        assert etendu in [True, False]
+        assert curseur in [True, False]
+        assert minuscule in [True, False]
+
+        for commande, longueur in commandes_clavier(etendu, curseur, minuscule):
+            retour = await self.appeler(commande, longueur)
+
+            if retour.longueur != longueur:
+                return False
+
+        return True
+
+    async def echo(self, actif):
+        """Active ou désactive l’écho clavier
+
+        Voir Minitel.echo.
+        """
+        assert actif in [True, False]
+
+        retour = await self.appeler(COMMANDES_ECHO[actif], LONGUEUR_PRO3)
+
+        return retour.longueur == LONGUEUR_PRO3
+
+    async def curseur(self, visible: bool):
+        """Active ou désactive l’affichage du curseur
+
+        Voir Minitel.curseur.
+        """
+        assert isinstance(visible, bool)
+        self.cursor = visible
+        await self.send([CON if visible else COF])
+
+    # Les commandes qui ne font qu’émettre une séquence sont reprises de la
+    # classe Minitel
+    couleur = _emission(Minitel.couleur)
+    position = _emission(Minitel.position)
+    taille = _emission(Minitel.taille)
+    effet = _emission(Minitel.effet)
+    efface = _emission(Minitel.efface)
+    repeter = _emission(Minitel.repeter)
+    bip = _emission(Minitel.bip)
+    debut_ligne = _emission(Minitel.debut_ligne)
+    supprime = _emission(Minitel.supprime)
+    insere = _emission(Minitel.insere)
+    semigraphique = _emission(Minitel.semigraphique)
+    redefinir = _emission(Minitel.redefinir)
@@ -5,6 +5,7 @@ pouvant être envoyées à un Minitel.
 
 """
 
+import re
 from unicodedata import normalize
 from binascii import unhexlify
 
@@ -50,11 +51,193 @@ for char, hexcode in UNICODEVERSVIDEOTEX.items():
 for char, hexcode in UNICODEVERSAUTRE.items():
     VIDEOTEX_TO_UNICODE[unhexlify(hexcode)] = char
 
+# Codes Minitel de chaque caractère spécial, par standard. Les conversions
+# hexadécimales sont faites une seule fois, à l’import du module.
+CODES_MINITEL = {
+    'VIDEOTEX': {
+        char: unhexlify(hexcode)
+        for char, hexcode in UNICODEVERSVIDEOTEX.items()
+    },
+    'MIXTE': {
+        char: unhexlify(hexcode)
+        for char, hexcode in UNICODEVERSAUTRE.items()
+    },
+    'TELEINFORMATIQUE': {
+        char: unhexlify(hexcode)
+        for char, hexcode in UNICODEVERSAUTRE.items()
+    }
+}
+
+# Tables pour str.translate : chaque caractère spécial est remplacé par ses
+# codes Minitel vus comme des caractères latin-1, ce qui permet de convertir
+# une chaîne entière en un seul passage (translate puis encode)
+TABLES_MINITEL = {
+    standard: str.maketrans({
+        char: codes.decode('latin-1') for char, codes in table.items()
+    })
+    for standard, table in CODES_MINITEL.items()
+}
+
+def texte_vers_minitel(texte, standard = 'VIDEOTEX'):
+    """Convertit une chaîne unicode en octets à destination du Minitel
+
+    La conversion utilise les tables précalculées TABLES_MINITEL : la chaîne
+    est traduite puis encodée en une seule passe, sans appel Python par
+    caractère.
+
+    :param texte:
+        chaîne à convertir
+    :type texte:
+        une chaîne de caractères unicode
+
+    :param standard:
+        standard à utiliser (VIDEOTEX, MIXTE ou TELEINFORMATIQUE)
+    :type standard:
+        une chaîne de caractères
+
+    :returns:
+        un objet bytes contenant les codes Minitel de la chaîne.
+
+    :raise ValueError:
+        si un caractère n’a pas d’équivalent Minitel sur un octet
+    """
+    try:
+        return texte.translate(TABLES_MINITEL[standard]).encode('latin-1')
+    except UnicodeEncodeError:
+        # Un caractère hors latin-1 n’a pas d’équivalent : on signale le
+        # premier caractère fautif
+        for caractere in texte:
+            if caractere not in CODES_MINITEL[standard] \
+                    and ord(caractere) > 0xff:
+                raise ValueError(
+                    f"caractère non supporté : {caractere!r}"
+                ) from None
+        raise
+
+# Table de répartition du décodage VIDEOTEX : à chaque premier octet sont
+# associées les séquences spéciales qui commencent par lui (dans l’ordre de
+# VIDEOTEX_TO_UNICODE) et leur caractère unicode
+REPARTITION_VIDEOTEX = {}
+for seq, char in VIDEOTEX_TO_UNICODE.items():
+    REPARTITION_VIDEOTEX.setdefault(seq[0], []).append((seq, char))
+
+# Expression trouvant le prochain octet pouvant débuter une séquence spéciale
+DECLENCHEURS_VIDEOTEX = re.compile(
+    b'|'.join(re.escape(bytes([octet])) for octet in REPARTITION_VIDEOTEX)
+)
+
+# Octets ignorés au décodage (tout ce qui n’est pas ASCII imprimable)
+NON_IMPRIMABLES = bytes(
+    octet for octet in range(256) if not 32 <= octet <= 126
+)
+
+class DecodeurMinitel:
+    """Décodeur incrémental des octets reçus du Minitel
+
+    Le décodeur peut être alimenté par morceaux, au fur et à mesure de leur
+    réception sur la liaison série. Une séquence spéciale VIDEOTEX coupée
+    entre deux morceaux est conservée jusqu’à l’arrivée de la suite.
+
+    Seuls les octets pouvant débuter une séquence spéciale sont examinés un
+    par un (via une table de répartition par premier octet). Les portions de
+    texte entre ces octets sont décodées d’un bloc et le résultat est
+    assemblé par un join, ce qui rend le décodage linéaire.
+    """
+    def __init__(self, standard = 'VIDEOTEX'):
+        """Constructeur de DecodeurMinitel
+
+        :param standard:
+            standard à utiliser pour le décodage. Les valeurs possibles sont
+            VIDEOTEX, MIXTE et TELEINFORMATIQUE (la casse est importante)
+        :type standard:
+            une chaîne de caractères
+        """
+        assert standard in ['VIDEOTEX', 'MIXTE', 'TELEINFORMATIQUE']
+
+        self.standard = standard
+        self._reste = b''
+
+    def reinitialise(self):
+        """Oublie les octets en attente d’une séquence incomplète"""
+        self._reste = b''
+
+    def decode(self, octets, final = False) -> str:
+        """Décode un morceau d’octets reçus du Minitel
+
+        :param octets:
+            octets à décoder
+        :type octets:
+            bytes, bytearray ou liste d’entiers
+
+        :param final:
+            True si aucun octet ne suivra ce morceau : une séquence spéciale
+            incomplète est alors décodée octet par octet au lieu d’être
+            conservée
+        :type final:
+            un booléen
+
+        :returns:
+            le texte unicode correspondant aux octets complets reçus.
+        """
+        data = self._reste + bytes(octets)
+        self._reste = b''
+
+        # Hors VIDEOTEX, seuls les caractères ASCII imprimables sont gardés
+        if self.standard != 'VIDEOTEX':
+            return data.translate(None, NON_IMPRIMABLES).decode('ascii')
+
+        morceaux = []
+        i = 0
+        longueur = len(data)
+        while i < longueur:
+            trouve = DECLENCHEURS_VIDEOTEX.search(data, i)
+            if trouve is None:
+                # Plus aucune séquence spéciale possible : décode la fin
+                morceaux.append(data[i:])
+                break
+
+            # Décode d’un bloc le texte précédant l’octet déclencheur
+            debut = trouve.start()
+            if debut > i:
+                morceaux.append(data[i:debut])
+
+            i = debut
+            for seq, char in REPARTITION_VIDEOTEX[data[i]]:
+                if data.startswith(seq, i):
+                    morceaux.append(char)
+                    i += len(seq)
+                    break
+            else:
+                # Une séquence spéciale peut être coupée en fin de morceau
+                fin = data[i:]
+                if not final and any(
+                    len(fin) < len(seq) and seq.startswith(fin)
+                    for seq, _ in REPARTITION_VIDEOTEX[data[i]]
+                ):
+                    self._reste = fin
+                    break
+
+                # Sinon l’octet déclencheur est traité comme un octet simple
+                morceaux.append(data[i:i + 1])
+                i += 1
+
+        return ''.join(
+            morceau if isinstance(morceau, str) else
+            morceau.translate(None, NON_IMPRIMABLES).decode('ascii')
+            for morceau in morceaux
+        )
+
 class Sequence:
     """Une classe représentant une séquence de valeurs
 
     Une Séquence est une suite de valeurs prêtes à être envoyées à un Minitel.
     Ces valeurs respectent la norme ASCII.
+
+    Les valeurs sont stockées dans un bytearray : l’ajout d’une valeur ou
+    d’une autre séquence se fait en temps amorti constant (simple copie
+    mémoire), et la séquence peut être transmise telle quelle à la liaison
+    série via l’attribut octets. L’attribut valeurs reste disponible sous
+    forme de liste d’entiers pour compatibilité.
     """
     def __init__(self, valeur = None, standard = 'VIDEOTEX'):
         """Constructeur de Sequence
@@ -63,8 +246,8 @@ class Sequence:
             valeur à ajouter à la construction de l’objet. Si la valeur est à
             None, aucune valeur n’est ajoutée
         :type valeur:
-            une chaîne de caractères, un entier, une liste, une séquence ou
-            None
+            une chaîne de caractères, un entier, une liste, des octets, une
+            séquence ou None
 
         :param standard:
             standard à utiliser pour la conversion unicode vers Minitel. Les
@@ -74,32 +257,57 @@ class Sequence:
             une chaîne de caractères
         """
         assert valeur == None or \
-                isinstance(valeur, (list, int, str, Sequence))
+                isinstance(valeur, (list, int, str, bytes, bytearray, Sequence))
         assert standard in ['VIDEOTEX', 'MIXTE', 'TELEINFORMATIQUE']
 
-        self.valeurs = []
-        self.longueur = 0
+        self._octets = bytearray()
         self.standard = standard
 
         if valeur != None:
             self.ajoute(valeur)
-        
+
+    @property
+    def octets(self):
+        """Les valeurs de la séquence sous forme d’un bytearray
+
+        C’est ce tampon qui est transmis au Minitel. Il ne doit pas être
+        modifié directement.
+        """
+        return self._octets
+
+    @property
+    def valeurs(self):
+        """Les valeurs de la séquence sous forme d’une liste d’entiers"""
+        return list(self._octets)
+
+    @valeurs.setter
+    def valeurs(self, valeurs):
+        self._octets = bytearray(valeurs)
+
+    @property
+    def longueur(self):
+        """Le nombre de valeurs contenues dans la séquence"""
+        return len(self._octets)
+
+    def __bytes__(self):
+        return bytes(self._octets)
+
     def ajoute(self, valeur):
         """Ajoute une valeur ou une séquence de valeurs
 
-        La valeur soumise est d’abord canonisée par la méthode canonise avant
-        d’être ajoutée à la séquence. Cela garantit que la séquence ne contient
-        que des entiers représentant des caractères de la norme ASCII.
+        La valeur soumise est d’abord canonisée avant d’être ajoutée à la
+        séquence. Cela garantit que la séquence ne contient que des entiers
+        représentant des caractères de la norme ASCII.
 
         :param valeur:
             valeur à ajouter
         :type valeur:
-            une chaîne de caractères, un entier, une liste ou une Séquence
+            une chaîne de caractères, un entier, une liste, des octets ou une
+            Séquence
         """
-        assert isinstance(valeur, (list, int, str, Sequence))
+        assert isinstance(valeur, (list, int, str, bytes, bytearray, Sequence))
 
-        self.valeurs += self.canonise(valeur)
-        self.longueur = len(self.valeurs)
+        self._canonise_dans(self._octets, valeur)
 
     def canonise(self, valeur):
         """Canonise une séquence de caractères
@@ -113,7 +321,8 @@ class Sequence:
         :param valeur:
             valeur à canoniser
         :type valeur:
-            une chaîne de caractères, un entier, une liste ou une Séquence
+            une chaîne de caractères, un entier, une liste, des octets ou une
+            Séquence
 
         :returns:
             Une liste de profondeur 1 d’entiers représentant des valeurs à la
@@ -123,35 +332,46 @@ class Sequence:
             canonise(['dd', 32, ['dd', 32]]) retournera
             [100, 100, 32, 100, 100, 32]
         """
-        assert isinstance(valeur, (list, int, str, Sequence))
+        assert isinstance(valeur, (list, int, str, bytes, bytearray, Sequence))
 
-        # Si la valeur est juste un entier, on le retient dans une liste
+        canonise = bytearray()
+        self._canonise_dans(canonise, valeur)
+        return list(canonise)
+
+    def _canonise_dans(self, tampon, valeur):
+        """Canonise une valeur en l’ajoutant directement à un tampon
+
+        Contrairement à canonise, aucune liste intermédiaire n’est créée : les
+        listes imbriquées sont parcourues récursivement et chaque élément est
+        ajouté en place à la fin du tampon.
+
+        :param tampon:
+            tampon recevant les valeurs canonisées
+        :type tampon:
+            un bytearray
+
+        :param valeur:
+            valeur à canoniser
+        :type valeur:
+            une chaîne de caractères, un entier, une liste, des octets ou une
+            Séquence
+        """
         if isinstance(valeur, int):
-            return [valeur]
-
-        # Si la valeur est une Séquence, ses valeurs ont déjà été canonisées
-        if isinstance(valeur, Sequence):
-            return valeur.valeurs
-
-        # À ce point, le paramètre contient soit une chaîne de caractères, soit
-        # une liste. L’une ou l’autre est parcourable par une boucle for ... in
-        # Transforme récursivement chaque élément de la liste en entier
-        canonise = []
-        for element in valeur:
-            if isinstance(element, str):
-                # Cette boucle traite 2 cas : celui ou liste est une chaîne
-                # unicode et celui ou element est une chaîne de caractères
-                for caractere in element:
-                    for ascii in self.unicode_vers_minitel(caractere):
-                        canonise.append(ascii)
-            elif isinstance(element, int):
-                # Un entier a juste besoin d’être ajouté à la liste finale
-                canonise.append(element)
-            elif isinstance(element, list):
-                # Si l’élément est une liste, on la canonise récursivement
-                canonise = canonise + self.canonise(element)
-
-        return canonise
+            # Un entier a juste besoin d’être ajouté au tampon
+            tampon.append(valeur)
+        elif isinstance(valeur, Sequence):
+            # Les valeurs d’une Séquence ont déjà été canonisées
+            tampon += valeur._octets
+        elif isinstance(valeur, (bytes, bytearray)):
+            # Des octets sont considérés comme déjà canonisés
+            tampon += valeur
+        elif isinstance(valeur, str):
+            # Une chaîne unicode est convertie d’un seul bloc
+            tampon += texte_vers_minitel(valeur, self.standard)
+        elif isinstance(valeur, list):
+            # Si l’élément est une liste, on la canonise récursivement
+            for element in valeur:
+                self._canonise_dans(tampon, element)
 
     def unicode_vers_minitel(self, caractere):
         """Convertit un caractère unicode en son équivalent Minitel
@@ -167,15 +387,11 @@ class Sequence:
         """
         assert isinstance(caractere, str) and len(caractere) == 1
 
-        if self.standard == 'VIDEOTEX':
-            if caractere in UNICODEVERSVIDEOTEX:
-                return unhexlify(UNICODEVERSVIDEOTEX[caractere])
-        else: # TELEINFORMATIQUE / MIXTE
-            if caractere in UNICODEVERSAUTRE:
-                return unhexlify(UNICODEVERSAUTRE[caractere])
-            # sinon renvoyer directement le code ASCII brut (compatible 0x20-0x7E)
-            return bytes([ord(caractere)])
-        # return normalize('NFKD', caractere).encode('ascii', 'replace')
+        codes = CODES_MINITEL[self.standard].get(caractere)
+        if codes is not None:
+            return codes
+
+        # sinon renvoyer directement le code ASCII brut (compatible 0x20-0x7E)
         return bytes([ord(caractere)])
 
     def egale(self, sequence):
@@ -199,50 +415,11 @@ class Sequence:
         if not isinstance(sequence, Sequence):
             sequence = Sequence(sequence)
 
-        return self.valeurs == sequence.valeurs
+        return self._octets == sequence._octets
 
     def decode(self) -> str:
         """
         Décode des octets reçus du Minitel en Unicode Python, selon le mode
         : VIDEOTEX ou TELEINFORMATIQUE.
         """
-        i = 0
-        output = ""
-        data = bytes(self.valeurs)
-
-        while i < len(data):
-            matched = False
-
-            # Mode VIDEOTEX : tenter de correspondre à une séquence spéciale VIDEOTEX
-            if self.standard == 'VIDEOTEX':
-                for seq, unicode_char in VIDEOTEX_TO_UNICODE.items():
-                    if data[i:i+len(seq)] == seq:
-                        output += unicode_char
-                        i += len(seq)
-                        matched = True
-                        break
-
-                if matched:
-                    continue
-
-            # Mode TELEINFORMATIQUE : les caractères sont directement ASCII imprimables
-            if self.standard == 'TELEINFORMATIQUE':
-                # Ignorer ESC (0x1B) ou autres codes de contrôle connus
-                if data[i] in (0x00, 0x1B, 0x0D, 0x0A):
-                    i += 1
-                    continue
-
-                # Pour les octets imprimables ASCII standard
-                if 32 <= data[i] <= 126:
-                    output += chr(data[i])
-                else:
-                    # Pour tout autre octet non imprimable, ignorer
-                    pass
-                i += 1
-            else:
-                # Mode VIDEOTEX standard : ASCII direct si pas de correspondance VIDEOTEX
-                if 32 <= data[i] <= 126:
-                    output += chr(data[i])
-                i += 1
-
-        return output
\ No newline at end of file
+        return DecodeurMinitel(self.standard).decode(self._octets, final = True)
@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Transport est un module fournissant les liaisons sur lesquelles la classe
+Minitel peut dialoguer avec un Minitel.
+
+Toutes les liaisons offrent la même interface, calquée sur celle de
+serial.Serial : read, write, flush, close, in_waiting, baudrate et timeout.
+
+- TransportSerie : un port série physique (nécessite pyserial),
+- TransportPty : un pseudo-terminal local, dont l’autre extrémité peut être
+  ouverte par un émulateur ou un autre programme,
+- TransportTCP : une passerelle Minitel sur IP,
+- TransportMemoire : une liaison en mémoire pouvant simuler le débit d’une
+  vitesse donnée.
+
+"""
+
+import os
+import select
+import socket
+import time
+from collections import deque
+from threading import Condition
+
+# Nombre de bits transmis par caractère en 7E1 : 1 bit de départ, 7 bits de
+# données, 1 bit de parité, 1 bit d’arrêt
+BITS_PAR_CARACTERE = 10
+
+# Taille maximale d’une lecture sur un descripteur ou une socket
+TAILLE_LECTURE = 4096
+
+def duree_transmission(octets, vitesse):
+    """Calcule le temps d’émission d’un nombre d’octets sur la liaison
+
+    :param octets:
+        nombre d’octets émis
+    :type octets:
+        un entier
+
+    :param vitesse:
+        vitesse de la liaison en bits par seconde
+    :type vitesse:
+        un entier
+
+    :returns:
+        la durée en secondes
+    """
+    return octets * BITS_PAR_CARACTERE / vitesse
+
+class Transport:
+    """Interface commune aux liaisons avec un Minitel
+
+    Les classes filles implémentent _recoit et _emet. La classe de base gère
+    le tampon de réception et le timeout de lecture avec la même sémantique
+    que pyserial : read(n) retourne moins de n octets si le timeout expire.
+    """
+    def __init__(self, baudrate = 1200, timeout = 1):
+        """Constructeur de Transport
+
+        :param baudrate:
+            vitesse de la liaison en bits par seconde
+        :type baudrate:
+            un entier
+
+        :param timeout:
+            temps maximal d’attente d’une lecture en secondes, None pour
+            attendre indéfiniment
+        :type timeout:
+            un flottant ou None
+        """
+        self._baudrate = baudrate
+        self.timeout = timeout
+        self._tampon = bytearray()
+
+    @property
+    def baudrate(self):
+        """Vitesse de la liaison en bits par seconde"""
+        return self._baudrate
+
+    @baudrate.setter
+    def baudrate(self, vitesse):
+        self._baudrate = vitesse
+
+    @property
+    def in_waiting(self):
+        """Nombre d’octets reçus et pas encore lus"""
+        self._tampon += self._recoit(0)
+        return len(self._tampon)
+
+    def read(self, taille = 1):
+        """Lit au plus taille octets, en attendant au plus timeout secondes
+
+        :returns:
+            un objet bytes
+        """
+        if self.timeout is None:
+            limite = None
+        else:
+            limite = time.monotonic() + self.timeout
+
+        while len(self._tampon) < taille:
+            if limite is None:
+                attente = None
+            else:
+                attente = limite - time.monotonic()
+                if attente <= 0:
+                    break
+
+            octets = self._recoit(attente)
+            if not octets and limite is None:
+                # Liaison fermée
+                break
+            self._tampon += octets
+
+        octets = bytes(self._tampon[:taille])
+        del self._tampon[:taille]
+        return octets
+
+    def write(self, octets):
+        """Écrit des octets sur la liaison
+
+        :returns:
+            le nombre d’octets écrits
+        """
+        self._emet(bytes(octets))
+        return len(octets)
+
+    def flush(self):
+        """Attend que les octets écrits aient été émis"""
+
+    def close(self):
+        """Ferme la liaison"""
+
+    def _recoit(self, attente):
+        """Retourne les octets disponibles, en attendant au plus attente
+        secondes (None pour attendre indéfiniment). Retourne b'' si rien
+        n’est arrivé."""
+        raise NotImplementedError
+
+    def _emet(self, octets):
+        raise NotImplementedError
+
+class TransportSerie(Transport):
+    """Liaison par un port série physique
+
+    La liaison est configurée selon le standard de base du Minitel : 1200
+    bps, 7 bits, parité paire, 1 bit d’arrêt, sans contrôle de flux.
+    """
+    def __init__(self, peripherique = '/dev/ttyUSB0', baudrate = 1200,
+                 timeout = 1):
+        try:
+            from serial import Serial
+        except ImportError as ex:
+            raise ImportError(
+                "pyserial est nécessaire pour ouvrir un port série"
+            ) from ex
+
+        Transport.__init__(self, baudrate, timeout)
+        self.peripherique = peripherique
+        self._serie = Serial(
+            peripherique,
+            baudrate = baudrate, # vitesse à 1200 bps, le standard Minitel
+            bytesize = 7,        # taille de caractère à 7 bits
+            parity   = 'E',      # parité paire
+            stopbits = 1,        # 1 bit d’arrêt
+            timeout  = timeout,  # timeout de lecture
+            xonxoff  = 0,        # pas de contrôle logiciel
+            rtscts   = 0         # pas de contrôle matériel
+        )
+
+    @property
+    def baudrate(self):
+        return self._serie.baudrate
+
+    @baudrate.setter
+    def baudrate(self, vitesse):
+        self._serie.baudrate = vitesse
+
+    @property
+    def in_waiting(self):
+        return self._serie.in_waiting
+
+    def read(self, taille = 1):
+        return self._serie.read(taille)
+
+    def write(self, octets):
+        return self._serie.write(octets)
+
+    def flush(self):
+        self._serie.flush()
+
+    def close(self):
+        self._serie.close()
+
+class TransportPty(Transport):
+    """Liaison par un pseudo-terminal local
+
+    La classe Minitel utilise le côté maître. Le côté esclave, dont le nom
+    est donné par l’attribut peripherique, peut être ouvert par un émulateur
+    de Minitel ou par un pont vers une vraie liaison (socat par exemple).
+    """
+    def __init__(self, baudrate = 1200, timeout = 1):
+        import tty
+
+        Transport.__init__(self, baudrate, timeout)
+        self.maitre, self.esclave = os.openpty()
+        tty.setraw(self.esclave)
+        self.peripherique = os.ttyname(self.esclave)
+
+    def _recoit(self, attente):
+        lisibles, _, _ = select.select([self.maitre], [], [], attente)
+        if not lisibles:
+            return b''
+
+        try:
+            return os.read(self.maitre, TAILLE_LECTURE)
+        except OSError:
+            # L’esclave a été fermé
+            return b''
+
+    def _emet(self, octets):
+        vue = memoryview(octets)
+        while vue:
+            vue = vue[os.write(self.maitre, vue):]
+
+    def close(self):
+        for descripteur in (self.maitre, self.esclave):
+            try:
+                os.close(descripteur)
+            except OSError:
+                pass
+
+class TransportTCP(Transport):
+    """Liaison par une passerelle Minitel sur IP
+
+    Le débit est imposé par la passerelle ; la vitesse n’est conservée que
+    pour information.
+    """
+    def __init__(self, hote, port, baudrate = 1200, timeout = 1):
+        Transport.__init__(self, baudrate, timeout)
+        self.hote = hote
+        self.port = port
+        self._socket = socket.create_connection((hote, port))
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _recoit(self, attente):
+        lisibles, _, _ = select.select([self._socket], [], [], attente)
+        if not lisibles:
+            return b''
+
+        try:
+            return self._socket.recv(TAILLE_LECTURE)
+        except OSError:
+            return b''
+
+    def _emet(self, octets):
+        self._socket.sendall(octets)
+
+    def close(self):
+        self._socket.close()
+
+class TransportMemoire(Transport):
+    """Liaison en mémoire
+
+    Sans extrémité, la liaison est une boucle : ce qui est écrit est relu.
+    Deux liaisons créées par paire_memoire sont reliées l’une à l’autre.
+
+    Avec simule_debit, chaque octet écrit n’est disponible pour l’extrémité
+    qu’après son temps d’émission à la vitesse courante (10 bits par
+    caractère) et flush attend la fin de l’émission, comme sur un vrai port
+    série. Dans tous les cas, duree_simulee cumule le temps qu’aurait pris
+    l’émission sur la ligne.
+    """
+    def __init__(self, baudrate = 1200, timeout = 1, simule_debit = True,
+                 extremite = None):
+        Transport.__init__(self, baudrate, timeout)
+        self.simule_debit = simule_debit
+        self.extremite = self if extremite is None else extremite
+
+        # Paquets en transit vers cette liaison : (instant d’arrivée, octets)
+        self._arrivees = deque()
+        self._condition = Condition()
+
+        # Fin de l’émission en cours et statistiques
+        self._fin_emission = 0.0
+        self.octets_ecrits = 0
+        self.duree_simulee = 0.0
+
+    def _recoit(self, attente):
+        limite = None if attente is None else time.monotonic() + attente
+        with self._condition:
+            while True:
+                maintenant = time.monotonic()
+                if self._arrivees and self._arrivees[0][0] <= maintenant:
+                    octets = bytearray()
+                    while self._arrivees and self._arrivees[0][0] <= maintenant:
+                        octets += self._arrivees.popleft()[1]
+                    return bytes(octets)
+
+                # Attend le prochain paquet ou la fin de son émission
+                reste = None if limite is None else limite - maintenant
+                if self._arrivees:
+                    arrivee = self._arrivees[0][0] - maintenant
+                    reste = arrivee if reste is None else min(reste, arrivee)
+                if reste is not None and reste <= 0:
+                    return b''
+                self._condition.wait(reste)
+
+    def _comptabilise(self, octets):
+        """Comptabilise l’émission d’octets sur la ligne
+
+        :returns:
+            l’instant (au sens de time.monotonic) où le dernier octet est
+            reçu par l’extrémité, 0 si le débit n’est pas simulé
+        """
+        duree = duree_transmission(len(octets), self._baudrate)
+        self.octets_ecrits += len(octets)
+        self.duree_simulee += duree
+
+        if not self.simule_debit:
+            return 0.0
+
+        debut = max(time.monotonic(), self._fin_emission)
+        self._fin_emission = debut + duree
+        return self._fin_emission
+
+    def _emet(self, octets):
+        arrivee = self._comptabilise(octets)
+        extremite = self.extremite
+        with extremite._condition:
+            extremite._arrivees.append((arrivee, octets))
+            extremite._condition.notify_all()
+
+    def flush(self):
+        if self.simule_debit:
+            reste = self._fin_emission - time.monotonic()
+            if reste > 0:
+                time.sleep(reste)
+
+def paire_memoire(baudrate = 1200, simule_debit = True):
+    """Crée deux liaisons en mémoire reliées l’une à l’autre
+
+    :returns:
+        un tuple (liaison côté ordinateur, liaison côté Minitel)
+    """
+    ordinateur = TransportMemoire(baudrate, simule_debit = simule_debit)
+    minitel = TransportMemoire(baudrate, simule_debit = simule_debit,
+                               extremite = ordinateur)
+    ordinateur.extremite = minitel
+    return ordinateur, minitel
+
+def ouvrir_transport(adresse):
+    """Ouvre une liaison à partir de son adresse
+
+    - 'tcp://hote:port' ouvre une TransportTCP,
+    - 'pty' ouvre un TransportPty,
+    - 'memoire' ou 'memoire://vitesse' ouvre une boucle TransportMemoire,
+    - toute autre adresse est un périphérique série (TransportSerie).
+
+    :param adresse:
+        adresse de la liaison
+    :type adresse:
+        une chaîne de caractères
+
+    :returns:
+        un objet Transport
+    """
+    assert isinstance(adresse, str)
+
+    if adresse.startswith('tcp://'):
+        hote, _, port = adresse[len('tcp://'):].rpartition(':')
+        return TransportTCP(hote, int(port))
+
+    if adresse == 'pty':
+        return TransportPty()
+
+    if adresse == 'memoire' or adresse.startswith('memoire://'):
+        vitesse = adresse[len('memoire://'):]
+        return TransportMemoire(int(vitesse) if vitesse else 1200)
+
+    return TransportSerie(adresse)
@@ -1,5 +1,5 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-__all__ = ["Minitel", "Sequence"]
+__all__ = ["Minitel", "MinitelAsync", "Sequence", "Analyseur", "Transport", "Emulateur"]
 
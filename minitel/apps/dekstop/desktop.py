@@ -2,14 +2,12 @@ import os
 from pathlib import Path
 from copy import deepcopy
 
-from minitel.constantes import CAN, CSI, LF, US
 from minitel.tui.core import Rectangle
 from minitel.tui.core.config import SCREEN_WIDTH
 from minitel.tui.keyboard import Key, KeyboardController
 from minitel.tui.scene.manager import SceneManager
 from minitel.tui.scene.base import SceneBase
 from minitel.tui.window import Footer, Header
-from minitel.tui.graphics import Graphics
 
 from minitel.apps.miw.miw import MinitelImageViewer
 
@@ -44,7 +42,8 @@ class Desktop(SceneBase):
         self.create_menu_window()
 
     def create_menu_window(self):
-        menu = MenuDesktopWindow(Rectangle(1, 3, 1, SCREEN_WIDTH))
+        # Rangées 3 à 22 : 18 items et les liens de page précédente / suivante
+        menu = MenuDesktopWindow(Rectangle(1, 3, SCREEN_WIDTH, 20))
         menu.set_handler("ok", self.on_item_ok)
         menu.set_handler("cancel", self.on_item_cancel)
         menu.set_handler("next_page", self.refresh)
@@ -83,28 +82,16 @@ class Desktop(SceneBase):
         ]
         paths.sort(key=lambda p: (not p.is_dir(), p.name.lower()))
         menu.items = paths
-        menu.rect.height = len(menu.items)
         menu.page = 0      # revenir à la première page
         menu.select(0)     # remettre le curseur sur le premier item
         menu._dirty = True # invalide le cache de pagination
+        menu.invalidate()
 
     def refresh(self):
-        """Recréé le menu avec le contenu du dossier courant"""
-        menu: MenuDesktopWindow = self.windows['menu']
-        # Cleaning
-        Graphics.reset_attributes()
-        Graphics.direct_send([US, 0x40 + menu.rect.y , 0x41])
-        for i in range(len(menu.paged_items[0])):
-            print(menu.rect.y, i)
-            Graphics.direct_send([CSI, 0x4B, LF])
-            Graphics._instance.buffer.reset_row(menu.rect.y + i - 1)
-        Graphics.flush()
-    
-    def render(self):
-        if SceneManager._scene != self:
-            return
-        mixels = []
-        for window in self.windows.values():
-            mixels.extend(window.render())
-        Graphics.update(mixels)
+        """Redemande l'affichage du menu avec le contenu du dossier courant
+
+        Les rangées devenues vides sont effacées par Graphics lors du rendu.
+        """
+        self.windows['menu'].invalidate()
+        self.needs_render = True
         
\ No newline at end of file
@@ -15,7 +15,7 @@ class MenuDesktopWindow(Window):
 
     def __init__(self, rect):
         super().__init__(rect)
-        self.index: int = 0
+        self._index: int = 0
         self._last_index: int = -1
         self.handlers: dict = {}
         self.items = []
@@ -41,6 +41,19 @@ class MenuDesktopWindow(Window):
             Key.CANCEL: self.handle_cancel,
         }
 
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @index.setter
+    def index(self, value: int):
+        # Seules les rangées de l'ancienne et de la nouvelle sélection sont
+        # à redessiner
+        if value != self._index:
+            self.invalidate_row(self._index)
+            self.invalidate_row(value)
+        self._index = value
+
     @property
     def current_item(self):
         return self.items[self.index]
@@ -78,6 +91,7 @@ class MenuDesktopWindow(Window):
         if has_prev and self.index == 0:
             self.page = max(0, self.page - 1)
             self._dirty = True
+            self.invalidate()
             self.select(0)
             return
 
@@ -85,6 +99,7 @@ class MenuDesktopWindow(Window):
         if has_next and self.index == len(visible) - 1:
             self.page += 1
             self._dirty = True
+            self.invalidate()
             self.select(0)
             return
 
@@ -146,23 +161,25 @@ class MenuDesktopWindow(Window):
 
     def cursor_left(self):
         """Page précédente si elle existe"""
-        self.handlers["prev_page"]()
         _, has_prev, _ = self.paged_items
         if has_prev:
             self.page = max(0, self.page - 1)
             self.index = 0  # ou dernière ligne si tu veux
             self._dirty = True
+            self.invalidate()
+            self.handlers["prev_page"]()
             return True
         return False
 
     def cursor_right(self):
         """Page suivante si elle existe"""
-        self.handlers["next_page"]()
         _, _, has_next = self.paged_items
         if has_next:
             self.page += 1
             self.index = 0  # ou première ligne si tu veux
             self._dirty = True
+            self.invalidate()
+            self.handlers["next_page"]()
             return True
         return False
 
@@ -206,6 +223,13 @@ class MenuDesktopWindow(Window):
     # ------------------------
     # Rendering
     # ------------------------
+    def focus_rows(self) -> list[int]:
+        """Rangées de la sélection courante et de la précédente"""
+        rows = {self.rect.y + self.index}
+        if self._last_index >= 0:
+            rows.add(self.rect.y + self._last_index)
+        return sorted(rows)
+
     def draw_type_item(self, item, row: int = 0):
         if item == PREV_PAGE_LABEL:
             type_mixels = draw_text(self.rect.x, self.rect.y + row, "<")
@@ -256,4 +280,20 @@ class MenuDesktopWindow(Window):
 
         for row, item in enumerate(visible):
             mixels.extend(self.draw_item(item, row))
+        self._last_index = self.index
+        return mixels
+
+    def render_region(self, rects: list[Rectangle]) -> list[Mixel]:
+        """Ne dessine que les items des rangées à redessiner"""
+        rows = {
+            y - self.rect.y
+            for rect in rects
+            for y in range(rect.y, rect.y + rect.height)
+        }
+        mixels = []
+        visible, _, _ = self.paged_items
+        for row, item in enumerate(visible):
+            if row in rows:
+                mixels.extend(self.draw_item(item, row))
+        self._last_index = self.index
         return mixels
\ No newline at end of file
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from minitel.tui.core import Rectangle
+
+# Version du format des séquences : à changer si l'encodage des images
+# évolue, les fichiers déjà présents sur disque sont alors ignorés
+FORMAT_VERSION = 1
+
+# Longueur d'une rangée dans un fichier du cache disque
+ROW_HEADER = struct.Struct('>H')
+
+
+class ImageCache:
+    """Cache LRU des images converties en séquences semi-graphiques
+
+    Une entrée est la liste des rangées (bytes) produites par
+    ImageMinitelMixels.importer. La clé dépend du fichier (chemin, date de
+    modification, taille), du rectangle cible et des réglages de la
+    quantification : une image modifiée sur disque est reconvertie.
+
+    La mémoire occupée est limitée à max_bytes octets de séquences, les
+    entrées les moins récemment utilisées sont oubliées en premier. Si
+    directory est donné, les séquences y sont aussi écrites et relues d'une
+    exécution à l'autre.
+
+    Les méthodes peuvent être appelées depuis plusieurs threads
+    (préchargement des images voisines).
+    """
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024,
+                 directory: str | Path | None = None):
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.size = 0
+        self._entries: OrderedDict[str, list[bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str | Path, rect: Rectangle, **settings) -> str:
+        """Clé d'une image convertie pour un rectangle et des réglages"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        description = repr((
+            FORMAT_VERSION, path, stat.st_mtime_ns, stat.st_size,
+            rect.x, rect.y, rect.width, rect.height,
+            sorted(settings.items()),
+        ))
+        return hashlib.sha1(description.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> list[bytes] | None:
+        """Séquence en cache, None si l'image doit être convertie"""
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+                return rows
+        rows = self._read(key)
+        if rows is not None:
+            with self._lock:
+                self._remember(key, rows)
+        return rows
+
+    def put(self, key: str, rows: list) -> list[bytes]:
+        """Conserve une séquence et la retourne sous forme de rangées"""
+        rows = [bytes(row) for row in rows]
+        with self._lock:
+            self._remember(key, rows)
+        self._write(key, rows)
+        return rows
+
+    def clear(self):
+        """Vide le cache en mémoire (le cache disque est conservé)"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.directory is not None and self._file(key).exists()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, rows: list[bytes]):
+        size = sum(map(len, rows))
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= sum(map(len, previous))
+        self._entries[key] = rows
+        self.size += size
+        # Oublie les entrées les moins récemment utilisées
+        while self.size > self.max_bytes:
+            _, oldest = self._entries.popitem(last=False)
+            self.size -= sum(map(len, oldest))
+
+    def _file(self, key: str) -> Path:
+        return self.directory / f"{key}.seq"
+
+    def _read(self, key: str) -> list[bytes] | None:
+        if self.directory is None:
+            return None
+        try:
+            data = self._file(key).read_bytes()
+        except OSError:
+            return None
+        rows = []
+        offset = 0
+        try:
+            while offset < len(data):
+                (length,) = ROW_HEADER.unpack_from(data, offset)
+                offset += ROW_HEADER.size
+                if offset + length > len(data):
+                    raise ValueError("rangée tronquée")
+                rows.append(data[offset:offset + length])
+                offset += length
+        except (struct.error, ValueError):
+            # Fichier tronqué ou étranger : supprimé, l'image est reconvertie
+            try:
+                self._file(key).unlink()
+            except OSError:
+                pass
+            return None
+        return rows
+
+    def _write(self, key: str, rows: list[bytes]):
+        if self.directory is None:
+            return
+        data = b''.join(ROW_HEADER.pack(len(row)) + row for row in rows)
+        # Écriture atomique : un fichier partiel n'est jamais relu
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as output:
+                output.write(data)
+            os.replace(temporary, self._file(key))
+        except OSError:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
@@ -4,4 +4,23 @@ SUPPORTED_FORMAT = [
     "*.jpeg",
     "*.bmp",
     "*.tiff"
-]
\ No newline at end of file
+]
+
+# Nombre de niveaux de gris de la quantification
+QUANTIFY_LEVELS = 8
+
+# Cache des images converties : mémoire maximale (octets de séquences) et
+# répertoire du cache disque (None pour ne garder que la mémoire)
+CACHE_MAX_BYTES = 4 * 1024 * 1024
+CACHE_DIRECTORY = None
+
+# Préchargement : nombre d'images converties à l'avance de part et d'autre
+# de l'image affichée, et threads de conversion
+PREFETCH_DISTANCE = 1
+PREFETCH_WORKERS = 1
+
+# Émission progressive : une rangée sur INTERLACE_STEP d'abord, puis les
+# autres, une rangée à la fois pour qu'une touche puisse l'interrompre
+# (False : l'image est émise d'un bloc)
+PROGRESSIVE = True
+INTERLACE_STEP = 3
@@ -27,7 +27,7 @@ class MinitelImageViewer(SceneBase):
         Graphics.direct_send([SI])
 
     def update(self):
-        if SceneManager._scene != self:
+        if SceneManager.current() is not self:
             return None
         _, key = KeyboardController.poll()
         return key
@@ -42,14 +42,24 @@ class MinitelImageViewer(SceneBase):
 
     def return_back(self):
         self.windows['image'].active = False
+        self.windows['image'].close()
         Graphics.clear() 
         SceneManager.return_to_caller()
     
     def render(self):
-        if SceneManager._scene != self:
+        """Émet le prochain morceau de l'image.
+
+        Un seul morceau est confié au Minitel par rendu : SceneManager.step
+        attend que la ligne se libère avant le rendu suivant et traite les
+        touches entre-temps. Une nouvelle image abandonne ainsi le reste
+        de la précédente sans attendre la fin de son émission.
+        """
+        if SceneManager.current() is not self:
             return
-        if self.windows['image']._has_new_seq:
-            Graphics.direct_send(self.windows['image'].sequence)
-            self.windows['image']._has_new_seq = False
+        image = self.windows['image']
+        chunk = image.next_chunk()
+        if chunk is not None:
+            Graphics.direct_send(chunk)
+        self.needs_render = image.transmitting
 
         
\ No newline at end of file
@@ -1,17 +1,42 @@
+from concurrent.futures import Future, ThreadPoolExecutor
 from PIL import Image
 import glob
 import os
 
-from minitel.tui.core.image import ImageMinitelMixels, quantify_with_kmeans
+from minitel.tui.core.image import (
+    ImageMinitelMixels, interlace, kmeans_histogram, quantify_with_kmeans
+)
 from minitel.tui.core.mixel import Mixel
 from minitel.tui.keyboard import Key
 from minitel.tui.window.base import Window
 
-from .config import SUPPORTED_FORMAT
+from .cache import ImageCache
+from .config import (
+    CACHE_DIRECTORY, CACHE_MAX_BYTES, INTERLACE_STEP, PREFETCH_DISTANCE,
+    PREFETCH_WORKERS, PROGRESSIVE, QUANTIFY_LEVELS, SUPPORTED_FORMAT
+)
+
+# Images converties, partagées par les visionneuses
+IMAGE_CACHE = ImageCache(CACHE_MAX_BYTES, CACHE_DIRECTORY)
+
+
+def encode_image(path: str, width: int, height: int,
+                 k: int = QUANTIFY_LEVELS,
+                 quantifier: callable = kmeans_histogram) -> list:
+    """Convertit un fichier image en séquences semi-graphiques"""
+    image = Image.open(path)
+    image = image.resize((width, height), Image.Resampling.LANCZOS)
+    image = image.convert("L")
+    image_q, _, _ = quantify_with_kmeans(image, k=k, quantifier=quantifier)
+    img_mixels = ImageMinitelMixels()
+    return img_mixels.importer(image_q)
+
 
 class WindowImage(Window):
 
-    def __init__(self, rect, directory_path: str):
+    def __init__(self, rect, directory_path: str,
+                 cache: ImageCache | None = None,
+                 progressive: bool = PROGRESSIVE):
         super().__init__(rect)
         self.rect = rect
         # Collect all image files
@@ -26,19 +51,94 @@ class WindowImage(Window):
         }
         self.active: bool = False
         self.sequence = []
-        self._has_new_seq: bool = False
+        self.progressive = progressive
+        # Morceaux de l'image courante restant à émettre
+        self._chunks: list = []
+        self.cache = cache if cache is not None else IMAGE_CACHE
+        # Conversion des images voisines pendant l'émission de l'image
+        # affichée, indexée par clé du cache
+        self._executor: ThreadPoolExecutor | None = None
+        self._prefetching: dict[str, Future] = {}
         self.refresh()
 
+    def _key(self, path: str) -> str:
+        return self.cache.key(path, self.rect, k=QUANTIFY_LEVELS,
+                              quantifier=kmeans_histogram.__name__)
+
+    def _convert(self, key: str, path: str) -> list[bytes]:
+        return self.cache.put(key, encode_image(
+            path, self.rect.width, self.rect.height
+        ))
+
     def refresh(self):
         self.sequence = []
-        image = Image.open(self.image_files[self.index])
-        image = image.resize((self.rect.width, self.rect.height), Image.Resampling.LANCZOS)
-        image = image.convert("L")
-        image_q, _, _ = quantify_with_kmeans(image)
-        img_mixels = ImageMinitelMixels()
-        self.sequence = img_mixels.importer(image_q)
-        self._has_new_seq = True
+        path = self.image_files[self.index]
+        key = self._key(path)
+        # Une image déjà affichée ou préchargée ne coûte plus que son
+        # émission ; une conversion en cours est attendue plutôt que refaite
+        sequence = self.cache.get(key)
+        if sequence is None:
+            future = self._prefetching.pop(key, None)
+            if future is not None and not future.cancel():
+                sequence = future.result()
+            else:
+                sequence = self._convert(key, path)
+        self.sequence = sequence
+        # Les morceaux de l'image précédente non émis sont abandonnés
+        if self.progressive:
+            self._chunks = interlace(sequence, INTERLACE_STEP)
+        else:
+            self._chunks = [sequence]
+        self.prefetch()
+
+    @property
+    def transmitting(self) -> bool:
+        """Il reste des morceaux de l'image à émettre"""
+        return bool(self._chunks)
+
+    def next_chunk(self):
+        """Prochain morceau de l'image à émettre, None si elle est complète"""
+        if not self._chunks:
+            return None
+        return self._chunks.pop(0)
+
+    def prefetch(self):
+        """Convertit à l'avance les images voisines de l'image affichée.
+
+        Les préchargements qui ne sont plus voisins (l'utilisateur est allé
+        plus loin) sont annulés s'ils n'ont pas commencé.
+        """
+        count = len(self.image_files)
+        wanted = {}
+        for distance in range(1, PREFETCH_DISTANCE + 1):
+            for index in (self.index + distance, self.index - distance):
+                path = self.image_files[index % count]
+                if index % count != self.index:
+                    wanted.setdefault(self._key(path), path)
+
+        for key in list(self._prefetching):
+            future = self._prefetching[key]
+            if future.done() or (key not in wanted and future.cancel()):
+                del self._prefetching[key]
+
+        for key, path in wanted.items():
+            if key in self._prefetching or key in self.cache:
+                continue
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=PREFETCH_WORKERS,
+                    thread_name_prefix='miw-prefetch',
+                )
+            self._prefetching[key] = self._executor.submit(
+                self._convert, key, path
+            )
 
+    def close(self):
+        """Annule les préchargements et arrête le thread de conversion"""
+        self._prefetching.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     # ------------------------
     # Handlers
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Mesure de l’encodeur TUI sur un Minitel émulé
+
+Chaque scénario produit une suite de trames (listes de Mixel) qui passent
+par MinitelBuffer puis MinitelEncoder ; les octets obtenus sont interprétés
+par un Emulateur. Le script donne, pour chaque vitesse, le volume émis et la
+durée simulée d’une trame sur la ligne, le temps CPU d’encodage, puis vérifie
+que l’écran émulé correspond au contenu du MinitelBuffer.
+
+La colonne « curseur » donne les octets économisés par le planificateur de
+déplacements par rapport à un positionnement toujours absolu (US / RS).
+
+Usage : python -m minitel.test.benchencodeur [--trames N] [--vitesses ...]
+"""
+
+import argparse
+import random
+import time
+
+from minitel.constantes import COULEURS_MINITEL
+from minitel.Emulateur import Emulateur
+from minitel.tui.buffer import MinitelBuffer
+from minitel.tui.encoder import MinitelEncoder
+from minitel.tui.core import Color, Effect, Mixel
+from minitel.tui.core.config import SCREEN_WIDTH, SCREEN_HEIGHT
+
+TEXTE = "Le Minitel était un terminal relié au réseau Télétel. "
+
+def ecran_texte(graine):
+    """Écran complet de texte blanc sur noir"""
+    decalage = graine % len(TEXTE)
+    return [
+        Mixel(x, y, TEXTE[(decalage + x + y * SCREEN_WIDTH) % len(TEXTE)])
+        for y in range(1, SCREEN_HEIGHT + 1)
+        for x in range(1, SCREEN_WIDTH + 1)
+    ]
+
+def menu(graine):
+    """Menu dont la ligne sélectionnée est en inversion vidéo"""
+    selection = 3 + graine % 18
+    mixels = []
+    for y in range(3, 21):
+        libelle = f"  Element {y - 2:02d}".ljust(30)
+        effet = Effect.INVERT if y == selection else Effect.NONE
+        for x, caractere in enumerate(libelle, start=5):
+            mixels.append(Mixel(x, y, caractere, effect=effet))
+    return mixels
+
+def bureau(graine):
+    """Bureau : liste de fichiers parcourue ligne à ligne, page suivante
+    toutes les 18 lignes (disposition de MenuDesktopWindow)"""
+    page, selection = divmod(graine, 18)
+    mixels = [
+        Mixel(x, 1, caractere, effect=Effect.INVERT)
+        for x, caractere in enumerate(" Bureau ".center(SCREEN_WIDTH), start=1)
+    ]
+    for i in range(18):
+        numero = page * 18 + i
+        nom = f"{'rapport' if numero % 3 else 'notes'}_{numero:03d}"
+        extension = 'txt' if numero % 2 else 'py'
+        y = i + 3
+        ligne = [(1, "F|", Effect.NONE),
+                 (3, nom, Effect.INVERT if i == selection else Effect.NONE),
+                 (3 + len(nom), " " * (33 - len(nom)), Effect.NONE),
+                 (SCREEN_WIDTH - 4, "|" + extension.rjust(4), Effect.NONE)]
+        for debut, texte, effet in ligne:
+            for x, caractere in enumerate(texte, start=debut):
+                mixels.append(Mixel(x, y, caractere, effect=effet))
+    pied = f"Page {page + 1}  {selection + 1:2d}/18  Sommaire Retour Suite"
+    for x, caractere in enumerate(pied, start=2):
+        mixels.append(Mixel(x, 24, caractere))
+    return mixels
+
+def couleurs(graine):
+    """Blocs de couleurs d’encre et de fond ; chaque rangée commence par
+    un espace, délimiteur qui valide le fond sur le Minitel"""
+    hasard = random.Random(graine)
+    mixels = []
+    for y in range(1, SCREEN_HEIGHT + 1):
+        encre = Color(hasard.randrange(8))
+        fond = Color(hasard.randrange(8))
+        for x in range(1, SCREEN_WIDTH + 1):
+            caractere = ' ' if x == 1 else chr(0x41 + (x + y) % 26)
+            mixels.append(Mixel(x, y, caractere,
+                                fg_color=encre, bg_color=fond))
+    return mixels
+
+def semigraphique(graine):
+    """Dégradé semi-graphique, comme une image convertie"""
+    hasard = random.Random(graine)
+    return [
+        Mixel(x, y, chr(0x20 + hasard.randrange(0x40)),
+              fg_color=Color(hasard.randrange(8)),
+              effect=Effect.SEMIGRAPHIQUE)
+        for y in range(1, SCREEN_HEIGHT + 1)
+        for x in range(1, SCREEN_WIDTH + 1)
+    ]
+
+def clairseme(graine):
+    """Quelques caractères modifiés au hasard (curseur, horloge...)"""
+    hasard = random.Random(graine)
+    return [
+        Mixel(hasard.randint(1, SCREEN_WIDTH), hasard.randint(1, SCREEN_HEIGHT),
+              chr(0x30 + hasard.randrange(10)))
+        for _ in range(12)
+    ]
+
+def alterne(graine):
+    """Tableau de compteurs : une colonne sur deux change à chaque trame,
+    séparateurs fixes dont certains en inversion vidéo"""
+    mixels = []
+    for y in range(3, 23):
+        for x in range(1, SCREEN_WIDTH + 1):
+            if x % 2:
+                mixels.append(Mixel(x, y, chr(0x30 + (graine + x * y) % 10)))
+            else:
+                effet = Effect.INVERT if x % 8 == 0 else Effect.NONE
+                mixels.append(Mixel(x, y, '|', effect=effet))
+    return mixels
+
+SCENARIOS = {
+    'texte': ecran_texte,
+    'menu': menu,
+    'bureau': bureau,
+    'couleurs': couleurs,
+    'semigraphique': semigraphique,
+    'clairseme': clairseme,
+    'alterne': alterne,
+}
+
+EFFETS = {
+    Effect.UNDERLINE: 'soulignement',
+    Effect.BLINK: 'clignotement',
+    Effect.INVERT: 'inversion',
+    Effect.SEMIGRAPHIQUE: 'semigraphique',
+}
+
+def differences(emulateur, tampon):
+    """Compte les cellules de l’émulateur différentes du MinitelBuffer"""
+    erreurs = 0
+    for mixel in tampon.mixels():
+        cellule = emulateur.cellule(mixel.x, mixel.y)
+        attendu = (
+            mixel.character,
+            COULEURS_MINITEL[mixel.fg_color.value],
+            COULEURS_MINITEL[mixel.bg_color.value],
+        )
+        obtenu = (cellule.caractere, cellule.encre, cellule.fond)
+        effets = all(
+            getattr(cellule, attribut) == (mixel.effect == effet)
+            for effet, attribut in EFFETS.items()
+        )
+        if attendu != obtenu or not effets:
+            erreurs += 1
+    return erreurs
+
+def mesure(nom, generateur, vitesse, trames):
+    tampon = MinitelBuffer()
+    encodeur = MinitelEncoder()
+    encodeur.baudrate = vitesse
+    absolu = MinitelEncoder(relative_moves=False)
+    emulateur = Emulateur(baudrate=vitesse)
+
+    cpu = 0.0
+    octets_absolus = 0
+    for graine in range(trames):
+        mixels = generateur(graine)
+        debut = time.process_time()
+        changements = tampon.apply(mixels)
+        for paquet in encodeur.encode(changements, screen=tampon):
+            emulateur.write(bytes(paquet))
+        cpu += time.process_time() - debut
+        octets_absolus += sum(map(len, absolu.encode(changements,
+                                                       screen=tampon)))
+
+    trame = emulateur.trame()
+    octets = trame['octets']
+    erreurs = differences(emulateur, tampon)
+    print(
+        f"{nom:14s} {vitesse:5d} bps  {octets / trames:8.0f} o/trame  "
+        f"{trame['duree'] / trames * 1000:8.1f} ms/trame  "
+        f"encodage {cpu / trames * 1000:6.2f} ms  "
+        f"curseur {(octets_absolus - octets) / trames:+6.0f} o  "
+        f"{'ok' if not erreurs else f'{erreurs} cellules fausses'}"
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trames', type=int, default=20)
+    parser.add_argument('--vitesses', type=int, nargs='*',
+                        default=[1200, 4800, 9600])
+    parser.add_argument('--scenarios', nargs='*', default=list(SCENARIOS))
+    arguments = parser.parse_args()
+
+    for nom in arguments.scenarios:
+        for vitesse in arguments.vitesses:
+            mesure(nom, SCENARIOS[nom], vitesse, arguments.trames)
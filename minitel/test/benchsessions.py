@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Mesure du nombre de sessions Desktop pilotables par cœur
+
+Chaque session est reliée à un faux Minitel : un TransportPty dont le côté
+maître est utilisé par la classe Minitel et le côté esclave est vidé par un
+thread qui simule l’utilisateur en envoyant régulièrement des flèches.
+
+Usage : python -m minitel.test.benchsessions [sessions...] [--duree N]
+"""
+
+import argparse
+import contextlib
+import os
+import threading
+import time
+
+from minitel.Minitel import Minitel
+from minitel.Transport import TransportPty
+from minitel.tui.session import Session, SessionScheduler
+from minitel.apps.dekstop.desktop import Desktop
+
+# Flèches bas/haut telles qu’envoyées par un Minitel en clavier étendu
+TOUCHES = (b'\x1b[B', b'\x1b[A')
+
+def faux_minitel(esclave, arret, recus, cadence):
+    """Vide le côté esclave du pty et injecte des touches"""
+    os.set_blocking(esclave, False)
+    prochaine = time.monotonic() + cadence
+    indice = 0
+    while not arret.is_set():
+        try:
+            donnees = os.read(esclave, 4096)
+            recus[0] += len(donnees)
+        except BlockingIOError:
+            time.sleep(0.002)
+        except OSError:
+            break
+        if time.monotonic() >= prochaine:
+            os.write(esclave, TOUCHES[indice % 2])
+            indice += 1
+            prochaine += cadence
+
+def mesure(nombre, duree, cadence, dossier):
+    arret = threading.Event()
+    sessions = []
+    fils = []
+    recus = []
+
+    for indice in range(nombre):
+        liaison = TransportPty()
+        minitel = Minitel(liaison)
+        compteur = [0]
+        recus.append(compteur)
+        fil = threading.Thread(
+            target=faux_minitel,
+            args=(liaison.esclave, arret, compteur, cadence),
+            daemon=True
+        )
+        fil.start()
+        fils.append(fil)
+        sessions.append(Session(minitel, name=f"pty{indice}"))
+
+    ordonnanceur = SessionScheduler(sessions)
+    with open(os.devnull, 'w') as nul, contextlib.redirect_stdout(nul):
+        for session in sessions:
+            session.start(Desktop, start_path=dossier)
+
+        cpu = time.process_time()
+        debut = time.monotonic()
+        ordonnanceur.run(duration=duree)
+        ecoule = time.monotonic() - debut
+        cpu = time.process_time() - cpu
+
+    arret.set()
+    for session in sessions:
+        session.minitel._continuer = False
+
+    octets = sum(compteur[0] for compteur in recus)
+    charge = cpu / ecoule
+    print(
+        f"{nombre:4d} sessions  {ordonnanceur.rounds / ecoule:8.0f} tours/s  "
+        f"{octets / ecoule / 1024:8.1f} Ko/s  cpu {charge * 100:5.1f} %  "
+        f"=> {nombre / charge if charge else float('inf'):8.0f} sessions/cœur"
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sessions', nargs='*', type=int, default=[1, 4, 16, 64])
+    parser.add_argument('--duree', type=float, default=5.0)
+    parser.add_argument('--cadence', type=float, default=0.25,
+                        help="secondes entre deux touches par terminal")
+    parser.add_argument('--dossier', default='.')
+    arguments = parser.parse_args()
+
+    for nombre in arguments.sessions:
+        mesure(nombre, arguments.duree, arguments.cadence, arguments.dossier)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Test de MinitelAsync sur un bouclage en mémoire
+
+Un couple de flux créé par paire_memoire est confié à MinitelAsync, l’autre
+joue le rôle du Minitel : il lit ce qui est émis et injecte des réponses.
+
+Usage : python -m minitel.test.testasync
+        python -m pytest minitel/test/testasync.py
+"""
+
+import asyncio
+from queue import Empty
+
+from minitel.MinitelAsync import MinitelAsync, paire_memoire
+from minitel.Sequence import Sequence
+from minitel.constantes import (ESC, PRO1, PRO2, PROG, STATUS_VITESSE,
+    LONGUEUR_PRO2, B1200, B4800, CAPACITES_BASIQUES)
+
+# Délai d’échappement court pour ne pas ralentir les tests
+DELAI_ECHAPPEMENT = 0.05
+
+def execute(test):
+    """Exécute une coroutine de test avec un MinitelAsync et son Minitel
+
+    :param test:
+        coroutine recevant l’objet MinitelAsync puis le couple (lecteur,
+        ecrivain) du côté Minitel
+    """
+    async def principal():
+        cote_minitel, cote_pc = paire_memoire()
+        minitel = MinitelAsync(*cote_pc, delai_echappement = DELAI_ECHAPPEMENT)
+        try:
+            await test(minitel, *cote_minitel)
+        finally:
+            await minitel.close()
+
+    asyncio.run(principal())
+
+async def lire(lecteur, longueur):
+    """Lit exactement longueur octets émis vers le Minitel"""
+    return await asyncio.wait_for(lecteur.readexactly(longueur), 1)
+
+def test_send():
+    """send émet les octets de la séquence sur le flux"""
+    async def test(minitel, lecteur, ecrivain):
+        await minitel.send('Bonjour')
+        assert await lire(lecteur, 7) == b'Bonjour'
+
+        await minitel.send(Sequence([ESC, 0x41]))
+        assert await lire(lecteur, 2) == bytes([ESC, 0x41])
+
+        # Les commandes reprises de Minitel passent aussi par send
+        await minitel.position(1, 1)
+        assert await lire(lecteur, 1) == b'\x1e'
+
+    execute(test)
+
+def test_recevoir_sequence():
+    """Les octets reçus sont découpés en séquences"""
+    async def test(minitel, lecteur, ecrivain):
+        ecrivain.write(b'A\x1b[B')
+        assert (await minitel.recevoir_sequence(attente = 1)).valeurs \
+            == [0x41]
+        assert (await minitel.recevoir_sequence(attente = 1)).valeurs \
+            == [ESC, 0x5b, 0x42]
+
+        # Rien de reçu : Empty, en mode bloquant comme non bloquant
+        try:
+            await minitel.recevoir_sequence(bloque = False)
+            assert False, "Empty attendue"
+        except Empty:
+            pass
+        try:
+            await minitel.recevoir_sequence(attente = 0.1)
+            assert False, "Empty attendue"
+        except Empty:
+            pass
+
+    execute(test)
+
+def test_echappement():
+    """Un ESC seul est libéré à l’échéance du délai d’échappement"""
+    async def test(minitel, lecteur, ecrivain):
+        loop = asyncio.get_running_loop()
+        debut = loop.time()
+        ecrivain.write(bytes([ESC]))
+        sequence = await minitel.recevoir_sequence(attente = 1)
+        assert sequence.valeurs == [ESC]
+        assert loop.time() - debut >= DELAI_ECHAPPEMENT * 0.9
+
+        # Un ESC complété avant l’échéance reste une seule séquence
+        ecrivain.write(bytes([ESC]))
+        await asyncio.sleep(DELAI_ECHAPPEMENT / 5)
+        ecrivain.write(b'[A')
+        sequence = await minitel.recevoir_sequence(attente = 1)
+        assert sequence.valeurs == [ESC, 0x5b, 0x41]
+
+    execute(test)
+
+def test_appeler():
+    """appeler retourne la réponse PRO du Minitel"""
+    async def test(minitel, lecteur, ecrivain):
+        reponse = PRO2 + [0x75, B1200]
+
+        async def repond():
+            assert await lire(lecteur, 3) == bytes(PRO1 + [STATUS_VITESSE])
+            ecrivain.write(bytes(reponse))
+
+        tache = asyncio.create_task(repond())
+        retour = await minitel.appeler([PRO1, STATUS_VITESSE], LONGUEUR_PRO2)
+        await tache
+        assert retour.valeurs == reponse
+
+        # Au-delà de la longueur attendue, les octets sont ignorés
+        async def repond_trop():
+            await lire(lecteur, 3)
+            ecrivain.write(bytes(reponse) + b'X')
+
+        tache = asyncio.create_task(repond_trop())
+        retour = await minitel.appeler([PRO1, STATUS_VITESSE], LONGUEUR_PRO2)
+        await tache
+        assert retour.valeurs == reponse
+
+    execute(test)
+
+def test_definir_vitesse():
+    """definir_vitesse programme le Minitel puis règle le port"""
+    async def test(minitel, lecteur, ecrivain):
+        transport = minitel._ecrivain.transport
+
+        # Vitesse au-delà des capacités du Minitel : rien n’est émis
+        assert not await minitel.definir_vitesse(4800)
+        assert minitel.vitesse == 1200
+
+        minitel.capacite = dict(CAPACITES_BASIQUES, vitesse = 9600)
+
+        # Le Minitel acquitte à l’ancienne vitesse : échec
+        async def refuse():
+            assert await lire(lecteur, 4) == bytes(PRO2 + [PROG, B4800])
+            ecrivain.write(bytes(PRO2 + [0x75, B1200]))
+
+        tache = asyncio.create_task(refuse())
+        assert not await minitel.definir_vitesse(4800)
+        await tache
+        assert minitel.vitesse == 1200
+        assert transport.baudrate == 1200
+
+        # Le Minitel change de vitesse sans répondre : succès
+        assert await minitel.definir_vitesse(4800)
+        assert await lire(lecteur, 4) == bytes(PRO2 + [PROG, B4800])
+        assert minitel.vitesse == 4800
+        assert transport.baudrate == 4800
+
+    execute(test)
+
+if __name__ == '__main__':
+    for nom, test in list(globals().items()):
+        if nom.startswith('test_'):
+            test()
+            print(nom, 'ok')
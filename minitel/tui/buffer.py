@@ -1,27 +1,187 @@
-from minitel.tui.core.mixel import Mixel
+from itertools import chain
+
+import numpy as np
+
+from minitel.tui.core import Color, Effect
+from minitel.tui.core.mixel import (
+    Mixel, ATTRIBUTE_MASK, BG_SHIFT, CHAR_SHIFT, EFFECT_SHIFT, FG_SHIFT
+)
 from minitel.tui.core.config import SCREEN_HEIGHT, SCREEN_WIDTH
 
+# Décalage appliqué à Effect.value pour le stocker en uint8 (NONE vaut -1)
+EFFECT_OFFSET = 1
+SEMIGRAPHIC = Effect.SEMIGRAPHIQUE.value + EFFECT_OFFSET
+
+# Une cellule vide du Minitel : espace blanc sur noir sans effet
+BLANK_CHAR = ord(' ')
+BLANK_FG = Color.WHITE.value
+BLANK_BG = Color.BLACK.value
+BLANK_EFFECT = Effect.NONE.value + EFFECT_OFFSET
+
+
 class MinitelBuffer:
+    """Modèle de l'écran sous forme de plans NumPy
+
+    Chaque attribut d'une cellule est rangé dans un plan rows x cols :
+
+    - chars : point de code unicode du caractère (uint32, les caractères
+      accentués et spéciaux du Minitel dépassent 255),
+    - fg, bg : Color.value (uint8),
+    - effects : Effect.value + 1 (uint8),
+    - semigraphic : cellule en mode semi-graphique (bool),
+    - valid : la cellule a été écrite depuis le dernier effacement (bool).
+
+    Les indices des plans sont (y - 1, x - 1).
+    """
     def __init__(self, cols=SCREEN_WIDTH, rows=SCREEN_HEIGHT):
         self.cols = cols
         self.rows = rows
-        self.buffer = [[None for _ in range(cols)] for _ in range(rows)]
+        shape = (rows, cols)
+        self.chars = np.zeros(shape, dtype=np.uint32)
+        self.fg = np.zeros(shape, dtype=np.uint8)
+        self.bg = np.zeros(shape, dtype=np.uint8)
+        self.effects = np.zeros(shape, dtype=np.uint8)
+        self.semigraphic = np.zeros(shape, dtype=bool)
+        self.valid = np.zeros(shape, dtype=bool)
 
     def clear(self):
-        self.buffer = [[None for _ in range(self.cols)] for _ in range(self.rows)]
+        self.valid[:] = False
 
     def reset_row(self, idx):
-        self.buffer[idx] = [None for _ in range(self.cols)]
+        self.valid[idx] = False
+
+    def clear_region(self, x, y, width, height):
+        """Vide un rectangle (x et y à partir de 1)."""
+        self.valid[max(y - 1, 0):y - 1 + height, max(x - 1, 0):x - 1 + width] = False
+
+    def update(self, xs, ys, chars, fg, bg, effects) -> np.ndarray:
+        """Écrit des cellules et retourne celles qui ont changé.
+
+        Les paramètres sont des tableaux de même longueur (x et y à partir
+        de 1). Si une cellule apparaît plusieurs fois, la dernière valeur
+        l'emporte.
+
+        :returns: les indices, dans les tableaux donnés, des cellules
+                  modifiées, dans l'ordre de l'écran (rangée puis colonne)
+        """
+        flat = (np.asarray(ys) - 1) * self.cols + (np.asarray(xs) - 1)
+        # Dernière occurrence de chaque cellule, dans l'ordre de l'écran
+        owner = np.full(self.rows * self.cols, -1, dtype=np.intp)
+        np.maximum.at(owner, flat, np.arange(len(flat)))
+        cells = np.flatnonzero(owner >= 0)
+        idx = owner[cells]
+
+        chars = np.asarray(chars)[idx]
+        fg = np.asarray(fg)[idx]
+        bg = np.asarray(bg)[idx]
+        effects = np.asarray(effects)[idx]
+
+        changed = (
+            ~self.valid.flat[cells]
+            | (self.chars.flat[cells] != chars)
+            | (self.fg.flat[cells] != fg)
+            | (self.bg.flat[cells] != bg)
+            | (self.effects.flat[cells] != effects)
+        )
+        cells = cells[changed]
+        self.chars.flat[cells] = chars[changed]
+        self.fg.flat[cells] = fg[changed]
+        self.bg.flat[cells] = bg[changed]
+        self.effects.flat[cells] = effects[changed]
+        self.semigraphic.flat[cells] = effects[changed] == SEMIGRAPHIC
+        self.valid.flat[cells] = True
+        return idx[changed]
+
+    def update_cells(self, xs, ys, cells) -> np.ndarray:
+        """Écrit des cellules compactes (voir minitel.tui.core.mixel.pack).
+
+        Variante de update pour des rangées construites par pack_text,
+        sans passer par des objets Mixel.
+        """
+        cells = np.asarray(cells, dtype=np.uint32)
+        return self.update(
+            xs, ys,
+            cells >> CHAR_SHIFT,
+            cells >> FG_SHIFT & ATTRIBUTE_MASK,
+            cells >> BG_SHIFT & ATTRIBUTE_MASK,
+            cells >> EFFECT_SHIFT & ATTRIBUTE_MASK,
+        )
+
+    def cells(self) -> np.ndarray:
+        """Plan des cellules compactes (0 pour une cellule jamais écrite)"""
+        packed = (
+            self.chars << CHAR_SHIFT
+            | self.fg.astype(np.uint32) << FG_SHIFT
+            | self.bg.astype(np.uint32) << BG_SHIFT
+            | self.effects.astype(np.uint32) << EFFECT_SHIFT
+        )
+        packed[~self.valid] = 0
+        return packed
 
     def apply(self, mixels: list[Mixel]) -> list[Mixel]:
-        changed = []
+        """Écrit des mixels et retourne ceux qui ont changé, dans l'ordre
+        de l'écran."""
+        if not mixels:
+            return []
+
+        # Extraction en une passe ; _value_ évite le descripteur Enum.value
+        data = np.fromiter(chain.from_iterable([
+            (m.x, m.y, ord(m.character), m.fg_color._value_,
+             m.bg_color._value_, m.effect._value_)
+            for m in mixels
+        ]), dtype=np.int64, count=6 * len(mixels)).reshape(-1, 6)
+        data[:, 5] += EFFECT_OFFSET
+        changed = self.update(*data.T)
+        return [mixels[i] for i in changed]
+
+    def copy_from(self, other: 'MinitelBuffer'):
+        """Recopie le contenu d'un autre buffer de mêmes dimensions."""
+        for plane in ('chars', 'fg', 'bg', 'effects', 'semigraphic', 'valid'):
+            np.copyto(getattr(self, plane), getattr(other, plane))
+
+    def blank_mask(self) -> np.ndarray:
+        """Cellules vides : jamais écrites ou espace blanc sur noir."""
+        return ~self.valid | (
+            (self.chars == BLANK_CHAR)
+            & (self.fg == BLANK_FG)
+            & (self.bg == BLANK_BG)
+            & (self.effects == BLANK_EFFECT)
+        )
+
+    def diff_mask(self, other: 'MinitelBuffer') -> np.ndarray:
+        """Plan des cellules dont l'aspect diffère entre deux buffers.
+
+        Une cellule jamais écrite et une cellule contenant un espace blanc
+        sur noir sont considérées identiques.
+        """
+        blank = self.blank_mask()
+        other_blank = other.blank_mask()
+        return (blank != other_blank) | (~blank & ~other_blank & (
+            (self.chars != other.chars)
+            | (self.fg != other.fg)
+            | (self.bg != other.bg)
+            | (self.effects != other.effects)
+        ))
+
+    def diff(self, other: 'MinitelBuffer') -> tuple[np.ndarray, np.ndarray]:
+        """Cellules différentes entre deux buffers.
+
+        :returns: (ys, xs) des cellules différentes, indices à partir de 0
+        """
+        return np.nonzero(self.diff_mask(other))
 
-        for m in mixels:
-            x, y = m.x-1, m.y-1
-            old = self.buffer[y][x]
-            # comparaison logique
-            if old != m:        
-                self.buffer[y][x] = m
-                changed.append(m)
+    def mixel(self, x: int, y: int) -> Mixel | None:
+        """Reconstruit le Mixel d'une cellule (None si elle est vide)."""
+        if not self.valid[y - 1, x - 1]:
+            return None
+        return Mixel(
+            x, y, chr(self.chars[y - 1, x - 1]),
+            fg_color=Color(int(self.fg[y - 1, x - 1])),
+            bg_color=Color(int(self.bg[y - 1, x - 1])),
+            effect=Effect(int(self.effects[y - 1, x - 1]) - EFFECT_OFFSET),
+        )
 
-        return changed
+    def mixels(self) -> list[Mixel]:
+        """Tous les mixels écrits, dans l'ordre de l'écran."""
+        ys, xs = np.nonzero(self.valid)
+        return [self.mixel(x + 1, y + 1) for y, x in zip(ys.tolist(), xs.tolist())]
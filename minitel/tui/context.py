@@ -0,0 +1,10 @@
+from contextvars import ContextVar
+
+# Session en cours de traitement. Quand aucune session n'est active, les
+# classes Graphics, KeyboardController et SceneManager utilisent leur état
+# global (un seul terminal par processus).
+_current_session = ContextVar('current_session', default=None)
+
+def current_session():
+    """Retourne la session active ou None"""
+    return _current_session.get()
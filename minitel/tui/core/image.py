@@ -8,9 +8,8 @@ PIL en semi-graphiques pour le Minitel.
 
 from PIL import Image
 import numpy as np
-from operator import itemgetter
 
-from minitel.constantes import ESC, RS, SO, DC2, COULEURS_MINITEL
+from minitel.constantes import ESC, RS, SO, DC2, US, COULEURS_MINITEL
 
 from minitel.tui.core.mixel import Mixel
 
@@ -62,9 +61,55 @@ def kmeans_quantification(pixels, k=8, max_iter=100, eps=1e-4):
 
     return labels.reshape(shape), quantized_levels.reshape(shape), centers
 
-def quantify_with_kmeans(image_pil, k=8):
+def kmeans_histogram(pixels, k=8, max_iter=100, eps=1e-4):
+    """k-means à une dimension sur l’histogramme des niveaux.
+
+    Même résultat que kmeans_quantification pour des pixels sur 8 bits,
+    mais chaque itération travaille sur les 256 niveaux possibles pondérés
+    par leur nombre d’occurrences : son coût ne dépend plus de la taille
+    de l’image.
+    """
+    shape = pixels.shape
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    hist = np.bincount(pixels.ravel(), minlength=256)
+    centers = initialize_centers(pixels, k)
+
+    # Niveaux présents dans l’image et leur poids
+    values = np.flatnonzero(hist).astype(np.float32)
+    weights = hist[hist > 0].astype(np.float64)
+
+    for _ in range(max_iter):
+        # Étape 1 : assignation de chaque niveau
+        labels = np.argmin(np.abs(values[:, None] - centers[None, :]), axis=1)
+
+        # Étape 2 : recalcul des centres, moyennes pondérées
+        sums = np.bincount(labels, weights=weights * values, minlength=k)
+        counts = np.bincount(labels, weights=weights, minlength=k)
+        new_centers = np.where(
+            counts > 0, sums / np.maximum(counts, 1), centers
+        ).astype(np.float32)
+
+        # Convergence
+        if np.allclose(new_centers, centers, atol=eps):
+            break
+        centers = new_centers
+
+    # Quantification : table des 256 niveaux puis indexation de l’image
+    levels = np.arange(256, dtype=np.float32)
+    table = np.argmin(np.abs(levels[:, None] - centers[None, :]), axis=1)
+    labels = table[pixels]
+    quantized_levels = centers[labels]
+
+    return labels.reshape(shape), quantized_levels.reshape(shape), centers
+
+def quantify_with_kmeans(image_pil, k=8, quantifier=kmeans_histogram):
+    """Quantifie une image en k niveaux.
+
+    :param quantifier: kmeans_histogram (par défaut) ou
+                       kmeans_quantification
+    """
     pixels = np.array(image_pil)
-    labels, levels, centers = kmeans_quantification(pixels, k=k)
+    labels, levels, centers = quantifier(pixels, k=k)
 
     # Image PIL quantifiée en index de cluster
     image_quantized = Image.fromarray(labels.astype(np.uint8), mode='L')
@@ -74,74 +119,68 @@ def quantify_with_kmeans(image_pil, k=8):
 
     return image_quantized, image_gray, centers
 
-def _deux_couleurs(couleurs):
-    """Réduit une liste de couleurs à un couple de deux couleurs.
-
-    Les deux couleurs retenues sont les couleurs les plus souvent
-    présentes.
-
-    :param couleurs:
-        Les couleurs à réduire. Chaque couleur doit être un entier compris
-        entre 0 et 7 inclus.
-    :type couleurs:
-        Une liste d’entiers
+def _blocs(image: Image.Image, largeur: int, hauteur: int) -> np.ndarray:
+    """Découpe l’image en blocs de 2 × 3 pixels, un par caractère.
 
     :returns:
-        Un tuple de deux entiers représentant les couleurs sélectionnées.
+        Un tableau (hauteur, largeur, 6) : pour chaque caractère, les
+        pixels dans l’ordre (0, 0), (1, 0), (0, 1), (1, 1), (0, 2), (1, 2).
     """
-    assert isinstance(couleurs, list)
+    pixels = np.asarray(image)[:hauteur * 3, :largeur * 2]
+    return pixels.reshape(hauteur, 3, largeur, 2) \
+        .transpose(0, 2, 1, 3) \
+        .reshape(hauteur, largeur, 6) \
+        .astype(np.int16)
 
-    # Crée une liste contenant le nombre de fois où un niveau est
-    # enregistré
-    niveaux = [0, 0, 0, 0, 0, 0, 0, 0]
+def _deux_couleurs(blocs):
+    """Réduit chaque bloc de couleurs à un couple de deux couleurs.
 
-    # Passe en revue tous les niveaux pour les comptabiliser
-    for couleur in couleurs:
-        niveaux[couleur] += 1
-
-    # Prépare la liste des niveaux afin de pouvoir la trier du plus
-    # utilisé au moins utilisé. Pour cela, on crée une liste de tuples
-    # (niveau, nombre d’apparitions)
-    # niveaux = [(index, valeur) for index, valeur in enumerate(niveaux)]
+    Les deux couleurs retenues sont les couleurs les plus souvent
+    présentes. En cas d’égalité, le niveau le plus bas l’emporte.
 
-    # Trie les niveaux par nombre d’apparition
-    niveaux = sorted(enumerate(niveaux), key = itemgetter(1), reverse = True)
-    # Retourne les deux niveaux les plus rencontrés
-    return (niveaux[0][0], niveaux[1][0])
+    :param blocs:
+        Les couleurs à réduire, la dernière dimension regroupant les
+        couleurs d’un bloc. Chaque couleur doit être un entier compris
+        entre 0 et 7 inclus.
+    :type blocs:
+        un tableau NumPy d’entiers
 
-def _arp_ou_avp(couleur, arp, avp):
-    """Convertit une couleur en couleur d’arrière-plan ou d’avant-plan.
+    :returns:
+        Un tuple de deux tableaux (arrière-plan, avant-plan) de la forme
+        des blocs sans leur dernière dimension.
+    """
+    # Nombre de fois où chaque niveau est enregistré dans chaque bloc
+    niveaux = (blocs[..., None] == np.arange(8)).sum(axis=-2)
 
-    La conversion se fait en calculant la proximité de la couleur avec la
-    couleur d’arrière-plan (arp) et avec la couleur d’avant-plan (avp).
+    # Trie les niveaux par nombre d’apparition, un tri stable garde le
+    # niveau le plus bas en premier en cas d’égalité
+    ordre = np.argsort(-niveaux, axis=-1, kind='stable')
+    return ordre[..., 0], ordre[..., 1]
 
-    :param couleur:
-        La couleur à convertir (valeur de 0 à 7 inclus).
-    :type couleur:
-        un entier
+def _arp_ou_avp(blocs, arp, avp):
+    """Convertit les couleurs en couleur d’arrière-plan ou d’avant-plan.
 
-    :param arp:
-        La couleur d’arrière-plan (valeur de 0 à 7 inclus)
-    :type arp:
-        un entier
-
-    :param avp:
-        La couleur d’avant-plan (valeur de 0 à 7 inclus)
-    :type avp:
-        un entier
+    La conversion se fait en calculant la proximité de chaque couleur avec
+    la couleur d’arrière-plan (arp) et avec la couleur d’avant-plan (avp)
+    de son bloc.
 
     :returns:
-        0 si la couleur est plus proche de la couleur d’arrière-plan, 1 si
-        la couleur est plus proche de la couleur d’avant-plan.
+        Un tableau de la forme des blocs : 0 si la couleur est plus proche
+        de la couleur d’arrière-plan, 1 si la couleur est plus proche de la
+        couleur d’avant-plan.
     """
-    assert isinstance(couleur, int)
-    assert isinstance(arp, int)
-    assert isinstance(avp, int)
+    return (
+        np.abs(arp[..., None] - blocs) >= np.abs(avp[..., None] - blocs)
+    ).astype(np.uint8)
 
-    if(abs(arp - couleur) < abs(avp - couleur)):
-        return 0
+def _mosaiques(bits):
+    """Convertit des blocs de 6 bits en caractères mosaïques du Minitel.
 
-    return 1
+    Le caractère est codé sur 7 bits : le 6e bit est toujours à 1 et le
+    dernier pixel occupe le 7e bit.
+    """
+    poids = np.array([1 << 0, 1 << 1, 1 << 2, 1 << 3, 1 << 4, 1 << 6])
+    return 0b0100000 | (bits * poids).sum(axis=-1)
 
 def _minitel_arp(niveau):
     """Convertit un niveau en une séquence de codes Minitel définissant la
@@ -184,6 +223,33 @@ def _minitel_avp(niveau):
     except IndexError:
         return [ESC, 0x47]
 
+def interlace(sequences, step=3):
+    """Découpe les séquences d’une image en morceaux à émettre de façon
+    entrelacée.
+
+    La première passe envoie une rangée sur step, les suivantes complètent
+    les rangées manquantes : une version grossière de l’image apparaît
+    après un tiers de l’émission. Chaque rangée est précédée d’un
+    positionnement absolu (US), qui réinitialise aussi les attributs :
+    les rangées produites par ImageMinitelMixels.importer redéfinissent
+    leurs couleurs et peuvent donc être émises dans n’importe quel ordre.
+
+    :param sequences:
+        Les séquences retournées par ImageMinitelMixels.importer (RS puis
+        une séquence par rangée).
+
+    :returns:
+        Une liste de morceaux (listes d’entiers ou bytes), un par rangée.
+    """
+    rows = sequences[1:]
+    chunks = []
+    for start in range(step):
+        for index in range(start, len(rows), step):
+            chunk = [US, 0x41 + index, 0x41]
+            chunk.extend(rows[index])
+            chunks.append(chunk)
+    return chunks
+
 class ImageMinitelMixels:
     """Convertit une image PIL en Mixels pour Minitel semi-graphique."""
 
@@ -203,6 +269,14 @@ class ImageMinitelMixels:
         self.largeur = int(image.size[0] / 2)
         self.hauteur = int(image.size[1] / 3)
 
+        # Découpage, couleurs et caractères mosaïques de tous les blocs
+        # en une passe. Un caractère ne peut avoir que deux couleurs : cela
+        # peut faire apparaître des artefacts mais est inévitable
+        blocs = _blocs(image, self.largeur, self.hauteur)
+        arps, avps = _deux_couleurs(blocs)
+        alphas = _mosaiques(_arp_ou_avp(blocs, arps, avps))
+        arps, avps, alphas = arps.tolist(), avps.tolist(), alphas.tolist()
+
         # Initialise la liste des séquences
         sequences = [[RS]]
 
@@ -220,52 +294,8 @@ class ImageMinitelMixels:
             if self.disjoint:
                 sequence.extend([ESC, 0x5A])
 
-            for largeur in range(0, self.largeur):
-                # Récupère 6 pixels
-                pixels = [
-                    image.getpixel((largeur * 2 + x, hauteur * 3 + y))
-                    for x, y in [(0, 0), (1, 0),
-                                  (0, 1), (1, 1),
-                                  (0, 2), (1, 2)]
-                ]
-
-                # if self.disjoint:
-                #     # Convertit chaque couleur de pixel en deux niveaux de gris
-                #     pixels = [_huit_niveaux(pixel) for pixel in pixels]
-
-                #     arp, avp = _deux_couleurs(pixels)
-
-                #     if arp != 0:
-                #         arp, avp = 0, arp
-
-                # else:
-                    # Convertit chaque couleur de pixel en huit niveau de gris
-                    # pixels = [_huit_niveaux(pixel) for pixel in pixels]
-
-                    # Recherche les deux couleurs les plus fréquentes
-                    # un caractère ne peut avoir que deux couleurs !
-                arp, avp = _deux_couleurs(pixels)
-
-                # Réduit à deux le nombre de couleurs dans un bloc de 6 pixels
-                # Cela peut faire apparaître des artefacts mais est inévitable
-                pixels = [_arp_ou_avp(pixel, arp, avp) for pixel in pixels]
-
-                # Convertit les 6 pixels en un caractère mosaïque du minitel
-                # Le caractère est codé sur 7 bits
-                bits = [
-                    '0',
-                    str(pixels[5]),
-                    '1',
-                    str(pixels[4]),
-                    str(pixels[3]),
-                    str(pixels[2]),
-                    str(pixels[1]),
-                    str(pixels[0])
-                ]
-
-                # Génère l’octet (7 bits) du caractère mosaïque
-                alpha = int(''.join(bits), 2)
-
+            for arp, avp, alpha in zip(arps[hauteur], avps[hauteur],
+                                       alphas[hauteur]):
                 # Si les couleurs du précédent caractères sont inversés,
                 # inverse le caractère mosaïque. Cela évite d’émettre
                 # à nouveau des codes couleurs. Cela fonctionne uniquement
@@ -1,29 +1,119 @@
+import numpy as np
+
 from .color import Color
 from . effect import Effect
 
+# Cellule compacte sur 32 bits : caractère (21 bits, tout point de code
+# unicode), effet + 1 (3 bits), fond (3 bits), encre (3 bits)
+FG_SHIFT = 0
+BG_SHIFT = 3
+EFFECT_SHIFT = 6
+CHAR_SHIFT = 9
+ATTRIBUTE_MASK = 0b111
+
+_COLORS = tuple(Color)
+_EFFECTS = {effect.value + 1: effect for effect in Effect}
+
+
+def pack_attributes(fg_color: Color = Color.WHITE,
+                    bg_color: Color = Color.BLACK,
+                    effect: Effect = Effect.NONE) -> int:
+    """Partie attributs d'une cellule compacte"""
+    return (fg_color._value_ << FG_SHIFT
+            | bg_color._value_ << BG_SHIFT
+            | (effect._value_ + 1) << EFFECT_SHIFT)
+
+
+def pack(character: str = ' ',
+         fg_color: Color = Color.WHITE,
+         bg_color: Color = Color.BLACK,
+         effect: Effect = Effect.NONE) -> int:
+    """Cellule compacte (entier de 32 bits) sans position"""
+    return ord(character) << CHAR_SHIFT \
+        | pack_attributes(fg_color, bg_color, effect)
+
+
+def unpack(cell: int) -> tuple[str, Color, Color, Effect]:
+    """(caractère, encre, fond, effet) d'une cellule compacte"""
+    cell = int(cell)
+    return (
+        chr(cell >> CHAR_SHIFT),
+        _COLORS[cell >> FG_SHIFT & ATTRIBUTE_MASK],
+        _COLORS[cell >> BG_SHIFT & ATTRIBUTE_MASK],
+        _EFFECTS[cell >> EFFECT_SHIFT & ATTRIBUTE_MASK],
+    )
+
+
+def pack_text(text: str,
+              fg_color: Color = Color.WHITE,
+              bg_color: Color = Color.BLACK,
+              effect: Effect = Effect.NONE) -> np.ndarray:
+    """Rangée de cellules compactes (uint32) pour un texte, sans boucle
+    Python : les points de code sont lus directement en UTF-32."""
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    return (codes << CHAR_SHIFT) | np.uint32(
+        pack_attributes(fg_color, bg_color, effect)
+    )
+
+
 class Mixel:
     "Minitel Element"
+    # Pas de __dict__ : une fenêtre crée un Mixel par caractère à chaque
+    # rendu
+    __slots__ = ('x', 'y', 'character', 'fg_color', 'bg_color', 'effect')
 
-    def __init__(self, x: int = 1, y: int = 1, character: str = ' ', 
+    def __init__(self, x: int = 1, y: int = 1, character: str = ' ',
                  fg_color: Color = Color.WHITE,
                  bg_color: Color = Color.BLACK,
                  effect: Effect = Effect.NONE):
         self.x = x
         self.y = y
         self.character = character
-        self.fg_color = fg_color 
+        self.fg_color = fg_color
         self.bg_color = bg_color
         self.effect = effect
-    
+
+    @classmethod
+    def row(cls, x: int, y: int, text: str,
+            fg_color: Color = Color.WHITE,
+            bg_color: Color = Color.BLACK,
+            effect: Effect = Effect.NONE) -> list['Mixel']:
+        """Mixels d'un texte sur une rangée, à partir de la colonne x"""
+        new = object.__new__
+        mixels = []
+        append = mixels.append
+        for i, character in enumerate(text, start=x):
+            mixel = new(cls)
+            mixel.x = i
+            mixel.y = y
+            mixel.character = character
+            mixel.fg_color = fg_color
+            mixel.bg_color = bg_color
+            mixel.effect = effect
+            append(mixel)
+        return mixels
+
+    @classmethod
+    def from_cell(cls, x: int, y: int, cell: int) -> 'Mixel':
+        """Mixel d'une cellule compacte (voir pack)"""
+        return cls(x, y, *unpack(cell))
+
+    @property
+    def cell(self) -> int:
+        """Cellule compacte (entier de 32 bits), position exclue"""
+        return pack(self.character, self.fg_color, self.bg_color, self.effect)
+
     def __eq__(self, other: 'Mixel'):
-        if other is None:
+        if not isinstance(other, Mixel):
             return False
-        pos = self.x == other.x and self.y == other.y
-        char = self.character == other.character
-        fg = self.fg_color == other.fg_color
-        bg = self.bg_color == other.bg_color
-        effect = self.effect == other.effect
-        return pos and char and fg and bg and effect
-    
+        return (self.x == other.x and self.y == other.y
+                and self.character == other.character
+                and self.fg_color is other.fg_color
+                and self.bg_color is other.bg_color
+                and self.effect is other.effect)
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.cell))
+
     def __str__(self):
-        return f"Mixel({self.x},{self.y},{self.character},color=({self.bg_color}, {self.fg_color}), effect={self.effect})"
\ No newline at end of file
+        return f"Mixel({self.x},{self.y},{self.character},color=({self.bg_color}, {self.fg_color}), effect={self.effect})"
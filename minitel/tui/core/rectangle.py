@@ -6,4 +6,19 @@ class Rectangle:
     x: int
     y: int
     width: int
-    height: int
\ No newline at end of file
+    height: int
+
+    def contains(self, x: int, y: int) -> bool:
+        """La cellule (x, y) est-elle dans le rectangle ?"""
+        return (self.x <= x < self.x + self.width
+                and self.y <= y < self.y + self.height)
+
+    def intersection(self, other: 'Rectangle') -> 'Rectangle | None':
+        """Partie commune de deux rectangles, None s'ils sont disjoints."""
+        x = max(self.x, other.x)
+        y = max(self.y, other.y)
+        right = min(self.x + self.width, other.x + other.width)
+        bottom = min(self.y + self.height, other.y + other.height)
+        if right <= x or bottom <= y:
+            return None
+        return Rectangle(x, y, right - x, bottom - y)
@@ -1,160 +1,431 @@
+import re
+import time
+
 from minitel.tui.core.constants import *
 from minitel.tui.core import Effect, Color, Mixel
+from minitel.Sequence import texte_vers_minitel
+from minitel.tui.core.config import SCREEN_WIDTH, SCREEN_HEIGHT
+from minitel.tui.ordering import RunOrdering
 
 import numpy as np
-from PIL import Image
-
-def compute_cost(mixels: list[Mixel]):
-    cost = np.ones((len(mixels), len(mixels)))
-    for i in range(cost.shape[0]):
-        m_i = mixels[i]
-        for j in range(cost.shape[1]):
-            m_j = mixels[j]
-            if i == j:
-                cost[i, j] = float('inf')
-            else:
-                cost[i,j] = cost_move(m_i, m_j) + cost_color(m_i, m_j) + cost_effect(m_i, m_j)
-    cost_norm = (cost - cost.min()) / (cost.max() - cost.min())
-    im = Image.fromarray(np.uint8(cost_norm*255))
-    im.save("./cost.png")
-    return cost
-
-def cost_move(a: Mixel, b: Mixel):
-    if a.x == b.x+1 and a.y == b.y:
-        return 1
-    return 3
-
-def cost_color(a: Mixel, b: Mixel):
-    cost = 0.
-    if a.bg_color != b.bg_color:
-        cost += 2
-    if a.fg_color != b.fg_color:
-        cost += 2
-    return cost
-
-def cost_effect(a: Mixel, b: Mixel):
-    cost = 0.
-    if a.effect != b.effect:
-        cost += len(a.effect.encode(current_effect=b.effect))
-    return cost
-
-def nearest_neighbor_tsp(cost_matrix, start: int = 0):
-    """
-    Algorithme du voisin le plus proche pour TSP.
-
-    :param cost_matrix: matrice carrée n x n des coûts entre chaque mixel
-    :param start: index du mixel de départ
-    :return: sequence des indices des mixels dans l'ordre du parcours
-    """
-    n = len(cost_matrix)
-    visited = set()
-    sequence = []
 
-    current = start
-    visited.add(current)
-    sequence.append(current)
+# REP (DC2) répète le dernier caractère affiché de 1 à 63 fois ; il n'est
+# plus court que l'émission directe qu'à partir de 4 caractères identiques
+REPEAT_MAX = 63
+REPEATED = re.compile(r'(.)\1{3,}', re.DOTALL)
 
-    while len(visited) < n:
-        # trouver le mixel non visité le plus proche
-        next_mixel = None
-        min_cost = float('inf')
-        for j in range(n):
-            if j not in visited and cost_matrix[current][j] < min_cost:
-                min_cost = cost_matrix[current][j]
-                next_mixel = j
+# Attributs du Minitel après US, RS ou FF :
+# (effet, encre, fond demandé, fond validé)
+DEFAULT_ATTRIBUTES = (Effect.NONE, Color.WHITE, Color.BLACK, Color.BLACK)
 
-        if next_mixel is None:
-            break  # sécurité, ne devrait pas arriver
-
-        visited.add(next_mixel)
-        sequence.append(next_mixel)
-        current = next_mixel
-
-    return sequence
+# Estimation initiale (secondes) du temps d'encodage d'un run, affinée par
+# les mesures : elle borne le temps réservé à la vérification d'un ordre
+RUN_TIME = 5e-5
 
 class MinitelEncoder:
-    def __init__(self):
-        self.current_effect = Effect.NONE
-        self.current_fg = Color.WHITE
-        self.current_bg = Color.BLACK
-        self.last_x = 1  # Position du curseur actuelle
-        self.last_y = 1
-
-    def encode(self, mixels):
+    """Encodeur de mixels en flux Videotex
+
+    L'encodeur modélise l'état du Minitel entre deux runs et d'une trame à
+    l'autre : position du curseur et attributs série. Seules les
+    transitions nécessaires sont émises :
+
+    - l'encre et les effets s'appliquent immédiatement et persistent sur
+      la rangée,
+    - le fond n'est validé que par un délimiteur (un espace) en mode
+      alphanumérique, immédiatement en mode semi-graphique,
+    - US, RS et FF réinitialisent tous les attributs ; en début de rangée
+      le fond retombe au noir et les autres attributs sont considérés
+      inconnus s'ils n'étaient pas ceux par défaut.
+
+    Un ordre des runs proposé par RunOrdering est vérifié : les runs sont
+    encodés dans cet ordre et dans l'ordre initial, le plus court est émis.
+    Une fois encode consommé, row_major_bytes et ordered_bytes donnent les
+    octets des runs dans l'ordre initial et dans l'ordre émis.
+    """
+    def __init__(self, relative_moves: bool = True, ordered: bool = True):
+        # (effet, encre, fond demandé, fond validé), None si inconnus
+        self.attributes = None
+        # Position du curseur du Minitel, None tant qu'elle est inconnue
+        self.last_x = None
+        self.last_y = None
+        # Déplacements relatifs autorisés (sinon toujours US / RS)
+        self.relative_moves = relative_moves
+        # Contenu de l'écran, pour réémettre les cellules inchangées
+        self.screen = None
+        # Ordre d'émission des runs (None : rangée puis colonne) et vitesse
+        # de la ligne qui borne le temps de calcul de l'ordre
+        self.ordering = RunOrdering() if ordered else None
+        self.baudrate = 1200
+        self.run_time = RUN_TIME
+        self.row_major_bytes = 0
+        self.ordered_bytes = 0
+
+    def invalidate(self):
+        """Oublie la position du curseur et les attributs (octets émis hors
+        encodeur)."""
+        self.attributes = None
+        self.last_x = None
+        self.last_y = None
+
+    def encode(self, mixels, priority_rows=None, screen=None):
+        """Encode les mixels par runs consécutifs.
+
+        Les mixels des rangées priority_rows (sélection, curseur) sont émis
+        en premier pour que le retour visuel d'une touche ne soit pas
+        retardé par le reste de la trame.
+
+        screen est le MinitelBuffer de l'écran une fois la trame affichée :
+        le planificateur de déplacements peut réécrire des cellules
+        inchangées plutôt que de positionner le curseur.
+        """
+        self.row_major_bytes = self.ordered_bytes = 0
         if not mixels:
-            return []
-
+            return
+        self.screen = screen
+
+        if priority_rows:
+            rows = set(priority_rows)
+            first = [m for m in mixels if m.y in rows]
+            rest = [m for m in mixels if m.y not in rows]
+            yield from self._encode_runs(first)
+            yield from self._encode_runs(rest)
+        else:
+            yield from self._encode_runs(mixels)
+
+    def _encode_runs(self, mixels):
+        """Regroupe les mixels d'une même rangée en runs, les ordonne (voir
+        RunOrdering) et les encode."""
+        runs = self._build_runs(mixels)
+        if self.ordering is not None and len(runs) > 2:
+            signature = None
+            if self.attributes is not None:
+                effect, fg, bg, _ = self.attributes
+                signature = (effect.value, fg.value, bg.value)
+            ordered = self.ordering.order(
+                runs, (self.last_x, self.last_y), signature, self.baudrate,
+                reserve=len(runs) * self.run_time,
+            )
+            if ordered is not runs:
+                yield from self._encode_shortest(runs, ordered)
+                return
+        for run in runs:
+            sequence = self._encode_run(run)
+            self.row_major_bytes += len(sequence)
+            self.ordered_bytes += len(sequence)
+            yield sequence
+
+    def _encode_shortest(self, runs, ordered):
+        """Séquences des runs dans l'ordre initial ou dans l'ordre proposé,
+        le plus court en octets émis.
+
+        Le modèle de coût de RunOrdering ignore les réécritures de cellules,
+        les délimiteurs et les REP : les deux ordres sont donc encodés à
+        partir du même état et mesurés.
+        """
+        start = time.perf_counter()
+        state = (self.attributes, self.last_x, self.last_y)
+        candidates = []
+        for order in (runs, ordered):
+            self.attributes, self.last_x, self.last_y = state
+            sequences = [self._encode_run(run) for run in order]
+            candidates.append((
+                sum(map(len, sequences)), sequences,
+                (self.attributes, self.last_x, self.last_y),
+            ))
+        elapsed = time.perf_counter() - start
+        self.run_time = (self.run_time + elapsed / (2 * len(runs))) / 2
+
+        # À égalité, l'ordre initial est gardé
+        length, sequences, state = min(candidates, key=lambda c: c[0])
+        self.attributes, self.last_x, self.last_y = state
+        self.row_major_bytes += candidates[0][0]
+        self.ordered_bytes += length
+        return sequences
+
+    def _build_runs(self, mixels):
+        """Runs de mixels, rangée puis colonne.
+
+        Deux mixels non adjacents restent dans le même run si réécrire les
+        cellules de l'écran qui les séparent (pont) coûte moins d'octets
+        que de déplacer le curseur (voir _bridge). L'état des attributs à
+        la fin du run en construction est suivi pour évaluer ce coût.
+        """
         # trier par ligne, puis par colonne
         mixels = sorted(mixels, key=lambda m: (m.y, m.x))
-        
-        run = []
-        last = None
 
+        runs = []
+        state = None
         for mixel in mixels:
-            if last and mixel.y == last.y and mixel.x == last.x + 1:
-                # caractère consécutif sur la même ligne -> on continue le run
-                run.append(mixel)
+            if runs and mixel.y == runs[-1][-1].y and mixel.x > runs[-1][-1].x:
+                run = runs[-1]
+                gap = self._bridge(run[-1], mixel, state)
+                if gap is not None:
+                    for cell in gap + [mixel]:
+                        _, state = self._transition(cell, state)
+                    run.extend(gap)
+                    run.append(mixel)
+                    continue
+            runs.append([mixel])
+            state = self._run_attributes(mixel)
+        return runs
+
+    def _run_attributes(self, first):
+        """Attributs du Minitel après l'écriture du premier mixel d'un run
+        positionné de façon absolue (l'ordre des runs n'est pas encore
+        connu)."""
+        cells = self._delimiter(first) + [first]
+        state = DEFAULT_ATTRIBUTES
+        for cell in cells:
+            _, state = self._transition(cell, state)
+        return state
+
+    def _bridge(self, previous, mixel, state):
+        """Cellules de l'écran à réécrire entre previous et mixel pour les
+        réunir dans un même run, None s'il est moins coûteux de déplacer le
+        curseur.
+
+        Le coût d'un pont est exact : caractères réécrits et changements
+        d'attributs nécessaires, y compris pour mixel lui-même. Un pont est
+        refusé si une cellule ne peut être affichée avec le fond validé.
+
+        :param state: attributs du Minitel après l'écriture de previous
+        """
+        if mixel.x == previous.x + 1:
+            return []
+        if self.screen is None or state is None:
+            return None
+
+        y = previous.y
+        _, _, jump = self._plan_move(
+            (previous.x + 1, y), state, mixel.x, y, mixel
+        )
+        budget = jump + len(texte_vers_minitel(mixel.character))
+        if mixel.x - previous.x > budget:
+            # Au moins un octet par cellule réécrite
+            return None
+
+        gap = [
+            self.screen.mixel(column, y) or Mixel(column, y, ' ')
+            for column in range(previous.x + 1, mixel.x)
+        ]
+        cost = 0
+        for cell in gap + [mixel]:
+            sequence, state = self._transition(cell, state)
+            if not self._displayed(cell, state):
+                return None
+            cost += len(sequence) + len(texte_vers_minitel(cell.character))
+            if cost > budget:
+                return None
+        return gap
+
+    def encode_erase(self, erase, blank, screen=None):
+        """Séquences d'effacement des cellules devenues vides.
+
+        Les rangées vides jusqu'au bas de l'écran sont effacées par CSI J,
+        les fins de rangée par CAN et les cellules isolées par un espace.
+        Un écran entièrement vide est effacé par FF.
+
+        :param erase: plan des cellules à effacer (non vides à l'écran,
+                      vides dans la nouvelle trame)
+        :param blank: plan des cellules vides de la nouvelle trame
+        :param screen: MinitelBuffer de l'écran avant effacement
+        :return: (séquences, cellules (x, y) à effacer par un espace)
+        """
+        sequences = []
+        spaces = []
+        if not erase.any():
+            return sequences, spaces
+
+        self.screen = screen
+        rows, cols = erase.shape
+        if blank.all():
+            sequences.append([FF])
+            # FF place le curseur en (1, 1) et réinitialise les attributs
+            self.last_x, self.last_y = 1, 1
+            self.attributes = DEFAULT_ATTRIBUTES
+            return sequences, spaces
+
+        erase = erase.copy()
+
+        # Rangées entièrement vides jusqu'au bas de l'écran
+        row_blank = blank.all(axis=1)
+        first = rows
+        while first > 0 and row_blank[first - 1]:
+            first -= 1
+        if first < rows and np.count_nonzero(erase[first:].any(axis=1)) >= 2:
+            sequences.append(self._encode_position(1, first + 1, reset=True) + CSI + [0x4a])
+            erase[first:] = False
+
+        # Dernière colonne non vide de chaque rangée (-1 si aucune)
+        filled = ~blank
+        last = np.where(
+            filled.any(axis=1),
+            cols - 1 - np.argmax(filled[:, ::-1], axis=1),
+            -1
+        )
+        for y in np.flatnonzero(erase.any(axis=1)):
+            y, end = int(y), int(last[y]) + 1
+            tail = np.flatnonzero(erase[y, end:])
+            if len(tail) > 1 or (len(tail) == 1 and tail[0] + end < cols - 1):
+                # CAN efface jusqu'à la fin de la rangée
+                sequences.append(
+                    self._encode_position(int(tail[0]) + end + 1, y + 1,
+                                          reset=True) + [CAN]
+                )
+                inner = np.flatnonzero(erase[y, :end])
             else:
-                # nouveau run
-                if run:
-                    yield self._encode_run(run)
-                run = [mixel]
-            last = mixel
-
-        if run:
-            yield self._encode_run(run)
+                inner = np.flatnonzero(erase[y])
+            spaces.extend((int(x) + 1, y + 1) for x in inner)
 
+        return sequences, spaces
 
     def _encode_run(self, run):
-        bytes_arr = []
         first: Mixel = run[0]
+        delimiter = self._delimiter(first)
+        if delimiter:
+            run = delimiter + run
+            first = delimiter[0]
 
         # position du curseur
-        pos = self._encode_position(first.x, first.y)
-        bytes_arr.extend(pos)
+        bytes_arr = self._encode_position(first.x, first.y, mixel=first)
 
-        # changement de couleurs si nécessaire
-        if first.bg_color != self.current_bg:  # arp
-            bytes_arr.extend(first.bg_color.encode(background=True))
-            self.current_bg = first.bg_color
+        # Les caractères sont convertis par blocs de mêmes attributs, en une
+        # seule passe via les tables de conversion de Sequence
+        state = self.attributes
+        text = []
+        for mixel in run:
+            sequence, state = self._transition(mixel, state)
+            if sequence:
+                bytes_arr.extend(self._encode_text(''.join(text)))
+                text = []
+                bytes_arr.extend(sequence)
+            text.append(mixel.character)
+        bytes_arr.extend(self._encode_text(''.join(text)))
+
+        self.attributes = state
+        self._advance(len(run))
+        return bytes_arr
 
-        if first.fg_color != self.current_fg:  # avp
-            bytes_arr.extend(first.fg_color.encode())
-            self.current_fg = first.fg_color
+    @staticmethod
+    def _encode_text(text):
+        """Convertit du texte de mêmes attributs ; les suites d'un même
+        caractère sont émises par REP quand c'est plus court."""
+        bytes_arr = bytearray()
+        start = 0
+        for match in REPEATED.finditer(text):
+            encoded = texte_vers_minitel(match.group(1))
+            if len(encoded) != 1:
+                # Caractère composé (SS2) : émis tel quel
+                continue
+            bytes_arr += texte_vers_minitel(text[start:match.start()])
+            bytes_arr += encoded
+            count = match.end() - match.start() - 1
+            while count > 0:
+                repeat = min(count, REPEAT_MAX)
+                if repeat < 3:
+                    bytes_arr += encoded * repeat
+                else:
+                    bytes_arr += bytes([REP, 0x40 + repeat])
+                count -= repeat
+            start = match.end()
+        bytes_arr += texte_vers_minitel(text[start:])
+        return bytes_arr
 
-        # changement d'effet si nécessaire
-        if first.effect != self.current_effect:
-            bytes_arr.extend(first.effect.encode(self.current_effect))
-            self.current_effect = first.effect
+    @staticmethod
+    def _transition(mixel, state):
+        """Octets amenant les attributs du Minitel de state à ceux de mixel.
 
-        for mixel in run:
-            # reset de l’effet si nécessaire avant d’écrire
-            if mixel.effect != self.current_effect:
-                bytes_arr.extend(mixel.effect.encode(self.current_effect))
-                self.current_effect = mixel.effect
-            bytes_arr.extend([ord(mixel.character)])
-
-        # --- Reset effect et couleur à la fin de la run ---
-        if self.current_effect != Effect.NONE:
-            bytes_arr.extend(Effect.NONE.encode(self.current_effect))
-            self.current_effect = Effect.NONE
-
-        if self.current_fg != Color.WHITE:
-            bytes_arr.extend(Color.WHITE.encode())
-            self.current_color = Color.WHITE
-        if self.current_bg != Color.BLACK:
-            bytes_arr.extend(Color.BLACK.encode(background=True))
-            self.current_color = Color.WHITE
+        Un caractère alphanumérique autre que l'espace est affiché avec le
+        fond validé : s'il diffère du fond voulu, seul un délimiteur
+        précédent (voir _delimiter) peut le corriger.
 
-        return bytes_arr
-    
-    def _encode_position(self, x, y, relatif = False):
+        :returns: (séquence, attributs après écriture du mixel)
+        """
+        effect, fg, bg, active = state
+        sequence = []
+        if mixel.effect != effect:
+            sequence.extend(mixel.effect.encode(effect))
+            effect = mixel.effect
+        if mixel.fg_color != fg:
+            sequence.extend(mixel.fg_color.encode())
+            fg = mixel.fg_color
+        if effect == Effect.SEMIGRAPHIQUE:
+            # En semi-graphique, le fond s'applique immédiatement
+            if mixel.bg_color != active:
+                sequence.extend(mixel.bg_color.encode(background=True))
+                bg = active = mixel.bg_color
+        elif mixel.character == ' ':
+            # L'espace est un délimiteur : il valide le fond demandé
+            if mixel.bg_color != bg:
+                sequence.extend(mixel.bg_color.encode(background=True))
+                bg = mixel.bg_color
+            active = bg
+        return sequence, (effect, fg, bg, active)
+
+    @staticmethod
+    def _displayed(mixel, state):
+        """Le mixel écrit avec les attributs state a-t-il le fond voulu ?"""
+        return (mixel.effect == Effect.SEMIGRAPHIQUE
+                or mixel.character == ' '
+                or state[3] == mixel.bg_color)
+
+    def _delimiter(self, first):
+        """Cellules de l'écran à réécrire avant first pour valider son fond :
+        de l'espace le plus proche à gauche jusqu'à first, toutes du même
+        fond. Liste vide si c'est inutile ou impossible."""
+        if (self.screen is None
+                or first.effect == Effect.SEMIGRAPHIQUE
+                or first.character == ' '
+                or first.bg_color == Color.BLACK):
+            return []
+        if (self.attributes is not None and self.last_y == first.y
+                and self.attributes[3] == first.bg_color):
+            return []
+        prefix = []
+        for column in range(first.x - 1, 0, -1):
+            cell = self.screen.mixel(column, first.y)
+            if (cell is None or cell.bg_color != first.bg_color
+                    or cell.effect == Effect.SEMIGRAPHIQUE):
+                return []
+            prefix.append(cell)
+            if cell.character == ' ':
+                return prefix[::-1]
+        return []
+
+    def _advance(self, count):
+        """Avance le curseur après l'écriture de count caractères : après
+        la 40e colonne, le Minitel passe au début de la rangée suivante,
+        où le fond retombe au noir."""
+        x = self.last_x + count - 1
+        y = self.last_y + x // SCREEN_WIDTH
+        self.last_x = x % SCREEN_WIDTH + 1
+        self.last_y = (y - 1) % SCREEN_HEIGHT + 1
+        if x >= SCREEN_WIDTH:
+            effect, fg, _, _ = self.attributes
+            if effect == Effect.NONE and fg == Color.WHITE:
+                self.attributes = DEFAULT_ATTRIBUTES
+            else:
+                self.attributes = None
+
+    def _encode_position(self, x, y, relatif = False, mixel = None,
+                         reset = False):
         """Définit la position du curseur du Minitel
 
         Note:
-        Cette méthode optimise le déplacement du curseur, il est donc important
-        de se poser la question sur le mode de positionnement (relatif vs
-        absolu) car le nombre de caractères générés peut aller de 1 à 5.
+        Connaissant la position actuelle du curseur, cette méthode retient
+        le déplacement le moins coûteux en octets parmi :
+
+        - RS (1 octet) ou US y x (3 octets), positionnements absolus,
+        - RS suivi d'un déplacement relatif depuis la position (1, 1),
+        - LF / VT ou CSI n B / CSI n A pour changer de rangée, puis CR, BS,
+          TAB ou CSI n C / CSI n D pour changer de colonne,
+        - la réécriture des caractères inchangés situés entre le curseur et
+          la destination.
+
+        US et RS réinitialisent les attributs, pas les déplacements
+        relatifs : le coût des attributs du premier mixel écrit est ajouté
+        à celui de chaque déplacement. Un changement de rangée relatif n'est
+        envisagé qu'avec les attributs par défaut.
 
         Sur le Minitel, la première colonne a la valeur 1. La première ligne
         a également la valeur 1 bien que la ligne 0 existe. Cette dernière
@@ -177,24 +448,121 @@ class MinitelEncoder:
             elles sont absolues (False, valeur par défaut)
         :type relatif:
             un booléen
+
+        :param mixel:
+            premier mixel écrit après le déplacement
+        :type mixel:
+            un Mixel ou None
+
+        :param reset:
+            exige les attributs par défaut après le déplacement (avant un
+            effacement)
+        :type reset:
+            un booléen
         """
-        if not relatif:
-            # Déplacement absolu
-            if x == 1 and y == 1:
-                return [RS]
-            else:
-                return [US, 0x40 + y, 0x40 + x]
-            # # Déplacement absolu
-            # if x == 1 and y == 1:
-            #     # Length = 3
-            #     return [HOME]
-            # else:
-            #     # Length = 6 too much
-            #     seq = [CSI]
-            #     seq += [ord(c) for c in f"{y};{x}H"]
-            #     return seq
+        if relatif:
+            assert self.last_x is not None, "position du curseur inconnue"
+            x, y = self.last_x + x, self.last_y + y
+
+        move, self.attributes, _ = self._plan_move(
+            (self.last_x, self.last_y), self.attributes, x, y, mixel, reset
+        )
+        self.last_x, self.last_y = x, y
+        return move
+
+    def _plan_move(self, cursor, attributes, x, y, mixel = None,
+                   reset = False):
+        """Déplacement le moins coûteux du curseur vers (x, y), sans
+        modifier l'état de l'encodeur (voir _encode_position).
+
+        :param cursor: position (x, y) du curseur, (None, None) si inconnue
+        :param attributes: attributs du Minitel, None s'ils sont inconnus
+        :returns: (séquence, attributs après le déplacement, coût en octets
+                  du déplacement et des attributs de mixel)
+        """
+        def cost(move, state):
+            if mixel is None:
+                return len(move)
+            return len(move) + len(self._transition(mixel, state)[0])
+
+        if x == 1 and y == 1:
+            absolute = [RS]
         else:
-            if x == -1:
-                return [BS]
-            if y == 1:
-                return [LF] 
+            absolute = [US, 0x40 + y, 0x40 + x]
+        best, best_state = absolute, DEFAULT_ATTRIBUTES
+        best_cost = cost(absolute, DEFAULT_ATTRIBUTES)
+
+        if self.relative_moves:
+            last_x, last_y = cursor
+            state = attributes
+            if (state is not None and last_x is not None
+                    and (state == DEFAULT_ATTRIBUTES or y == last_y)):
+                move, state = self._relative_move(
+                    last_x, last_y, x, y, state, best_cost
+                )
+                if (cost(move, state) < best_cost
+                        and (not reset or state == DEFAULT_ATTRIBUTES)):
+                    best, best_state = move, state
+                    best_cost = cost(move, state)
+            if len(absolute) > 2:
+                move, state = self._relative_move(
+                    1, 1, x, y, DEFAULT_ATTRIBUTES, len(absolute) - 1
+                )
+                if cost([RS] + move, state) < best_cost:
+                    best, best_state = [RS] + move, state
+                    best_cost = cost(best, state)
+
+        return best, best_state, best_cost
+
+    def _relative_move(self, from_x, from_y, x, y, state, budget):
+        """Déplacement relatif le plus court de (from_x, from_y) à (x, y).
+
+        La réécriture des cellules intermédiaires n'est envisagée que si
+        elle tient dans budget octets.
+
+        :returns: (séquence, attributs après le déplacement)
+        """
+        vertical = self._repeat(y - from_y, LF, VT, 0x42, 0x41)
+        candidates = [
+            (self._repeat(x - from_x, TAB, BS, 0x43, 0x44), state)
+        ]
+        if x != from_x:
+            candidates.append(
+                ([CR] + self._repeat(x - 1, TAB, BS, 0x43, 0x44), state)
+            )
+        if from_x < x and x - from_x < budget - len(vertical):
+            replay = self._replay(from_x, x, y, state)
+            if replay is not None:
+                candidates.append(replay)
+        move, state = min(candidates, key=lambda c: len(c[0]))
+        return vertical + move, state
+
+    @staticmethod
+    def _repeat(delta, forward, backward, csi_forward, csi_backward):
+        """Répétition d'un code de déplacement ou séquence CSI équivalente"""
+        if delta == 0:
+            return []
+        count = abs(delta)
+        code, final = (forward, csi_forward) if delta > 0 else (backward, csi_backward)
+        if count <= 3:
+            return [code] * count
+        return CSI + [ord(c) for c in str(count)] + [final]
+
+    def _replay(self, from_x, x, y, state):
+        """Réécriture des cellules from_x à x - 1 de la rangée y, None si
+        l'une d'elles exige un changement d'attributs ou ne peut être
+        affichée avec le fond validé.
+
+        :returns: (séquence, attributs après la réécriture) ou None
+        """
+        screen = self.screen
+        if screen is None:
+            return None
+        text = []
+        for column in range(from_x, x):
+            cell = screen.mixel(column, y) or Mixel(column, y, ' ')
+            sequence, state = self._transition(cell, state)
+            if sequence or not self._displayed(cell, state):
+                return None
+            text.append(cell.character)
+        return texte_vers_minitel(''.join(text)), state
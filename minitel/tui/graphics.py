@@ -1,91 +1,160 @@
 # from .widget.widget import Widget
+import numpy as np
+
 from minitel.constantes import ESC, SI
 from .buffer import MinitelBuffer
 from .encoder import MinitelEncoder
+from .core import Mixel
 from .core.config import SCREEN_WIDTH, SCREEN_HEIGHT
+from .context import current_session
 
 
 class Graphics:
+    """Gestion de l'affichage d'un terminal
+
+    Les méthodes de classe s'adressent à l'instance de la session active
+    (voir minitel.tui.session) ou, à défaut, à l'instance globale créée par
+    Graphics.init().
+    """
     _instance = None
 
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-        
     def __init__(self, minitel, 
                  width: int = SCREEN_WIDTH,
                  height: int = SCREEN_HEIGHT,
-                 buffer: MinitelBuffer = MinitelBuffer(), 
-                 encoder: MinitelEncoder = MinitelEncoder()):
-        if getattr(self, "_initialized", False):
-            return
-        self._initialized = True
-
+                 buffer: MinitelBuffer | None = None, 
+                 encoder: MinitelEncoder | None = None,
+                 blocking: bool = True):
         # self.widgets: dict[str, Widget] = {}
-        self.buffer = buffer
+        # front : contenu de l'écran du Minitel, back : trame en composition
+        self.front = buffer if buffer is not None else MinitelBuffer(width, height)
+        self.back = MinitelBuffer(width, height)
+        self.buffer = self.front
         self.minitel = minitel
-        self.encoder = encoder
+        self.encoder = encoder if encoder is not None else MinitelEncoder()
         self.width = width
         self.height = height
+        # Attendre l'émission de chaque trame (un seul terminal) ou laisser
+        # le thread d'émission travailler en tâche de fond (plusieurs
+        # terminaux multiplexés)
+        self.blocking = blocking
         self.active_key: str | None = None
         self._last_cursor_pos: tuple[int, int] | None = [0,0]
+        self.last_frame: dict = {}
+        self.frame_bytes: int = 0
 
     @classmethod
     def init(cls, minitel):
-        """Initialisation singleton"""
-        return cls(minitel)
-    
+        """Initialisation de l'instance globale"""
+        cls._instance = cls(minitel)
+        return cls._instance
+
     @classmethod
-    def update(cls, mixels, cursor_pos = None):
+    def _get(cls) -> 'Graphics':
+        session = current_session()
+        if session is not None:
+            return session.graphics
         if cls._instance is None:
             raise RuntimeError("Graphics.init() must be called first")
-        return cls._instance._update_instance(mixels, cursor_pos)
+        return cls._instance
+
+    @classmethod
+    def update(cls, mixels, cursor_pos = None, priority_rows = None,
+               regions = None):
+        """Affiche une trame.
+
+        Sans regions, mixels est le contenu complet de l'écran. Avec une
+        liste de Rectangle, seules ces zones sont recomposées à partir de
+        mixels ; le reste de l'écran est conservé.
+        """
+        return cls._get()._update_instance(mixels, cursor_pos, priority_rows,
+                                           regions)
+
+    @classmethod
+    def line_delay(cls) -> float:
+        """Temps (en secondes) nécessaire à la ligne pour émettre les octets
+        déjà confiés au Minitel (7E1 : 10 bits par caractère)."""
+        minitel = cls._get().minitel
+        return minitel.octets_en_attente * 10 / minitel.vitesse
 
-    def _update_instance(cls, mixels: list, cursor_pos: tuple[int, int] = None) -> None:
+    def _update_instance(cls, mixels: list, cursor_pos: tuple[int, int] = None,
+                         priority_rows: list[int] | None = None,
+                         regions: list | None = None) -> None:
         # Clipped in range
         clipped = [
             m for m in mixels
             if 1 <= m.x <= cls.width and 1 <= m.y <= cls.height
         ]
 
-        # 2. Calcul les changements
-        buffer = cls.buffer.apply(clipped)
+        # 2. Composition de la trame dans le back buffer : complète, ou
+        # seulement dans les zones à redessiner
+        if regions is None:
+            cls.back.clear()
+        else:
+            cls.back.copy_from(cls.front)
+            for rect in regions:
+                cls.back.clear_region(rect.x, rect.y, rect.width, rect.height)
+        cls.back.apply(clipped)
 
-        # 3. Encodage
-        for payload in cls.encoder.encode(buffer):
+        # 3. Différences avec l'écran : cellules à écrire et à effacer
+        changed = cls.front.diff_mask(cls.back)
+        blank = cls.back.blank_mask()
+        erasures, spaces = cls.encoder.encode_erase(
+            changed & blank, blank, cls.front
+        )
+        ys, xs = np.nonzero(changed & ~blank)
+        writes = [
+            cls.back.mixel(x + 1, y + 1)
+            for y, x in zip(ys.tolist(), xs.tolist())
+        ]
+        writes.extend(Mixel(x, y, ' ') for x, y in spaces)
+        cls.front.copy_from(cls.back)
+
+        # 4. Encodage, les runs sont regroupés en paquets par le Minitel
+        cls.frame_bytes = 0
+        cls.encoder.baudrate = cls.minitel.vitesse
+        for payload in erasures:
             cls.minitel.send(payload)
-            cls.flush()
+            cls.frame_bytes += len(payload)
+        for payload in cls.encoder.encode(writes, priority_rows, cls.front):
+            cls.minitel.send(payload)
+            cls.frame_bytes += len(payload)
+        if cls.blocking:
+            cls.minitel.flush()
+            # 5. Statistiques d'émission (octets/s, écritures) de la trame
+            cls.last_frame = cls.minitel.nouvelle_trame()
     
     @classmethod
     def clear(cls, kind: str = 'tout'):
-        if cls._instance is None:
-            raise RuntimeError("Graphics.init() must be called first")
-        cls._instance.minitel.efface(kind)
+        instance = cls._get()
+        instance.minitel.efface(kind)
+        instance.encoder.invalidate()
+        if kind in ('tout', 'vraimenttout'):
+            instance.front.clear()
 
     @classmethod
     def direct_send(cls, sequence):
-        if cls._instance is None:
-            raise RuntimeError("Graphics.init() must be called first")
-        cls._instance.minitel.send(sequence)
+        instance = cls._get()
+        instance.minitel.send(sequence)
+        # Position du curseur inconnue de l'encodeur
+        instance.encoder.invalidate()
 
     @classmethod
     def clear_buffer(cls):
-        if cls._instance is None:
-            raise RuntimeError("Graphics.init() must be called first")
-        cls._instance.buffer.clear()
+        instance = cls._get()
+        instance.front.clear()
+        instance.back.clear()
 
     @classmethod
     def flush(cls):
-        if cls._instance is None:
-            raise RuntimeError("Graphics.init() must be called first")
-        cls._instance.minitel.flush()
+        instance = cls._get()
+        if instance.blocking:
+            instance.minitel.flush()
 
     @classmethod
     def reset_attributes(cls):
-        if cls._instance is None:
-            raise RuntimeError("Graphics.init() must be called first")
-        cls._instance.minitel.send([
+        instance = cls._get()
+        instance.encoder.invalidate()
+        instance.minitel.send([
             ESC, 0x59,   # underline off
             ESC, 0x49,   # blink off
             ESC, 0x5c,   # invert off
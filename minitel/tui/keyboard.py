@@ -1,7 +1,9 @@
+from collections import deque
 from enum import Enum, auto
 from queue import Empty
 
 from minitel.Sequence import Sequence
+from .context import current_session
 
 class Key(Enum):
     UP = auto()
@@ -24,42 +26,71 @@ KEY_MAP = {
 }
 
 class KeyboardController:
+    """Distribution des touches reçues d'un terminal aux listeners
+
+    Comme Graphics, les méthodes de classe s'adressent au contrôleur de la
+    session active ou, à défaut, à l'instance globale créée par init().
+    """
     _instance = None
 
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
     def __init__(self, minitel):
-        if getattr(self, '_initialized', False):
-            return
-        self._initialize = True
         self.minitel = minitel
         self.listeners = []
+        # Séquences reçues pendant wait() et pas encore distribuées
+        self._pending = deque()
 
     @classmethod
     def init(cls, minitel):
-        return cls(minitel)
-    
+        cls._instance = cls(minitel)
+        return cls._instance
+
     @classmethod
-    def register(cls, listener):
+    def _get(cls) -> 'KeyboardController':
+        session = current_session()
+        if session is not None:
+            return session.keyboard
         if cls._instance is None:
             raise RuntimeError("KeyboardController not initialized")
-        cls._instance._register(listener)
+        return cls._instance
 
     @classmethod
-    def poll(cls):
-        if cls._instance is None:
-            raise RuntimeError("KeyboardController not initialized")
+    def register(cls, listener):
+        cls._get()._register(listener)
+
+    @classmethod
+    def wait(cls, timeout: float) -> bool:
+        """Attend une touche pendant au plus timeout secondes sans la
+        distribuer. Retourne True si une touche est disponible."""
+        instance = cls._get()
+        if instance._pending:
+            return True
         try:
-            seq = cls._instance.minitel.recevoir_sequence(bloque=False)
+            seq = instance.minitel.recevoir_sequence(bloque=True, attente=timeout)
         except Empty:
-            return False, None # rien à traiter pour le moment
+            return False
+        instance._pending.append(seq)
+        return True
+
+    @classmethod
+    def pending(cls) -> bool:
+        """True si une touche attend d'être distribuée."""
+        instance = cls._get()
+        return bool(instance._pending) or not instance.minitel.entree.empty()
+
+    @classmethod
+    def poll(cls):
+        instance = cls._get()
+        if instance._pending:
+            seq = instance._pending.popleft()
+        else:
+            try:
+                seq = instance.minitel.recevoir_sequence(bloque=False)
+            except Empty:
+                return False, None # rien à traiter pour le moment
 
-        key = cls._instance._interpet(seq)
+        key = instance._interpet(seq)
         changed = False
-        for listener in cls._instance.listeners:
+        for listener in instance.listeners:
             if listener.handle_key(key):
                 changed = True
         return changed, key
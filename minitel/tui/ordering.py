@@ -0,0 +1,372 @@
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from minitel.Transport import duree_transmission
+from minitel.tui.core import Color, Effect
+from minitel.tui.core.config import SCREEN_WIDTH
+
+# Longueur d'un positionnement absolu (US y x) et de RS
+ABSOLUTE = 3
+HOME = 1
+
+# Longueur minimale d'un déplacement CSI n A/B/C/D
+CSI_MOVE = 4
+
+# Signature d'attributs (effet, encre, fond) après US, RS ou FF
+DEFAULT_SIGNATURE = (Effect.NONE.value, Color.WHITE.value, Color.BLACK.value)
+
+# Octets pour activer ou désactiver un effet, indexés par Effect.value + 1
+# (NONE, UNDERLINE, BLINK, INVERT, SEMIGRAPHIQUE)
+EFFECT_SWITCH = np.array([0, 2, 2, 2, 1])
+_EFFECT_SWITCH = EFFECT_SWITCH.tolist()
+
+# Estimations initiales (secondes) du temps de calcul des passes fixes
+# (tableaux, coûts de transition, ordre initial et regroupement) et d'une
+# étape du parcours du plus proche voisin, affinées ensuite par les mesures
+FIXED_TIME = 5e-4
+STEP_TIME = 1e-5
+
+# Au-delà de ce nombre de runs, la matrice des coûts de transition n'est
+# pas calculée d'avance : le parcours calcule une ligne à chaque étape
+MATRIX_RUNS = 256
+
+
+def transition_costs(from_x, from_y, from_sig, to_x, to_y, to_sig):
+    """Coût estimé (octets) pour passer de la fin d'un run au début d'un
+    autre : déplacement du curseur puis changement d'attributs.
+
+    Les paramètres sont des tableaux NumPy diffusables entre eux ; les
+    signatures sont des tuples (effet, encre, fond) de tableaux. Le modèle
+    reprend celui de MinitelEncoder : un changement de rangée relatif
+    n'est possible qu'avec les attributs par défaut, un positionnement
+    absolu réinitialise les attributs.
+    """
+    dx = to_x - from_x
+    dy = to_y - from_y
+    horizontal = np.minimum(np.abs(dx), CSI_MOVE)
+    horizontal = np.where(
+        dx == 0, 0, np.minimum(horizontal, 1 + np.minimum(to_x - 1, CSI_MOVE))
+    )
+    vertical = np.minimum(np.abs(dy), CSI_MOVE)
+
+    effect, fg, bg = from_sig
+    default = (
+        (effect == DEFAULT_SIGNATURE[0])
+        & (fg == DEFAULT_SIGNATURE[1])
+        & (bg == DEFAULT_SIGNATURE[2])
+    )
+    relative = np.where(
+        dy == 0, horizontal,
+        np.where(default, vertical + horizontal, np.iinfo(np.int32).max // 2)
+    )
+    absolute = np.where((to_x == 1) & (to_y == 1), HOME, ABSOLUTE)
+
+    return np.minimum(
+        relative + attribute_costs(from_sig, to_sig),
+        absolute + attribute_costs(DEFAULT_SIGNATURE, to_sig),
+    )
+
+
+def transition_cost(from_x, from_y, from_sig, to_x, to_y, to_sig) -> int:
+    """Version scalaire de transition_costs (entiers et tuples), pour les
+    estimations faites sans NumPy"""
+    absolute = (HOME if to_x == 1 and to_y == 1 else ABSOLUTE) \
+        + attribute_cost(DEFAULT_SIGNATURE, to_sig)
+    dx = to_x - from_x
+    dy = to_y - from_y
+    horizontal = 0 if dx == 0 else \
+        min(abs(dx), CSI_MOVE, 1 + min(to_x - 1, CSI_MOVE))
+    if dy == 0:
+        relative = horizontal
+    elif from_sig == DEFAULT_SIGNATURE:
+        relative = min(abs(dy), CSI_MOVE) + horizontal
+    else:
+        return absolute
+    return min(absolute, relative + attribute_cost(from_sig, to_sig))
+
+
+@lru_cache(maxsize=4096)
+def attribute_cost(from_sig, to_sig) -> int:
+    """Octets de changement d'attributs entre deux signatures (entiers)"""
+    cost = 0
+    if from_sig[0] != to_sig[0]:
+        cost += _EFFECT_SWITCH[from_sig[0] + 1] + _EFFECT_SWITCH[to_sig[0] + 1]
+    if from_sig[1] != to_sig[1]:
+        cost += 2
+    if from_sig[2] != to_sig[2]:
+        cost += 2
+    return cost
+
+
+def attribute_costs(from_sig, to_sig):
+    """Octets de changement d'attributs entre deux signatures"""
+    from_effect, from_fg, from_bg = from_sig
+    to_effect, to_fg, to_bg = to_sig
+    effect = np.where(
+        np.not_equal(from_effect, to_effect),
+        EFFECT_SWITCH[np.add(from_effect, 1)] + EFFECT_SWITCH[np.add(to_effect, 1)],
+        0,
+    )
+    return effect + 2 * np.not_equal(from_fg, to_fg) + 2 * np.not_equal(from_bg, to_bg)
+
+
+class RunOrdering:
+    """Ordre d'émission des runs d'une trame
+
+    Les runs sont décrits par leurs extrémités : position et signature
+    d'attributs du premier mixel, position du curseur et signature après
+    le dernier. Les coûts de transition sont calculés par NumPy, d'avance
+    pour tous les couples de runs (ou, au-delà de MATRIX_RUNS runs, pour
+    tous les runs restants à chaque étape d'un parcours du plus proche
+    voisin partant de la position du curseur).
+
+    Trois ordres sont comparés : l'ordre initial (rangée puis colonne), le
+    regroupement par rangée puis signature d'attributs, et le parcours du
+    plus proche voisin. Le moins coûteux en octets est retenu.
+
+    Le gain possible est majoré sans NumPy : coût de l'ordre initial moins
+    un minorant du coût de tout ordre (chaque run est atteint depuis le
+    meilleur prédécesseur possible, compte tenu de sa position). Le temps
+    de calcul est borné par le temps d'émission de ce gain, à la vitesse
+    de la ligne, passes fixes comprises : si le budget ne couvre
+    pas le coût estimé des passes fixes, l'ordre initial est gardé ; le
+    parcours du plus proche voisin n'est lancé que si le budget restant
+    couvre son coût estimé, et s'arrête s'il est épuisé (les runs restants
+    gardent alors leur ordre initial). Le temps réservé par l'appelant
+    (vérification de l'ordre par l'encodeur) est déduit du budget.
+
+    Après chaque appel à order, estimated_row_major et estimated_ordered
+    donnent les octets de transition des deux ordres selon le modèle de
+    coût (None si l'ordre initial a été gardé sans calcul) et cpu le temps
+    de calcul. Les octets réellement émis sont mesurés par MinitelEncoder.
+    """
+    def __init__(self, ratio: float = 1.0):
+        # Fraction du gain possible en temps d'émission accordée au calcul
+        self.ratio = ratio
+        self.estimated_row_major = None
+        self.estimated_ordered = None
+        self.cpu = 0.0
+        # Temps mesurés des passes fixes et d'une étape du parcours
+        self.fixed_time = FIXED_TIME
+        self.step_time = STEP_TIME
+
+    def order(self, runs: list, cursor=(None, None), signature=None,
+              baudrate: int = 1200, reserve: float = 0.0) -> list:
+        """Ordonne des runs (listes de Mixel adjacents sur une rangée).
+
+        :param cursor: position (x, y) du curseur, (None, None) si inconnue
+        :param signature: (effet, encre, fond) du Minitel en Effect.value
+                          et Color.value, None si inconnue
+        :param baudrate: vitesse de la ligne en bits par seconde
+        :param reserve: temps de calcul (secondes) dont l'appelant a besoin
+                        si l'ordre change, déduit du budget
+        :returns: les runs dans l'ordre d'émission
+        """
+        start = time.perf_counter()
+        count = len(runs)
+        firsts = [run[0] for run in runs]
+        lasts = [run[-1] for run in runs]
+        start_sigs = [
+            (m.effect._value_, m.fg_color._value_, m.bg_color._value_)
+            for m in firsts
+        ]
+        end_sigs = [
+            (m.effect._value_, m.fg_color._value_, m.bg_color._value_)
+            for m in lasts
+        ]
+
+        # Position du curseur après le dernier mixel (passage à la rangée
+        # suivante après la dernière colonne)
+        starts = [(m.x, m.y) for m in firsts]
+        ends = [
+            (m.x + 1, m.y) if m.x < SCREEN_WIDTH else (1, m.y + 1)
+            for m in lasts
+        ]
+
+        gain = self._estimated_gain(starts, start_sigs, ends, end_sigs,
+                                    cursor, signature)
+        budget = self.ratio * duree_transmission(gain, baudrate) - reserve
+        if gain <= 0 or budget < self.fixed_time:
+            self.estimated_row_major = self.estimated_ordered = None
+            self.cpu = time.perf_counter() - start
+            return runs
+
+        start_x, start_y = (np.array(plane) for plane in zip(*starts))
+        start_sig = tuple(np.array(plane) for plane in zip(*start_sigs))
+        end_x, end_y = (np.array(plane) for plane in zip(*ends))
+        end_sig = tuple(np.array(plane) for plane in zip(*end_sigs))
+
+        first_cost = self._from_cursor(cursor, signature,
+                                       start_x, start_y, start_sig)
+        if count <= MATRIX_RUNS:
+            # Coûts de toutes les transitions (fin de i vers début de j)
+            matrix = transition_costs(
+                end_x[:, None], end_y[:, None],
+                tuple(p[:, None] for p in end_sig),
+                start_x, start_y, start_sig,
+            )
+
+            def costs_from(current):
+                return matrix[current]
+
+            def sequence_cost(sequence):
+                """Octets de transition d'un ordre (tableau d'indices)"""
+                return int(first_cost[sequence[0]]) \
+                    + int(matrix[sequence[:-1], sequence[1:]].sum())
+        else:
+            def costs_from(current):
+                return transition_costs(
+                    end_x[current], end_y[current],
+                    tuple(p[current] for p in end_sig),
+                    start_x, start_y, start_sig,
+                )
+
+            def sequence_cost(sequence):
+                """Octets de transition d'un ordre (tableau d'indices)"""
+                head, tail = sequence[:-1], sequence[1:]
+                return int(first_cost[sequence[0]]) + int(transition_costs(
+                    end_x[head], end_y[head], tuple(p[head] for p in end_sig),
+                    start_x[tail], start_y[tail],
+                    tuple(p[tail] for p in start_sig),
+                ).sum())
+
+        # Ordre initial, puis regroupement par rangée et signature
+        initial = np.arange(count)
+        self.estimated_row_major = sequence_cost(initial)
+        grouped = np.lexsort((start_x,) + start_sig[::-1] + (start_y,))
+        best, best_cost = initial, self.estimated_row_major
+        grouped_cost = sequence_cost(grouped)
+        if grouped_cost < best_cost:
+            best, best_cost = grouped, grouped_cost
+        fixed = time.perf_counter() - start
+        self.fixed_time = (self.fixed_time + fixed) / 2
+
+        # Parcours du plus proche voisin, si le budget restant (passes
+        # fixes déduites) couvre son coût estimé
+        if budget - fixed >= count * self.step_time:
+            walk = time.perf_counter()
+            remaining = np.ones(count, dtype=bool)
+            costs = first_cost
+            sequence = []
+            while len(sequence) < count:
+                if time.perf_counter() - start > budget:
+                    break
+                masked = np.where(remaining, costs, np.iinfo(np.int64).max)
+                current = int(np.argmin(masked))
+                sequence.append(current)
+                remaining[current] = False
+                costs = costs_from(current)
+            if sequence:
+                step = (time.perf_counter() - walk) / len(sequence)
+                self.step_time = (self.step_time + step) / 2
+            # Budget épuisé : les runs restants gardent l'ordre initial
+            sequence.extend(np.flatnonzero(remaining).tolist())
+            sequence = np.array(sequence)
+            nearest_cost = sequence_cost(sequence)
+            if nearest_cost < best_cost:
+                best, best_cost = sequence, nearest_cost
+
+        self.estimated_ordered = best_cost
+        self.cpu = time.perf_counter() - start
+        if best is initial:
+            return runs
+        return [runs[i] for i in best.tolist()]
+
+    @staticmethod
+    def _estimated_gain(starts, start_sigs, ends, end_sigs,
+                        cursor, signature) -> int:
+        """Estimation (octets) du gain possible en réordonnant les runs.
+
+        Coût de l'ordre initial moins un minorant du coût de tout ordre :
+        chaque run est atteint soit par un positionnement absolu, soit
+        depuis la fin d'un autre run (au même endroit, sur la même rangée,
+        ou sur une autre rangée avec les attributs par défaut, en changeant
+        aussi de colonne si aucune fin n'est alignée), soit depuis le
+        curseur. Le premier run émis d'une rangée y est amené depuis
+        l'extérieur de la rangée : le plus petit surcoût de cette entrée
+        est ajouté pour chaque rangée, le curseur ne servant d'entrée qu'à
+        une seule d'entre elles.
+        """
+        known = cursor[0] is not None and signature is not None
+        if known:
+            cursor = tuple(cursor)
+            signature = tuple(signature)
+            baseline = transition_cost(*cursor, signature,
+                                       *starts[0], start_sigs[0])
+        else:
+            baseline = (HOME if starts[0] == (1, 1) else ABSOLUTE) \
+                + attribute_cost(DEFAULT_SIGNATURE, start_sigs[0])
+        baseline += sum(
+            transition_cost(*ends[i], end_sigs[i],
+                            *starts[i + 1], start_sigs[i + 1])
+            for i in range(len(starts) - 1)
+        )
+        if baseline == 0:
+            return 0
+
+        by_row = {}
+        # Runs finissant avec les attributs par défaut, par colonne
+        by_column = {}
+        defaults = 0
+        for i, (end, sig) in enumerate(zip(ends, end_sigs)):
+            by_row.setdefault(end[1], []).append(i)
+            if sig == DEFAULT_SIGNATURE:
+                by_column.setdefault(end[0], []).append(i)
+                defaults += 1
+
+        bound = 0
+        # Surcoût minimal, par rangée, d'une entrée depuis l'extérieur (sans
+        # puis avec le curseur)
+        entry = {}
+        entry_cursor = {}
+        for j, (start, sig) in enumerate(zip(starts, start_sigs)):
+            row = start[1]
+            outside = (HOME if start == (1, 1) else ABSOLUTE) \
+                + attribute_cost(DEFAULT_SIGNATURE, sig)
+            # Depuis le curseur (minorant : déplacement nul ou d'un octet)
+            from_cursor = outside
+            if known:
+                from_cursor = (cursor != start) \
+                    + attribute_cost(signature, sig)
+            # Depuis une autre rangée : attributs par défaut obligatoires
+            if defaults - (end_sigs[j] == DEFAULT_SIGNATURE) > 0:
+                aligned = any(
+                    i != j and ends[i][1] != row
+                    for i in by_column.get(start[0], ())
+                )
+                outside = min(outside, 2 - aligned
+                              + attribute_cost(DEFAULT_SIGNATURE, sig))
+            # Depuis la même rangée : déplacement nul ou d'au moins un
+            # octet ; un run d'une autre rangée peut y finir (retour à la
+            # ligne après la dernière colonne)
+            best = min(outside, from_cursor)
+            for i in by_row.get(row, ()):
+                if i != j:
+                    cost = (ends[i] != start) + (
+                        0 if end_sigs[i] == sig
+                        else attribute_cost(end_sigs[i], sig)
+                    )
+                    if cost < best:
+                        best = cost
+                    if cost < outside and starts[i][1] != row:
+                        outside = cost
+            bound += best
+            extra = outside - best
+            entry[row] = min(entry.get(row, extra), extra)
+            extra = min(outside, from_cursor) - best
+            entry_cursor[row] = min(entry_cursor.get(row, extra), extra)
+        bound += sum(entry.values()) \
+            - max(entry[row] - entry_cursor[row] for row in entry)
+        return baseline - bound
+
+    @staticmethod
+    def _from_cursor(cursor, signature, start_x, start_y, start_sig):
+        """Coûts depuis la position du curseur en début de trame"""
+        x, y = cursor
+        if x is None or signature is None:
+            # Position inconnue : positionnement absolu
+            return np.where((start_x == 1) & (start_y == 1), HOME, ABSOLUTE) \
+                + attribute_costs(DEFAULT_SIGNATURE, start_sig)
+        return transition_costs(x, y, signature, start_x, start_y, start_sig)
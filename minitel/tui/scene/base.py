@@ -4,6 +4,10 @@ from minitel.tui.scene.manager import SceneManager
 class SceneBase:
     def __init__(self):
         self.windows: dict = {}
+        # Une trame reste à émettre (voir SceneManager.step)
+        self.needs_render: bool = False
+        # Le prochain rendu redessine toutes les fenêtres
+        self.full_render: bool = True
 
     def __setitem__(self, key, window):
         if 1 <= window.x <= self.width  and 1 <= window.y <= self.height:
@@ -34,13 +38,56 @@ class SceneBase:
         return False
     
     def update(self):
-        if SceneManager._scene != self:
+        if SceneManager.current() is not self:
             return None
 
+    def invalidate(self):
+        """Demande un rendu complet (écran effacé, retour sur la scène)."""
+        self.full_render = True
+        self.needs_render = True
+
     def render(self):
-        if SceneManager._scene != self:
+        """Affiche les fenêtres.
+
+        Le premier rendu, ou celui qui suit invalidate, compose tout
+        l'écran. Les suivants ne recomposent que les zones déclarées par
+        les fenêtres (Window.invalidate) : seules les fenêtres qui les
+        recouvrent sont redessinées, les autres ne coûtent rien.
+        """
+        if SceneManager.current() is not self:
+            return
+        priority = self.focus_rows()
+        if self.full_render:
+            self.full_render = False
+            mixels = []
+            for window in self.windows.values():
+                window.take_damage()
+                mixels.extend(window.render())
+            Graphics.update(mixels, priority_rows=priority)
             return
-        mixels = [window.render() for window in self.windows.values()]
-        Graphics.update(mixels)
+
+        regions = []
+        for window in self.windows.values():
+            regions.extend(window.take_damage())
+        if not regions:
+            return
+        mixels = []
+        for window in self.windows.values():
+            rects = [
+                rect for rect in
+                (region.intersection(window.rect) for region in regions)
+                if rect is not None
+            ]
+            if rects:
+                mixels.extend(window.render_region(rects))
+        Graphics.update(mixels, priority_rows=priority, regions=regions)
+
+    def focus_rows(self) -> list[int]:
+        """Rangées de la sélection des fenêtres, à émettre en priorité."""
+        rows = []
+        for window in self.windows.values():
+            if hasattr(window, "focus_rows"):
+                rows.extend(window.focus_rows())
+        return rows
     
             
\ No newline at end of file
@@ -1,56 +1,143 @@
-import time
-
 from minitel.tui.graphics import Graphics
+from minitel.tui.keyboard import KeyboardController
+from minitel.tui.context import current_session
+
+# Émission en attente (en secondes) au-delà de laquelle une nouvelle trame
+# est différée : les touches reçues entre-temps sont fusionnées en une trame
+FRAME_LATENCY = 0.05
+
+# Attentes de la boucle run : ligne occupée / scène à jour
+MIN_WAIT = 0.005
+IDLE_WAIT = 0.1
 
 
 class SceneManager:
+    """Pile de scènes d'un terminal
+
+    La scène courante et la pile sont celles de la session active (voir
+    minitel.tui.session) ou, à défaut, les attributs de classe _scene et
+    _stack quand un seul terminal est piloté.
+    """
     _scene = None
     _stack = []
 
     def __init__(self):
         pass
-    
+
+    @classmethod
+    def current(cls):
+        """Scène courante de la session active."""
+        session = current_session()
+        if session is not None:
+            return session.scene
+        return cls._scene
+
+    @classmethod
+    def _set_current(cls, scene):
+        session = current_session()
+        if session is not None:
+            session.scene = scene
+        else:
+            cls._scene = scene
+
+    @classmethod
+    def _current_stack(cls) -> list:
+        session = current_session()
+        if session is not None:
+            return session.stack
+        return cls._stack
+
     @classmethod
     def run(cls, scene):
-        cls._scene = scene
+        cls._set_current(scene)
+        # Le flux est régulé par step() : Graphics n'attend plus la fin de
+        # l'émission de chaque trame
+        Graphics._get().blocking = False
         # Rendu initial
-        cls._scene.render()
-        while cls._scene:
-            changed = cls._scene.update()
-            if changed:
-                cls._scene.render()
-                Graphics.flush()
-            time.sleep(0.01)
-    
+        scene.render()
+        while cls.current():
+            cls.step()
+            scene = cls.current()
+            if scene is None:
+                break
+            if scene.needs_render:
+                # Attend que la ligne se libère, ou une nouvelle touche
+                timeout = max(Graphics.line_delay() - FRAME_LATENCY, MIN_WAIT)
+            else:
+                timeout = IDLE_WAIT
+            KeyboardController.wait(timeout)
+
+    @classmethod
+    def step(cls) -> bool:
+        """Un tour de boucle : traite les touches en attente puis effectue
+        au plus un rendu.
+
+        Toutes les touches disponibles sont traitées avant le rendu : les
+        états intermédiaires ne sont jamais encodés. Le rendu est différé
+        tant que la ligne a plus de FRAME_LATENCY secondes d'émission en
+        attente, la scène restant marquée needs_render.
+
+        :returns: True si un rendu a été effectué
+        """
+        scene = cls.current()
+        if scene is None:
+            return False
+
+        changed = False
+        while True:
+            # update() retourne la touche traitée : une scène qui ne lit pas
+            # le clavier (SceneBase.update) ne doit pas boucler sur la file
+            if not scene.update():
+                break
+            changed = True
+            if cls.current() is not scene or not KeyboardController.pending():
+                break
+
+        scene = cls.current()
+        if scene is None:
+            return False
+        if changed:
+            scene.needs_render = True
+        if not scene.needs_render or Graphics.line_delay() > FRAME_LATENCY:
+            return False
+
+        scene.needs_render = False
+        scene.render()
+        Graphics.flush()
+        return True
+
     @classmethod
     def goto(cls, scene_class):
         """Direct transition to a new scene."""
-        cls._scene = scene_class()
+        cls._set_current(scene_class())
 
     @classmethod
     def call(cls, scene_class, *args, **kwargs):
         """Call a new scene and push the current scene onto the stack."""
-        if cls._scene:
-            cls._stack.append(cls._scene)
+        if cls.current():
+            cls._current_stack().append(cls.current())
         Graphics.flush()
         Graphics.clear()
         Graphics.clear_buffer()
-        cls._scene = scene_class(*args, **kwargs)
-        cls._scene.on_enter()
+        cls._set_current(scene_class(*args, **kwargs))
+        cls.current().on_enter()
 
     @classmethod
     def return_to_caller(cls):
         """Return to the previous scene by popping the stack."""
         try:
-            cls._scene.on_exit()
+            cls.current().on_exit()
         except AttributeError as ex:
             raise ex
-        
-        if cls._stack:
-            cls._scene = cls._stack.pop()
+
+        stack = cls._current_stack()
+        if stack:
+            cls._set_current(stack.pop())
             Graphics.flush()
             Graphics.clear()
             Graphics.clear_buffer()
-            cls._scene.on_resume()
+            cls.current().on_resume()
+            # L'écran a été effacé : la scène est entièrement redessinée
+            cls.current().invalidate()
         else:
-            cls._scene = None
\ No newline at end of file
+            cls._set_current(None)
@@ -0,0 +1,149 @@
+import time
+from contextlib import contextmanager
+
+from .context import _current_session
+from .graphics import Graphics
+from .keyboard import KeyboardController
+
+# Quantum d'octets attribué à chaque session à chaque tour du scheduler
+QUANTUM = 256
+
+# Durée maximale (en secondes) d'émission en attente sur la ligne d'une
+# session avant que le scheduler cesse de la faire travailler
+BACKLOG_SECONDS = 0.5
+
+# Pause du scheduler quand aucune session n'a eu de travail à faire
+IDLE_SLEEP = 0.01
+
+
+class Session:
+    """Un terminal piloté par le processus
+
+    Regroupe le Minitel, son Graphics (buffer et encodeur), son
+    KeyboardController et sa pile de scènes. Tant que la session est
+    activée (voir activate), les méthodes de classe de Graphics,
+    KeyboardController et SceneManager s'adressent à elle, ce qui permet aux
+    scènes existantes de fonctionner sans modification.
+    """
+
+    def __init__(self, minitel, name: str | None = None):
+        self.minitel = minitel
+        self.name = name if name is not None else str(minitel)
+        # Le thread d'émission du Minitel vide la file en tâche de fond :
+        # une session ne doit pas bloquer les autres en attendant sa ligne
+        self.graphics = Graphics(minitel, blocking=False)
+        self.keyboard = KeyboardController(minitel)
+        self.scene = None
+        self.stack: list = []
+        self.deficit = 0
+
+    @contextmanager
+    def activate(self):
+        """Rend la session active pour le contexte courant."""
+        token = _current_session.set(self)
+        try:
+            yield self
+        finally:
+            _current_session.reset(token)
+
+    @property
+    def finished(self) -> bool:
+        return self.scene is None
+
+    @property
+    def backlog(self) -> int:
+        """Octets en attente d'émission sur la ligne du terminal."""
+        return self.minitel.octets_en_attente
+
+    @property
+    def backlog_limit(self) -> int:
+        """Octets émis par la ligne en BACKLOG_SECONDS (7E1 : 10 bits)."""
+        return max(QUANTUM, int(self.minitel.vitesse / 10 * BACKLOG_SECONDS))
+
+    def _queued(self) -> int:
+        return self.minitel.octets_envoyes + self.minitel.octets_en_attente
+
+    def start(self, scene_class, *args, **kwargs) -> int:
+        """Crée la scène initiale et effectue son premier rendu.
+
+        :returns: le nombre d'octets émis
+        """
+        before = self._queued()
+        with self.activate():
+            self.scene = scene_class(*args, **kwargs)
+            self.scene.render()
+        return self._queued() - before
+
+    def step(self) -> int:
+        """Un tour de boucle de la scène courante.
+
+        :returns: le nombre d'octets émis
+        """
+        from .scene.manager import SceneManager
+
+        before = self._queued()
+        with self.activate():
+            SceneManager.step()
+        return self._queued() - before
+
+    def close(self):
+        self.scene = None
+        self.stack.clear()
+        self.minitel.close()
+
+
+class SessionScheduler:
+    """Multiplexe plusieurs sessions dans un seul thread
+
+    Ordonnancement en deficit round robin : à chaque tour une session reçoit
+    un quantum d'octets et n'avance que si son crédit est positif. Une
+    session qui émet beaucoup (rafraîchissement complet, image) consomme son
+    crédit et laisse passer les autres ; une session dont la ligne a plus de
+    BACKLOG_SECONDS d'émission en attente est mise de côté jusqu'à ce que
+    son Minitel ait rattrapé son retard.
+    """
+
+    def __init__(self, sessions=None, quantum: int = QUANTUM):
+        self.sessions: list[Session] = list(sessions) if sessions else []
+        self.quantum = quantum
+        self.rounds = 0
+
+    def add(self, session: Session):
+        self.sessions.append(session)
+
+    def remove(self, session: Session):
+        self.sessions.remove(session)
+
+    def run_once(self) -> int:
+        """Effectue un tour sur toutes les sessions.
+
+        :returns: le nombre total d'octets émis pendant le tour
+        """
+        total = 0
+        for session in list(self.sessions):
+            if session.finished:
+                self.sessions.remove(session)
+                continue
+            if session.backlog > session.backlog_limit:
+                continue
+            session.deficit += self.quantum
+            if session.deficit <= 0:
+                continue
+            sent = session.step()
+            if sent:
+                session.deficit -= sent
+            else:
+                # Session inactive : pas de crédit accumulé
+                session.deficit = 0
+            total += sent
+        self.rounds += 1
+        return total
+
+    def run(self, duration: float | None = None):
+        """Boucle jusqu'à la fin de toutes les sessions ou la durée donnée."""
+        end = None if duration is None else time.monotonic() + duration
+        while self.sessions:
+            if end is not None and time.monotonic() >= end:
+                break
+            if not self.run_once():
+                time.sleep(IDLE_SLEEP)
@@ -1,8 +1,30 @@
+from functools import wraps
+
 from minitel.tui.core.config import SCREEN_HEIGHT, SCREEN_WIDTH
 from minitel.tui.core import Effect, Mixel, Rectangle, Color
 from minitel.tui.keyboard import Key
 from minitel.tui.window.ops import draw_text
 
+def retained(render):
+    """Mémorise le rendu d'une fenêtre.
+
+    Les mixels produits par render sont conservés avec la clé retournée
+    par render_key() et réutilisés tant que cette clé ne change pas ou que
+    la fenêtre n'est pas invalidée. La liste retournée est partagée d'un
+    rendu à l'autre : l'appelant ne doit pas la modifier.
+    """
+    @wraps(render)
+    def wrapper(self) -> list[Mixel]:
+        key = self.render_key()
+        if key is not None and self._retained is not None \
+                and self._retained[0] == key:
+            return self._retained[1]
+        mixels = render(self)
+        self._retained = (key, mixels) if key is not None else None
+        return mixels
+    return wrapper
+
+
 class Window:
     """Classe de base pour la création d’élément d’interface utilisateur
 
@@ -22,11 +44,55 @@ class Window:
             min(rect.width, SCREEN_WIDTH - rect.x + 1),
             min(rect.height, SCREEN_HEIGHT - rect.y + 1)
         )
-    
+        # Zones à redessiner depuis le dernier rendu (voir SceneBase.render)
+        self.damage: list[Rectangle] = []
+        # Dernier rendu mémorisé (clé, mixels), voir retained
+        self._retained: tuple | None = None
+
+    def invalidate(self, rect: Rectangle | None = None):
+        """Déclare une zone à redessiner, toute la fenêtre par défaut.
+
+        Une fenêtre dont l'état change doit appeler cette méthode : la
+        scène ne redessine que les zones déclarées. Le rendu mémorisé
+        éventuel est oublié.
+        """
+        self._retained = None
+        self.damage.append(rect if rect is not None else Rectangle(
+            self.rect.x, self.rect.y, self.rect.width, self.rect.height
+        ))
+
+    def invalidate_row(self, row: int):
+        """Déclare la rangée row (relative à la fenêtre) à redessiner."""
+        if 0 <= row < self.rect.height:
+            self.invalidate(
+                Rectangle(self.rect.x, self.rect.y + row, self.rect.width, 1)
+            )
+
+    def take_damage(self) -> list[Rectangle]:
+        """Retourne et oublie les zones à redessiner."""
+        damage, self.damage = self.damage, []
+        return damage
+
+    def render_key(self):
+        """État visible de la fenêtre, comparé entre deux rendus par
+        retained. None désactive la mémorisation."""
+        return None
+
     def render(self) -> list[Mixel]:
         """
         Retourne la liste de Mixels à afficher,
         chaque widget doit gérer le clipping dans sa propre méthode.
         """
         raise NotImplementedError()
+
+    def render_region(self, rects: list[Rectangle]) -> list[Mixel]:
+        """Mixels de la fenêtre situés dans les rectangles donnés.
+
+        Par défaut la fenêtre est entièrement rendue puis filtrée ; les
+        fenêtres qui savent ne dessiner qu'une partie la redéfinissent.
+        """
+        return [
+            m for m in self.render()
+            if any(rect.contains(m.x, m.y) for rect in rects)
+        ]
     
\ No newline at end of file
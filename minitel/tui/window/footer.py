@@ -1,6 +1,6 @@
 import os
 
-from .base import Window
+from .base import Window, retained
 from .line import HorizontalLine
 from .label import Label
 from minitel.tui.core import Mixel, Rectangle
@@ -8,7 +8,8 @@ from minitel.tui.core.config import SCREEN_HEIGHT, SCREEN_WIDTH
 
 FOOTER_X = 1
 FOOTER_Y = 23
-FOOTER_HEIGHT = SCREEN_HEIGHT - FOOTER_Y
+# Ligne de séparation et texte
+FOOTER_HEIGHT = SCREEN_HEIGHT - FOOTER_Y + 1
 
 class Footer(Window):
 
@@ -16,17 +17,22 @@ class Footer(Window):
         super().__init__(
             Rectangle(FOOTER_X, FOOTER_Y, SCREEN_WIDTH, FOOTER_HEIGHT)
         )
+        self.line = HorizontalLine(1, self.rect.y, self.rect.width, type='middle')
         self.label = Label(1, self.rect.y+1, text=os.path.basename(__file__))
 
+    def render_key(self):
+        return (self.line.render_key(), self.label.render_key())
+
     def update(self, path: str = ''):
         self.label.text = path
+        self.invalidate_row(1)
 
+    @retained
     def render(self) -> list[Mixel]:
         """Affiche le footer
 
         Cette méthode est appelée dès que l’on veut afficher l’élément.
         """
-        return HorizontalLine(1, self.rect.y, self.rect.width, type='middle').render() \
-            + self.label.render()
+        return self.line.render() + self.label.render()
 
 
@@ -3,11 +3,12 @@ from minitel.tui.core.mixel import Mixel
 from minitel.tui.core.rectangle import Rectangle
 from minitel.tui.window.label import Label
 from minitel.tui.window.line import HorizontalLine
-from .base import Window
+from .base import Window, retained
 
 HEADER_X = 1
 HEADER_Y = 1
-HEADER_HEIGHT = SCREEN_HEIGHT - HEADER_Y
+# Titre et ligne de séparation
+HEADER_HEIGHT = 2
 
 class Header(Window):
 
@@ -16,11 +17,15 @@ class Header(Window):
             Rectangle(HEADER_X, HEADER_Y, SCREEN_WIDTH, HEADER_HEIGHT)
         )
         self.label = Label(1, self.rect.y, text="MoDEM - Version: Alpha")
+        self.line = HorizontalLine(1, self.rect.y+1, self.rect.width, type='top')
 
+    def render_key(self):
+        return (self.label.render_key(), self.line.render_key())
+
+    @retained
     def render(self) -> list[Mixel]:
-        """Affiche le footer
+        """Affiche le header
 
         Cette méthode est appelée dès que l’on veut afficher l’élément.
         """
-        return  self.label.render() \
-            + HorizontalLine(1, self.rect.y+1, self.rect.width, type='top').render()
\ No newline at end of file
+        return self.label.render() + self.line.render()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from .base import Window
+from .base import Window, retained
 from .ops import draw_text
 from minitel.tui.core import Color, Effect, Mixel, Rectangle
 
@@ -16,6 +16,12 @@ class Label(Window):
         self.effect = effect
         self.text = text
 
+    def render_key(self):
+        rect = self.rect
+        return (rect.x, rect.y, rect.width, rect.height,
+                self.text, self.color, self.effect)
+
+    @retained
     def render(self) -> list[Mixel]:
         """Affiche le label
 
@@ -12,7 +12,7 @@ class WindowSelectable(Window):
 
     def __init__(self, rect, item_max: int = 21):
         super().__init__(rect)
-        self.index: int = 0
+        self._index: int = 0
         self._last_index: int = -1
         self.item_max: int = item_max   # nombre max de lignes visibles
         self.page = 0                   # page courante
@@ -39,6 +39,19 @@ class WindowSelectable(Window):
             Key.CANCEL: self.handle_cancel,
         }
 
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @index.setter
+    def index(self, value: int):
+        # Seules les rangées de l'ancienne et de la nouvelle sélection sont
+        # à redessiner
+        if value != self._index:
+            self.invalidate_row(self._index)
+            self.invalidate_row(value)
+        self._index = value
+
     @property
     def current_item(self):
         return self.items[self.index]
@@ -76,6 +89,7 @@ class WindowSelectable(Window):
         if has_prev and self.index == 0:
             self.page = max(0, self.page - 1)
             self._dirty = True
+            self.invalidate()
             self.select(0)
             return
 
@@ -83,6 +97,7 @@ class WindowSelectable(Window):
         if has_next and self.index == len(visible) - 1:
             self.page += 1
             self._dirty = True
+            self.invalidate()
             self.select(0)
             return
 
@@ -150,6 +165,7 @@ class WindowSelectable(Window):
             self.page = max(0, self.page - 1)
             self.index = 0  # ou dernière ligne si tu veux
             self._dirty = True
+            self.invalidate()
             return True
         return False
 
@@ -160,6 +176,7 @@ class WindowSelectable(Window):
             self.page += 1
             self.index = 0  # ou première ligne si tu veux
             self._dirty = True
+            self.invalidate()
             return True
         return False
 
@@ -197,9 +214,16 @@ class WindowSelectable(Window):
     # ------------------------
     # Rendering
     # ------------------------
+    def focus_rows(self) -> list[int]:
+        """Rangées de la sélection courante et de la précédente"""
+        rows = {self.rect.y + self.index}
+        if self._last_index >= 0:
+            rows.add(self.rect.y + self._last_index)
+        return sorted(rows)
+
     def draw_item(self, item, row: int = 0) -> list[Mixel]:
         text_color = Color.GRAY_6 if (item == PREV_PAGE_LABEL or item == NEXT_PAGE_LABEL) else Color.WHITE
-        draw_text(self.rect.x, 
+        return draw_text(self.rect.x, 
                 self.rect.y + row,
                 item,
                 color=text_color,
@@ -223,8 +247,24 @@ class WindowSelectable(Window):
                         effect= Effect.INVERT if self.index == row else Effect.NONE)
             )
         
+        self._last_index = self.index
         if full:
             self._last_rendered = mixels
             return cleared + mixels
         else:
-            return mixels
\ No newline at end of file
+            return mixels
+
+    def render_region(self, rects) -> list[Mixel]:
+        """Ne dessine que les items des rangées à redessiner"""
+        rows = {
+            y - self.rect.y
+            for rect in rects
+            for y in range(rect.y, rect.y + rect.height)
+        }
+        mixels = []
+        visible, _, _ = self.paged_items
+        for row, item in enumerate(visible):
+            if row in rows:
+                mixels.extend(self.draw_item(item, row))
+        self._last_index = self.index
+        return mixels
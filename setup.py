@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from distutils.core import setup
+from setuptools import setup
 
 setup(
     name             = 'PyMinitel',
@@ -11,6 +11,7 @@ setup(
     url              = 'https://github.com/Zigazou/PyMinitel',
     version          = '0.2.0',
     packages         = ['minitel', 'minitel.ui'],
+    install_requires = ['pyserial', 'numpy', 'Pillow'],
     platforms        = ['Linux'],
     license          = 'GNU GPLv3',
     classifiers=[